@@ -0,0 +1,312 @@
+import asyncio
+import functools
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, TypeVar
+
+from discord.ext import commands
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Idle buckets are dropped beyond this many, a full bucket behaves exactly like a new one
+MAX_BUCKETS = 4096
+
+
+class Rejected(commands.CommandError):
+    """
+    A command was not admitted, the member has already been told why.
+
+    Parameters
+    ----------
+    reason : str
+        "rate_limited", "busy" or "timeout".
+    retry_after : float
+        Seconds until trying again may succeed.
+    """
+
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(f"{reason}, retry after {retry_after:.1f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Allow `burst` calls at once, refilled at `rate` calls per second.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated_at")
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, now: float) -> float:
+        """
+        Seconds until a token is available, 0 if one is available now.
+        """
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class AdmissionController:
+    """
+    Admission control of one expensive command.
+
+    - Each member and each guild has a token bucket, a command beyond it is rejected with the time to wait.
+    - At most `concurrency` invocations run at once, the others wait in a queue.
+    - The queue is served round-robin across members, so one member queueing many commands cannot starve the others.
+    - The queue is bounded in total and per member, and a command waiting longer than `queue_timeout` gives up,
+      so an overload is answered with "try again" instead of piling up coroutines.
+
+    Parameters
+    ----------
+    name : str
+        The command, for logs and statistics.
+    concurrency : int, optional
+        Invocations running at once.
+    user_rate, user_burst : float, optional
+        Commands per second a member may sustain, and how many at once.
+    guild_rate, guild_burst : float, optional
+        Commands per second a guild may sustain, and how many at once.
+    max_queue : int, optional
+        Invocations waiting for a slot.
+    max_queue_per_user : int, optional
+        Invocations of a single member waiting for a slot.
+    queue_timeout : float, optional
+        Seconds an invocation waits for a slot.
+    clock : Callable[[], float], optional
+        Monotonic time source.
+    """
+
+    def __init__(self, name: str, concurrency: int = 2, user_rate: float = 0.2, user_burst: float = 3, guild_rate: float = 2.0, guild_burst: float = 10, max_queue: int = 20, max_queue_per_user: int = 2, queue_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.guild_rate = guild_rate
+        self.guild_burst = guild_burst
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.queue_timeout = queue_timeout
+        self.clock = clock
+
+        self.buckets: Dict[Hashable, TokenBucket] = {}
+        self.running = 0
+        self.queues: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+        self.waiting = 0
+
+        # Counters
+        self.admitted = 0
+        self.queued = 0
+        self.rejected: Dict[str, int] = {"rate_limited": 0, "busy": 0, "timeout": 0}
+
+    def _bucket(self, key: Hashable, rate: float, burst: float, now: float) -> TokenBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= MAX_BUCKETS:
+                self._prune(now)
+            bucket = self.buckets[key] = TokenBucket(rate, burst, now)
+        return bucket
+
+    def _prune(self, now: float) -> None:
+        for key, bucket in list(self.buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.burst:
+                del self.buckets[key]
+
+    def _reject(self, reason: str, retry_after: float) -> Rejected:
+        self.rejected[reason] += 1
+        logger.info("Rejected %s: %s", self.name, reason)
+        return Rejected(reason, retry_after)
+
+    def check_rate(self, user_id: Hashable, guild_id: Optional[Hashable]) -> List[TokenBucket]:
+        """
+        Check the member and the guild buckets both have a token, without taking it.
+
+        Returns
+        -------
+        List[TokenBucket]
+            The buckets to take a token from once the invocation is admitted or queued.
+
+        Raises
+        ------
+        Rejected
+            If either bucket is empty.
+        """
+        now = self.clock()
+        buckets = [self._bucket(("user", user_id), self.user_rate, self.user_burst, now)]
+        if guild_id is not None:
+            buckets.append(self._bucket(("guild", guild_id), self.guild_rate, self.guild_burst, now))
+        wait = max(bucket.wait_time(now) for bucket in buckets)
+        if wait > 0:
+            raise self._reject("rate_limited", wait)
+        return buckets
+
+    @staticmethod
+    def _take(buckets: List[TokenBucket]) -> None:
+        for bucket in buckets:
+            bucket.take()
+
+    async def acquire(self, user_id: Hashable, guild_id: Optional[Hashable] = None, on_queued: Optional[Callable[[int], Awaitable[Any]]] = None) -> None:
+        """
+        Wait for a slot, release it with `release` once the command is done.
+
+        Parameters
+        ----------
+        user_id : Hashable
+            The member invoking the command.
+        guild_id : Hashable, optional
+            The guild the command is invoked in.
+        on_queued : Callable[[int], Awaitable[Any]], optional
+            Called with the position in the queue when the invocation has to wait.
+
+        Raises
+        ------
+        Rejected
+            If the member or the guild is over its rate, the queue is full, or no slot freed up in time.
+        """
+        buckets = self.check_rate(user_id, guild_id)
+        if self.running < self.concurrency and not self.waiting:
+            self._take(buckets)
+            self.running += 1
+            self.admitted += 1
+            return
+
+        queue = self.queues.get(user_id)
+        if self.waiting >= self.max_queue or (queue is not None and len(queue) >= self.max_queue_per_user):
+            # Nothing is taken from the buckets of a command turned away
+            raise self._reject("busy", self.queue_timeout)
+        self._take(buckets)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if queue is None:
+            queue = self.queues[user_id] = deque()
+        queue.append(future)
+        self.waiting += 1
+        self.queued += 1
+        expiry = loop.call_later(self.queue_timeout, self._expire, user_id, future)
+        try:
+            if on_queued is not None:
+                await on_queued(self.waiting)
+            await future
+        except Rejected:
+            raise
+        except BaseException:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # Granted a slot just before being cancelled, hand it on
+                self.release()
+            else:
+                self._discard(user_id, future)
+            raise
+        finally:
+            expiry.cancel()
+        self.admitted += 1
+
+    def _expire(self, user_id: Hashable, future: asyncio.Future) -> None:
+        if future.done():
+            return
+        self._discard(user_id, future)
+        future.set_exception(self._reject("timeout", self.queue_timeout))
+
+    def _discard(self, user_id: Hashable, future: asyncio.Future) -> None:
+        queue = self.queues.get(user_id)
+        if queue is not None and future in queue:
+            queue.remove(future)
+            self.waiting -= 1
+            if not queue:
+                del self.queues[user_id]
+
+    def release(self) -> None:
+        """
+        Free a slot and hand it to the next member in round-robin order.
+        """
+        self.running -= 1
+        while self.running < self.concurrency and self.queues:
+            user_id, queue = self.queues.popitem(last=False)
+            future = queue.popleft()
+            self.waiting -= 1
+            if queue:
+                # The member goes to the back of the line for its next invocation
+                self.queues[user_id] = queue
+            if not future.done():
+                self.running += 1
+                future.set_result(None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            f"{self.name}_running": self.running,
+            f"{self.name}_waiting": self.waiting,
+            f"{self.name}_admitted": self.admitted,
+            f"{self.name}_queued": self.queued,
+            **{f"{self.name}_{reason}": count for reason, count in self.rejected.items()},
+        }
+
+
+# Controllers by command name, for statistics
+controllers: Dict[str, AdmissionController] = {}
+
+
+def controller(name: str) -> AdmissionController:
+    """
+    The admission controller of a command, configured by `settings.admission[name]`.
+    """
+    limits = settings.admission.get(name, {})
+    controllers[name] = AdmissionController(name, queue_timeout=settings.admission_queue_timeout, **limits)
+    return controllers[name]
+
+
+def _messages(ctx: commands.Context) -> Dict[str, str]:
+    return ctx.bot.catalog.get("templates/bot").get("admission", {})
+
+
+def limit(controller: AdmissionController) -> Callable[[T], T]:
+    """
+    Put a hybrid command behind an admission controller.
+
+    The slot is taken when the callback starts and released in a `finally` around it, so it comes back however
+    the command ends, whether invoked by prefix or as a slash command. A member who is rejected or queued is told
+    so right away, and the rejection reaches the error handlers as `Rejected`.
+    """
+
+    def decorator(func: T) -> T:
+        @functools.wraps(func)
+        async def wrapped(*args: Any, **kwargs: Any) -> Any:
+            # The context follows the cog for commands defined in a cog
+            ctx = args[1] if isinstance(args[0], commands.Cog) else args[0]
+            messages = _messages(ctx)
+
+            async def on_queued(position: int) -> None:
+                await ctx.send(messages.get("queued", "Queued: {position}").format(position=position), ephemeral=True)
+
+            try:
+                await controller.acquire(ctx.author.id, ctx.guild.id if ctx.guild is not None else None, on_queued)
+            except Rejected as e:
+                text = messages.get(e.reason, "Try again in {seconds} seconds")
+                await ctx.send(text.format(seconds=max(1, round(e.retry_after))), ephemeral=True)
+                raise
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                controller.release()
+
+        return wrapped
+
+    return decorator
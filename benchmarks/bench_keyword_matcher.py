@@ -0,0 +1,104 @@
+"""
+Compare the compiled keyword matcher against the per-topic substring loops.
+
+Usage:
+    python benchmarks/bench_keyword_matcher.py --topics 5000 --keywords 3 --messages 2000
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyword_matcher import TopicMatcher
+
+
+def random_word(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def generate_topics(rng: random.Random, topics: int, keywords: int, match: str) -> Dict[str, Any]:
+    return {
+        f"topic{i}": {
+            "chance": 100,
+            "keyword": [random_word(rng, rng.randint(3, 8)) for _ in range(keywords)],
+            "reply": [f"Reply for topic{i}."],
+            "match": match,
+        }
+        for i in range(topics)
+    }
+
+
+def generate_messages(rng: random.Random, topics: Dict[str, Any], messages: int, length: int) -> List[str]:
+    vocabulary = [word for data in topics.values() for word in data["keyword"]]
+    corpus = []
+    for _ in range(messages):
+        words = [random_word(rng, rng.randint(2, 7)) for _ in range(length)]
+        # Sprinkle some real keywords so that both paths find hits
+        for _ in range(rng.randint(0, 3)):
+            words[rng.randrange(length)] = rng.choice(vocabulary)
+        if rng.random() < 0.5:
+            words = [word.capitalize() for word in words]
+        corpus.append(" ".join(words))
+    return corpus
+
+
+def loop_match(topics: Dict[str, Any], content: str, mode: str) -> List[int]:
+    """The original per-topic scan, kept here as the baseline."""
+    check = all if mode == "all" else any
+    folded = content.casefold()
+    hits = []
+    for index, (topic, data) in enumerate(topics.items()):
+        keywords = list(data["keyword"])
+        text = content
+        if data["match"] == "casefold":
+            keywords = [word.casefold() for word in keywords]
+            text = folded
+        if check(word in text for word in keywords):
+            hits.append(index)
+    return hits
+
+
+def run(topics: int, keywords: int, messages: int, length: int, seed: int, match: str) -> None:
+    rng = random.Random(seed)
+    topic_data = generate_topics(rng, topics, keywords, match)
+    corpus = generate_messages(rng, topic_data, messages, length)
+
+    for mode in ("all", "any"):
+        start = time.perf_counter()
+        matcher = TopicMatcher(topic_data, mode=mode)
+        compile_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = [loop_match(topic_data, content, mode) for content in corpus]
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = [matcher.match(content) for content in corpus]
+        matcher_time = time.perf_counter() - start
+
+        if actual != expected:
+            raise AssertionError(f"Matcher disagrees with the baseline in {mode} mode")
+
+        print(f"[{mode}, {match}] {topics} topics x {keywords} keywords, {messages} messages of {length} words")
+        print(f"  compile : {compile_time * 1000:10.2f} ms")
+        print(f"  loops   : {loop_time / messages * 1e6:10.2f} us/msg")
+        print(f"  matcher : {matcher_time / messages * 1e6:10.2f} us/msg")
+        print(f"  speedup : {loop_time / matcher_time:10.2f} x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=5000)
+    parser.add_argument("--keywords", type=int, default=3)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--length", type=int, default=12, help="words per message")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--match", choices=["exact", "casefold"], default="exact", help="match mode of every topic")
+    args = parser.parse_args()
+    run(args.topics, args.keywords, args.messages, args.length, args.seed, args.match)
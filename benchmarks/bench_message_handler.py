@@ -0,0 +1,232 @@
+"""
+Replay a message corpus through MessageHandler.on_message and report its throughput.
+
+The corpus is JSONL, one message per line:
+    {"author_id": 1, "channel_id": 2, "content": "hello", "mentions": [3]}
+
+Usage:
+    python benchmarks/bench_message_handler.py --messages 20000 --topics 500
+    python benchmarks/bench_message_handler.py --corpus recorded.jsonl --language en
+    python benchmarks/bench_message_handler.py --messages 5000 --write-corpus synthetic.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# settings.py requires the guild configuration, any value will do offline
+for variable in ("GUILD_ID", "LOG_CHANNEL_ID", "WELCOME_CHANNEL_ID", "TEST_CHANNEL_ID", "ROLE_CHANNEL_ID", "CONFERENCE_CHANNEL_ID",
+                 "ADMIN_ROLE_ID", "TESTER_ROLE_ID", "MEMBER_ROLE_ID", "SUBSCRIBER_ROLE_ID", "ROLE_MESSAGE_ID"):
+    os.environ.setdefault(variable, "0")
+
+import settings
+from catalog import Catalog
+from cogs.message_handler import MessageHandler
+
+BOT_ID = 1
+VIP_IDS = [123456789012345678, 987654321098765432]
+
+
+class FakeUser:
+    def __init__(self, id: int) -> None:
+        self.id = id
+        self.name = f"user{id}"
+        self.display_name = self.name
+
+    def __eq__(self, other: Any) -> bool:
+        return getattr(other, "id", None) == self.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeChannel:
+    def __init__(self, id: int) -> None:
+        self.id = id
+        self.name = f"channel{id}"
+        self.sent = 0
+
+    async def send(self, content: Optional[str] = None, **kwargs: Any) -> None:
+        self.sent += 1
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeMessage:
+    def __init__(self, author: FakeUser, channel: FakeChannel, content: str, mentions: List[int]) -> None:
+        self.author = author
+        self.channel = channel
+        self.guild = "guild"
+        self.content = content
+        self.mentions = [FakeUser(id) for id in mentions]
+
+
+class StubDispatcher:
+    """Count the replies instead of queueing them, so only the handler itself is measured."""
+
+    def __init__(self) -> None:
+        self.replies = 0
+
+    def send(self, channel: FakeChannel, content: Optional[str] = None, **kwargs: Any) -> None:
+        self.replies += 1
+
+
+class FakeBot:
+    def __init__(self, catalog: Catalog) -> None:
+        self.user = FakeUser(BOT_ID)
+        self.catalog = catalog
+        self.dispatcher = StubDispatcher()
+
+
+def random_word(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def write_keywords(directory: Path, rng: random.Random, topics: int, keywords: int) -> None:
+    """Generate all/any keyword files of the requested size, plus the VIP file of the configured language."""
+    (directory / "keywords").mkdir(parents=True)
+    for kind in ("all", "any"):
+        data = {
+            "topic": {
+                f"{kind}{i}": {
+                    "chance": 100,
+                    "keyword": [random_word(rng, rng.randint(3, 8)) for _ in range(keywords)],
+                    "reply": [f"Reply for {kind}{i}."],
+                }
+                for i in range(topics)
+            }
+        }
+        (directory / "keywords" / f"{kind}.json").write_text(json.dumps(data), encoding="utf-8")
+    (directory / "keywords" / "vip.json").write_text(settings.vip_keywords.read_text(encoding="utf-8"), encoding="utf-8")
+
+
+def generate_corpus(rng: random.Random, catalog: Catalog, messages: int) -> List[Dict[str, Any]]:
+    vocabulary = [
+        word
+        for name in ("keywords/all", "keywords/any")
+        for data in catalog.get(name).get("topic", {}).values()
+        for word in data["keyword"]
+    ] or ["hello"]
+    corpus = []
+    for _ in range(messages):
+        words = [random_word(rng, rng.randint(2, 7)) for _ in range(rng.randint(3, 20))]
+        if rng.random() < 0.3:
+            words[rng.randrange(len(words))] = rng.choice(vocabulary)
+        mentions = [rng.choice(VIP_IDS + [rng.randint(10, 10 ** 6)])] if rng.random() < 0.1 else []
+        corpus.append({
+            "author_id": rng.choice(VIP_IDS) if rng.random() < 0.05 else rng.randint(10, 10 ** 6),
+            "channel_id": rng.randint(100, 120),
+            "content": " ".join(words + [f"<@{id}>" for id in mentions]),
+            "mentions": mentions,
+        })
+    return corpus
+
+
+def build_messages(corpus: List[Dict[str, Any]]) -> List[FakeMessage]:
+    channels: Dict[int, FakeChannel] = {}
+    messages = []
+    for entry in corpus:
+        channel = channels.setdefault(entry["channel_id"], FakeChannel(entry["channel_id"]))
+        messages.append(FakeMessage(FakeUser(entry["author_id"]), channel, entry["content"], entry.get("mentions", [])))
+    return messages
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def replay(handler: MessageHandler, messages: List[FakeMessage]) -> Dict[str, float]:
+    latencies = []
+    start = time.perf_counter()
+    for message in messages:
+        begin = time.perf_counter()
+        await handler.on_message(message)
+        latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - start
+    replies = handler.bot.dispatcher.replies
+
+    # Second pass with tracing on, tracemalloc slows everything down so it is kept out of the timings
+    tracemalloc.start()
+    peaks = []
+    for message in messages:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        await handler.on_message(message)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+    tracemalloc.stop()
+
+    return {
+        "messages": len(messages),
+        "msgs_per_sec": len(messages) / elapsed,
+        "p50_us": percentile(latencies, 0.50) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+        "alloc_bytes_per_msg": statistics.mean(peaks),
+        "replies": replies,
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, float]:
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tempdir:
+        if args.topics:
+            directory = Path(tempdir)
+            write_keywords(directory, rng, args.topics, args.keywords)
+        else:
+            directory = settings.languages_directory / args.language
+        catalog = Catalog(directory)
+
+        if args.corpus:
+            with open(args.corpus, "r", encoding="utf-8") as f:
+                corpus = [json.loads(line) for line in f if line.strip()]
+        else:
+            corpus = generate_corpus(rng, catalog, args.messages)
+        if args.write_corpus:
+            with open(args.write_corpus, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(entry, ensure_ascii=False) + "\n" for entry in corpus)
+
+        handler = MessageHandler(FakeBot(catalog))
+        return asyncio.run(replay(handler, build_messages(corpus)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="JSONL corpus to replay, synthetic when omitted")
+    parser.add_argument("--write-corpus", help="save the replayed corpus as JSONL")
+    parser.add_argument("--messages", type=int, default=10000, help="size of the synthetic corpus")
+    parser.add_argument("--language", default=settings.language, help="keyword files to use when --topics is 0")
+    parser.add_argument("--topics", type=int, default=0, help="generate all/any keyword files with this many topics each")
+    parser.add_argument("--keywords", type=int, default=3, help="keywords per generated topic")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-rate", type=float, default=0, help="exit with an error below this many msgs/sec")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print(f"messages   : {report['messages']}")
+        print(f"replies    : {report['replies']}")
+        print(f"throughput : {report['msgs_per_sec']:10.0f} msgs/sec")
+        print(f"latency    : p50 {report['p50_us']:.1f} us, p99 {report['p99_us']:.1f} us")
+        print(f"allocation : {report['alloc_bytes_per_msg']:.0f} bytes/msg (peak)")
+    if report["msgs_per_sec"] < args.min_rate:
+        sys.exit(f"Throughput {report['msgs_per_sec']:.0f} msgs/sec is below {args.min_rate:.0f}")
@@ -0,0 +1,208 @@
+"""
+Load test of /report: concurrent report commands against the local stub report API, all offline.
+
+Calls the report command coroutine of ReportManager with fake contexts, and measures the end-to-end latency
+and throughput of the commands and the lag of the event loop while they run.
+
+Usage:
+    python benchmarks/bench_report_command.py --requests 2000 --concurrency 50 --items 5000
+    python benchmarks/bench_report_command.py --latency 0.05 --error-rate 0.2 --ttl 0
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# settings.py requires the guild configuration, any value will do offline
+for variable in ("GUILD_ID", "LOG_CHANNEL_ID", "WELCOME_CHANNEL_ID", "TEST_CHANNEL_ID", "ROLE_CHANNEL_ID", "CONFERENCE_CHANNEL_ID",
+                 "ADMIN_ROLE_ID", "TESTER_ROLE_ID", "MEMBER_ROLE_ID", "SUBSCRIBER_ROLE_ID", "ROLE_MESSAGE_ID"):
+    os.environ.setdefault(variable, "0")
+
+from aiohttp import web
+
+import settings
+from benchmarks.stub_report_api import ADJECTIVES, CATEGORIES, StubReportAPI
+from catalog import Catalog
+from cogs.report_manager import ReportManager
+
+BOT_ID = 1
+
+
+class FakeAvatar:
+    url = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+
+class FakeUser:
+    def __init__(self, id: int) -> None:
+        self.id = id
+        self.name = f"user{id}"
+        self.display_name = self.name
+        self.avatar = None
+        self.default_avatar = FakeAvatar()
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeContext:
+    """Collects what a command sends instead of sending it."""
+
+    def __init__(self, author: FakeUser) -> None:
+        self.author = author
+        self.sent: List[Dict[str, Any]] = []
+
+    async def send(self, content: Optional[str] = None, **kwargs: Any) -> None:
+        self.sent.append({"content": content, **kwargs})
+
+    @property
+    def embeds(self) -> List[Any]:
+        return [message["embed"] for message in self.sent if message.get("embed") is not None]
+
+
+class FakeBot:
+    def __init__(self, catalog: Catalog) -> None:
+        self.user = FakeUser(BOT_ID)
+        self.catalog = catalog
+
+    def dispatch(self, event: str, *args: Any) -> None:
+        pass
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def random_arguments(rng: random.Random) -> Tuple[Optional[str], ...]:
+    """The arguments of a /report as members type them: report type, then optional filters."""
+    return (
+        rng.choice(["p", "t", "profit", "trends"]),
+        rng.choice([None, None, *CATEGORIES]),
+        rng.choice([None, None, *ADJECTIVES]),
+        rng.choice([None, None, None, str(rng.randint(0, 10))]),
+        rng.choice([None, None, None, "7", "3"]),
+    )
+
+
+async def monitor_lag(interval: float, lags: List[float], stop: asyncio.Event) -> None:
+    # A task sleeping `interval` wakes up late by how long the loop was blocked
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - start - interval))
+
+
+async def run_load(cog: ReportManager, requests: int, concurrency: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Run `requests` report commands, at most `concurrency` at a time, and measure them.
+    """
+    rng = random.Random(seed)
+    calls = [random_arguments(rng) for _ in range(requests)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failures = 0
+
+    async def call(index: int, arguments: Tuple[Optional[str], ...]) -> None:
+        nonlocal failures
+        ctx = FakeContext(FakeUser(1000 + index % 500))
+        async with semaphore:
+            begin = time.perf_counter()
+            # Past the admission control, which would turn most of the load away
+            await cog.report.callback.__wrapped__(cog, ctx, *arguments)
+            latencies.append(time.perf_counter() - begin)
+        # A report is answered with an embed, errors with a text message only
+        if not ctx.embeds:
+            failures += 1
+
+    lags: List[float] = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_lag(0.005, lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(call(index, arguments) for index, arguments in enumerate(calls)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "failures": failures,
+        "seconds": elapsed,
+        "requests_per_sec": requests / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "loop_lag_p99_ms": percentile(lags, 0.99) * 1000,
+        "loop_lag_max_ms": max(lags, default=0.0) * 1000,
+        "cache": cog.cache.stats(),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    api = StubReportAPI(args.items, args.latency, args.jitter, args.error_rate, refresh=args.refresh, seed=args.seed)
+    # Generate the first reports before measuring, so the stub does not block the loop during the run
+    for report_type in ("profit", "trends"):
+        for period in (None, 3, 7):
+            api.body(report_type, period, api.timestamp())
+
+    runner = web.AppRunner(api.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        settings.api_url = f"http://127.0.0.1:{port}"
+        settings.report_cache_ttl = args.ttl
+        settings.report_archive_directory = Path(tempdir)
+        settings.report_prefetch_interval = 0
+        settings.api_health_interval = 0
+
+        cog = ReportManager(FakeBot(Catalog(settings.languages_directory / settings.language)))
+        await cog.cog_load()
+        try:
+            report = await run_load(cog, args.requests, args.concurrency, args.seed)
+        finally:
+            await cog.cog_unload()
+            await runner.cleanup()
+    report["api_requests"] = api.requests
+    report["api_errors"] = api.errors
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000, help="report commands to run")
+    parser.add_argument("--concurrency", type=int, default=50, help="commands running at the same time")
+    parser.add_argument("--items", type=int, default=2000, help="items per report")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds every API request waits")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra seconds of API latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of the API requests failing")
+    parser.add_argument("--refresh", type=float, default=0.0, help="seconds between two report timestamps, 0 = never")
+    parser.add_argument("--ttl", type=float, default=settings.report_cache_ttl, help="report cache TTL, 0 asks the API on every command")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print(f"requests   : {report['requests']} ({report['concurrency']} concurrent), {report['failures']} failed")
+        print(f"throughput : {report['requests_per_sec']:10.1f} requests/sec")
+        print(f"latency    : p50 {report['p50_ms']:.1f} ms, p95 {report['p95_ms']:.1f} ms, p99 {report['p99_ms']:.1f} ms")
+        print(f"loop lag   : p99 {report['loop_lag_p99_ms']:.1f} ms, max {report['loop_lag_max_ms']:.1f} ms")
+        print(f"api        : {report['api_requests']} requests, {report['api_errors']} injected errors")
+        print(f"cache      : {report['cache']}")
@@ -0,0 +1,97 @@
+"""
+Compare the peak memory and time of loading a report by decoding the whole body against the streaming parser.
+
+Usage:
+    python benchmarks/bench_report_ingest.py --items 50000
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from reports.ingest import ReportStreamParser
+from reports.snapshot import Snapshot
+
+
+def generate_body(rng: random.Random, items: int) -> bytes:
+    data = [
+        {
+            "category": rng.choice(["buff", "costume", "accessory"]),
+            "name": f"Item {rng.randint(0, 10 ** 6)}",
+            "enhance": rng.randint(0, 10),
+            "price": rng.randint(1, 10 ** 9),
+            "profit": rng.randint(-10 ** 6, 10 ** 6),
+            "rate": rng.random(),
+            "stock": rng.randint(0, 99),
+            "volumechange": rng.randint(-50, 50),
+            "averagetradesperday": rng.random() * 10,
+            "description": "Attribute the reports never show " * 4,
+        }
+        for _ in range(items)
+    ]
+    return json.dumps({"timestamp": "2024-01-01T00:00:00", "data": data}).encode("utf-8")
+
+
+def full_decode(body: bytes, chunk_size: int) -> Snapshot:
+    # What the aiohttp response.json path does: join the body, decode it, then index it
+    chunks = [body[start:start + chunk_size] for start in range(0, len(body), chunk_size)]
+    payload = json.loads(b"".join(chunks))
+    return Snapshot(payload)
+
+
+def streaming(body: bytes, chunk_size: int) -> Snapshot:
+    parser = ReportStreamParser()
+    for start in range(0, len(body), chunk_size):
+        parser.feed(body[start:start + chunk_size])
+    parser.close()
+    return Snapshot.from_columns(parser.timestamp, parser.columns)
+
+
+def measure(load: Callable[[bytes, int], Snapshot], body: bytes, chunk_size: int) -> Tuple[float, float, Snapshot]:
+    start = time.perf_counter()
+    load(body, chunk_size)
+    elapsed = time.perf_counter() - start
+
+    # Second run with tracing on, tracemalloc slows everything down so it is kept out of the timing
+    tracemalloc.start()
+    snapshot = load(body, chunk_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, snapshot
+
+
+def run(items: int, chunk_size: int, seed: int) -> Dict[str, Any]:
+    body = generate_body(random.Random(seed), items)
+    report: Dict[str, Any] = {"items": items, "body_mb": len(body) / 2 ** 20}
+    sizes: List[int] = []
+    for name, load in (("full", full_decode), ("streaming", streaming)):
+        elapsed, peak, snapshot = measure(load, body, chunk_size)
+        sizes.append(snapshot.size)
+        report[name] = {"seconds": elapsed, "peak_mb": peak / 2 ** 20}
+    if sizes[0] != sizes[1]:
+        raise AssertionError(f"Item counts differ: {sizes}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--chunk-size", type=int, default=65536, help="bytes per network chunk")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args.items, args.chunk_size, args.seed)
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print(f"{report['items']} items, body {report['body_mb']:.1f} MB")
+        for name in ("full", "streaming"):
+            print(f"  {name:9s}: peak {report[name]['peak_mb']:8.1f} MB, {report[name]['seconds'] * 1000:8.1f} ms")
@@ -0,0 +1,146 @@
+"""
+Local stand-in for the report API, serving synthetic reports with configurable size, latency and errors.
+
+Endpoints:
+    GET /health
+    GET /report/{profit|trends}?period=<days>
+
+Usage:
+    python benchmarks/stub_report_api.py --port 8000 --items 5000 --latency 0.05 --error-rate 0.1
+    API_URL=http://127.0.0.1:8000 python guild_bot.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime as dt, timedelta
+from typing import Dict, Optional, Tuple
+
+from aiohttp import web
+
+CATEGORIES = ("buff", "costume", "accessory")
+ADJECTIVES = ("ancient", "blazing", "frozen", "shadow", "golden", "crimson", "silent", "storm", "lunar", "iron")
+NOUNS = ("sword", "robe", "ring", "bow", "shield", "helm", "amulet", "staff", "boots", "cloak")
+
+
+class StubReportAPI:
+    """
+    Synthetic report API.
+
+    Parameters
+    ----------
+    items : int, optional
+        Items per report.
+    latency : float, optional
+        Seconds every request waits before answering.
+    jitter : float, optional
+        Random extra seconds of latency, up to this much.
+    error_rate : float, optional
+        Fraction of the requests answered with `error_status`.
+    error_status : int, optional
+        Status of the injected errors.
+    refresh : float, optional
+        Seconds between two report timestamps, 0 keeps the first report forever.
+    seed : int, optional
+        Seed of the generated items, latency and errors.
+    """
+
+    def __init__(self, items: int = 1000, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, error_status: int = 503, refresh: float = 0.0, seed: int = 0) -> None:
+        self.items = items
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.refresh = refresh
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.started = dt(2024, 1, 1)
+        self.origin = time.monotonic()
+        self.bodies: Dict[Tuple[str, Optional[int], str], bytes] = {}
+
+        # Counters
+        self.requests = 0
+        self.errors = 0
+
+    def timestamp(self) -> str:
+        # A new report every `refresh` seconds since the stub started
+        steps = int((time.monotonic() - self.origin) // self.refresh) if self.refresh > 0 else 0
+        return (self.started + timedelta(seconds=steps * self.refresh)).isoformat()
+
+    def body(self, report_type: str, period: Optional[int], timestamp: str) -> bytes:
+        """
+        The report of a timestamp, generated once, only the latest report of each type and period is kept.
+        """
+        key = (report_type, period, timestamp)
+        body = self.bodies.get(key)
+        if body is None:
+            rng = random.Random(f"{self.seed}/{report_type}/{period}/{timestamp}")
+            data = [
+                {
+                    "category": rng.choice(CATEGORIES),
+                    "name": f"{rng.choice(ADJECTIVES).title()} {rng.choice(NOUNS).title()} {index}",
+                    "enhance": rng.randint(0, 10),
+                    "price": rng.randint(1, 10 ** 9),
+                    "profit": rng.randint(-10 ** 6, 10 ** 6),
+                    "rate": rng.random() * 3,
+                    "stock": rng.randint(0, 99),
+                    "volumechange": rng.randint(-50, 50),
+                    "averagetradesperday": rng.random() * 10,
+                }
+                for index in range(self.items)
+            ]
+            body = json.dumps({"timestamp": timestamp, "data": data}).encode("utf-8")
+            self.bodies = {cached: value for cached, value in self.bodies.items() if cached[:2] != key[:2]}
+            self.bodies[key] = body
+        return body
+
+    async def _delay(self) -> Optional[web.Response]:
+        self.requests += 1
+        delay = self.latency + self.rng.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate > 0 and self.rng.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=self.error_status, text="injected error")
+        return None
+
+    async def health(self, request: web.Request) -> web.Response:
+        return await self._delay() or web.Response(text="OK")
+
+    async def report(self, request: web.Request) -> web.Response:
+        error = await self._delay()
+        if error is not None:
+            return error
+        report_type = request.match_info["report_type"]
+        if report_type not in ("profit", "trends"):
+            return web.Response(status=404)
+        try:
+            period = int(request.query["period"]) if "period" in request.query else None
+        except ValueError:
+            return web.Response(status=400)
+        body = self.body(report_type, period, self.timestamp())
+        return web.Response(body=body, content_type="application/json")
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/health", self.health)
+        app.router.add_get("/report/{report_type}", self.report)
+        return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--items", type=int, default=1000, help="items per report")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds every request waits")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra seconds of latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of the requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--refresh", type=float, default=0.0, help="seconds between two report timestamps, 0 = never")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    api = StubReportAPI(args.items, args.latency, args.jitter, args.error_rate, args.error_status, args.refresh, args.seed)
+    web.run_app(api.app(), host=args.host, port=args.port)
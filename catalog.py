@@ -0,0 +1,165 @@
+import asyncio
+import copy
+import logging
+import pathlib
+from typing import Any, Callable, Dict, Optional
+
+import utilities
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogSnapshot:
+    """
+    An immutable view of the language files and the structures compiled from them.
+
+    Parameters
+    ----------
+    version : int
+        Increased on every rebuild.
+    files : Dict[str, Dict[str, Any]]
+        The content of every file, keyed by its path relative to the language directory without suffix, e.g. "keywords/all".
+    mtimes : Dict[str, float]
+        The modification time of every file when it was loaded.
+    compiled : Dict[str, Any]
+        The output of every registered compiler.
+    """
+
+    def __init__(self, version: int, files: Dict[str, Dict[str, Any]], mtimes: Dict[str, float], compiled: Dict[str, Any]) -> None:
+        self.version = version
+        self.files = files
+        self.mtimes = mtimes
+        self.compiled = compiled
+
+
+class Catalog:
+    """
+    Keyword and template catalog of a language, compiled once and rebuilt in the background when a file changes.
+
+    Readers take `catalog.snapshot` (or use the helpers) and never touch the disk. A rebuild creates a new
+    snapshot and swaps it in with a single assignment, so a reader always sees one consistent version.
+
+    Parameters
+    ----------
+    directory : pathlib.Path
+        The language directory, e.g. "languages/<language>".
+    poll_interval : float, optional
+        Seconds between two checks of the file modification times.
+    """
+
+    def __init__(self, directory: pathlib.Path, poll_interval: float = 5.0) -> None:
+        self.directory = pathlib.Path(directory)
+        self.poll_interval = poll_interval
+        self.compilers: Dict[str, Callable[[Dict[str, Dict[str, Any]]], Any]] = {}
+        self.watcher: Optional[asyncio.Task] = None
+        self.snapshot = self._build(self._scan(), None, {})
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """
+        The content of a file, shared between readers and must not be modified.
+        """
+        return self.snapshot.files.get(name, {})
+
+    def copy(self, name: str) -> Dict[str, Any]:
+        """
+        A private copy of the content of a file, for callers filling in the template.
+        """
+        return copy.deepcopy(self.get(name))
+
+    def compiled(self, name: str) -> Any:
+        return self.snapshot.compiled.get(name)
+
+    def add_compiler(self, name: str, compiler: Callable[[Dict[str, Dict[str, Any]]], Any]) -> Any:
+        """
+        Register a compiler, it runs now on the current files and again on every rebuild.
+
+        Parameters
+        ----------
+        name : str
+            The name the compiled structure is published under.
+        compiler : Callable[[Dict[str, Dict[str, Any]]], Any]
+            Turn the content of all files into the compiled structure.
+
+        Returns
+        -------
+        Any
+            The compiled structure for the current files.
+        """
+        self.compilers[name] = compiler
+        snapshot = self.snapshot
+        compiled = dict(snapshot.compiled)
+        compiled[name] = compiler(snapshot.files)
+        self.snapshot = CatalogSnapshot(snapshot.version, snapshot.files, snapshot.mtimes, compiled)
+        return compiled[name]
+
+    def remove_compiler(self, name: str) -> None:
+        self.compilers.pop(name, None)
+
+    def _scan(self) -> Dict[str, float]:
+        mtimes: Dict[str, float] = {}
+        for path in self.directory.rglob("*.json"):
+            name = path.relative_to(self.directory).with_suffix("").as_posix()
+            mtimes[name] = path.stat().st_mtime
+        return mtimes
+
+    def _build(self, mtimes: Dict[str, float], previous: Optional[CatalogSnapshot], compilers: Dict[str, Callable[[Dict[str, Dict[str, Any]]], Any]]) -> CatalogSnapshot:
+        files: Dict[str, Dict[str, Any]] = {}
+        for name, mtime in mtimes.items():
+            if previous is not None and previous.mtimes.get(name) == mtime:
+                files[name] = previous.files[name]
+                continue
+            data = utilities.load_json(self.directory / f"{name}.json")
+            if not data and previous is not None and previous.files.get(name):
+                # Keep serving the last good version of a file being edited
+                logger.warning("Keep the previous version of %s", name)
+                data = previous.files[name]
+            files[name] = data
+
+        compiled = {name: compiler(files) for name, compiler in compilers.items()}
+        version = previous.version + 1 if previous is not None else 1
+        return CatalogSnapshot(version, files, mtimes, compiled)
+
+    async def refresh(self) -> bool:
+        """
+        Rebuild the catalog off the event loop if any file was added, removed or modified.
+
+        Returns
+        -------
+        bool
+            Whether a new snapshot was swapped in.
+        """
+        previous = self.snapshot
+        mtimes = await asyncio.to_thread(self._scan)
+        if mtimes == previous.mtimes:
+            return False
+
+        try:
+            snapshot = await asyncio.to_thread(self._build, mtimes, previous, dict(self.compilers))
+        except Exception as e:
+            logger.exception("Failed to rebuild catalog %s: %s", self.directory, e)
+            return False
+
+        # A compiler registered meanwhile is compiled on the next change, keep its current output until then
+        for name, compiled in self.snapshot.compiled.items():
+            if name in self.compilers:
+                snapshot.compiled.setdefault(name, compiled)
+        self.snapshot = snapshot
+        logger.info("Reloaded catalog %s version %d", self.directory, snapshot.version)
+        return True
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.exception("Failed to check catalog %s: %s", self.directory, e)
+
+    def start(self) -> None:
+        if self.watcher is None or self.watcher.done():
+            self.watcher = asyncio.create_task(self._watch())
+
+    async def close(self) -> None:
+        if self.watcher is not None:
+            self.watcher.cancel()
+            self.watcher = None
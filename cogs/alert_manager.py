@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime as dt
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+import settings
+from dispatcher import Priority
+from reports.render import enhance_label, format_decimal, format_thousands
+from startup_profile import lazy_import
+
+if TYPE_CHECKING:
+    from reports.alerts import Alert, AlertStore
+    from reports.snapshot import Snapshot
+
+# Only needed once the alerts are loaded
+alerting = lazy_import("reports.alerts", lazy=settings.startup_mode == "lazy")
+
+logger = logging.getLogger("alert_manager")
+
+# Report type as typed -> report type
+REPORT_TYPES = {"profit": "profit", "p": "profit", "trends": "trends", "t": "trends"}
+
+# Discord shows at most 25 choices
+MAX_CHOICES = 25
+
+
+def format_threshold(threshold: float) -> str:
+    return format_thousands(threshold) if float(threshold).is_integer() else format_decimal(threshold)
+
+
+class AlertManager(commands.Cog):
+    """
+    Price alerts of subscribers, checked against every new unfiltered report snapshot loaded by ReportManager.
+    """
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.store: Optional["AlertStore"] = None
+        # The latest snapshot time evaluated per report type, older snapshots loaded late are ignored
+        self.evaluated: Dict[str, dt] = {}
+        # Notification lines per subscriber, sent together after `alert_coalesce_seconds`
+        self.pending: Dict[int, List[str]] = {}
+        self.flush_task: Optional[asyncio.Task] = None
+
+    async def cog_load(self) -> None:
+        self.store = await asyncio.to_thread(alerting.AlertStore, settings.alert_store)
+
+    async def cog_unload(self) -> None:
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+        if self.store is not None:
+            await self.save()
+
+    @property
+    def messages(self) -> Dict[str, str]:
+        return self.bot.catalog.get("templates/bot").get("alert", {})
+
+    async def save(self) -> None:
+        version, data = self.store.dump()
+        try:
+            await asyncio.to_thread(self.store.write, version, data)
+        except OSError as e:
+            logger.exception("Failed to save the alerts to %s: %s", settings.alert_store, e)
+
+    def condition(self, alert: "Alert") -> str:
+        """
+        An alert as the subscriber set it, e.g. "profit rate >= 1.500 in category costume".
+        """
+        messages = self.messages
+        scope = ""
+        if alert.name is not None:
+            scope += messages["scope_name"].format(name=alert.name)
+        if alert.enhance is not None:
+            scope += messages["scope_enhance"].format(enhance=enhance_label(alert.enhance))
+        if alert.category is not None:
+            scope += messages["scope_category"].format(category=alert.category)
+        return messages["condition"].format(report=alert.report_type, metric=alert.metric, operator=alert.operator, threshold=format_threshold(alert.threshold), scope=scope)
+
+    @commands.Cog.listener()
+    async def on_report_snapshot(self, report_type: str, snapshot: "Snapshot") -> None:
+        """
+        Evaluate every alert of the report type on a new snapshot, and queue the notifications of the alerts that started to hold.
+        """
+        if self.store is None or not len(self.store):
+            return
+        last = self.evaluated.get(report_type)
+        if last is not None and snapshot.report_time <= last:
+            return
+        self.evaluated[report_type] = snapshot.report_time
+
+        # The index is never modified, alerts added meanwhile are evaluated on the next snapshot
+        index = self.store.index()
+        start = time.perf_counter()
+        triggers = await asyncio.to_thread(index.evaluate, report_type, snapshot)
+        fresh = self.store.update_firing(report_type, triggers)
+        logger.info("Evaluated %d alerts on the %s report at %s in %.1f ms: %d holding, %d new",
+                    len(index), report_type, snapshot.timestamp, (time.perf_counter() - start) * 1000, len(triggers), len(fresh))
+
+        for trigger in fresh:
+            labels = snapshot.row_labels(trigger.row_id)
+            line = self.messages["notification_line"].format(
+                id=trigger.alert.id,
+                condition=self.condition(trigger.alert),
+                enhance=labels.get("enhance"),
+                name=labels.get("name"),
+                value=labels.get(trigger.alert.metric),
+                count=trigger.count,
+            )
+            self.pending.setdefault(trigger.alert.user_id, []).append(line)
+        if self.pending and (self.flush_task is None or self.flush_task.done()):
+            self.flush_task = asyncio.create_task(self.flush_later())
+        await self.save()
+
+    async def flush_later(self) -> None:
+        # Alerts of both report types, loaded one after another, end up in the same notification
+        await asyncio.sleep(settings.alert_coalesce_seconds)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Send every pending notification, one per subscriber.
+        """
+        pending, self.pending = self.pending, {}
+        limit = settings.alert_max_lines
+        for user_id, lines in pending.items():
+            if len(lines) > limit:
+                pending[user_id] = lines[:limit] + [self.messages["more"].format(count=len(lines) - limit)]
+
+        if settings.alert_delivery == "dm":
+            delivered = await asyncio.gather(*(self.direct_message(user_id, lines) for user_id, lines in pending.items()))
+            undelivered = {user_id: lines for (user_id, lines), ok in zip(pending.items(), delivered) if not ok}
+        else:
+            undelivered = pending
+        if undelivered:
+            self.mention(undelivered)
+
+    async def direct_message(self, user_id: int, lines: List[str]) -> bool:
+        embed = discord.Embed(title=self.messages["notification_title"], description="\n".join(lines))
+        try:
+            user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+            await self.bot.dispatcher.send(user, embed=embed, priority=Priority.NORMAL)
+        except discord.HTTPException as e:
+            logger.info("Failed to send the alerts of %s by direct message: %s", user_id, e)
+            return False
+        return True
+
+    def mention(self, pending: Dict[int, List[str]]) -> None:
+        """
+        Mention the subscribers in the alert channel, the dispatcher merges the lines of several subscribers into few messages.
+        """
+        channel = self.bot.get_channel(settings.alert_channel_id) if settings.alert_channel_id else None
+        if channel is None:
+            logger.warning("No alert channel, %d subscribers were not notified", len(pending))
+            return
+        for user_id, lines in pending.items():
+            self.bot.dispatcher.send(channel, self.messages["mention"].format(mention=f"<@{user_id}>", lines="\n".join(lines)), priority=Priority.NORMAL)
+
+    @commands.hybrid_command(name="alert", description="alert <metric> <threshold> [operator] [name] [enhance] [category] [report_type]")
+    @commands.has_any_role(settings.guild["role"]["subscriber"]["id"])
+    async def alert(self, ctx: commands.Context, metric: str, threshold: str, operator: str = None, name: str = None, enhance: str = None, category: str = None, report_type: str = None) -> None:
+        """
+        Adds a price alert, the subscriber is notified when it starts to hold on a new report.
+
+        Parameters
+        ----------
+        ctx : discord.ext.commands.Context
+            The context in which the command was invoked.
+        metric : str
+            "price", "profit", "rate", "stock", "volumechange" or "averagetradesperday"
+        threshold : str
+            The value the metric is compared with
+        operator : str, optional
+            ">=" (default) or "<="
+        name : str, optional
+            The exact item name, any item when omitted
+        enhance : str, optional
+            The enhancement level (0 - 10), any level when omitted
+        category : str, optional
+            The item category, any category when omitted
+        report_type : str, optional
+            "p" for profit report (default)
+            "t" for trends report
+        """
+        messages = self.messages
+        metric = metric.lower()
+        if metric not in alerting.METRICS:
+            await ctx.send(messages["invalid_metric"].format(metric=metric, metrics=", ".join(alerting.METRICS)), ephemeral=True)
+            return
+        operator = operator or ">="
+        if operator not in alerting.OPERATORS:
+            await ctx.send(messages["invalid_operator"].format(operator=operator), ephemeral=True)
+            return
+        try:
+            value = float(threshold.replace(",", ""))
+        except ValueError:
+            value = math.nan
+        if not math.isfinite(value):
+            await ctx.send(messages["invalid_threshold"].format(threshold=threshold), ephemeral=True)
+            return
+        try:
+            level = int(enhance) if enhance is not None else None
+        except ValueError:
+            level = -1
+        if level is not None and not 0 <= level <= 10:
+            await ctx.send(messages["invalid_enhance"].format(enhance=enhance), ephemeral=True)
+            return
+        typed, report_type = report_type, REPORT_TYPES.get((report_type or "profit").lower())
+        if report_type is None:
+            await ctx.send(f"Invalid report type: {typed}", ephemeral=True)
+            return
+
+        count = len(self.store.of_user(ctx.author.id))
+        if count >= settings.alert_max_per_user:
+            await ctx.send(messages["limit"].format(count=count), ephemeral=True)
+            return
+        added = self.store.add(ctx.author.id, report_type, metric, operator, value, name.lower() if name else None, level, category.lower() if category else None)
+        await self.save()
+        logger.info("Alert %d added by %s: %s", added.id, ctx.author, self.condition(added))
+        await ctx.send(messages["added"].format(id=added.id, condition=self.condition(added)), ephemeral=True)
+
+    @commands.hybrid_command(name="alerts", description="List your price alerts")
+    @commands.has_any_role(settings.guild["role"]["subscriber"]["id"])
+    async def alerts(self, ctx: commands.Context) -> None:
+        """
+        Sends the price alerts of the member.
+        """
+        user_alerts = self.store.of_user(ctx.author.id)
+        if not user_alerts:
+            await ctx.send(self.messages["empty"], ephemeral=True)
+            return
+        description = "\n".join(f"#{alert.id} {self.condition(alert)}" for alert in user_alerts)
+        await ctx.send(embed=discord.Embed(title=self.messages["list_title"], description=description), ephemeral=True)
+
+    @commands.hybrid_command(name="alert_remove", description="alert_remove <id>")
+    @commands.has_any_role(settings.guild["role"]["subscriber"]["id"])
+    async def alert_remove(self, ctx: commands.Context, alert_id: int) -> None:
+        """
+        Removes a price alert of the member.
+        """
+        if not self.store.remove(ctx.author.id, alert_id):
+            await ctx.send(self.messages["not_found"].format(id=alert_id), ephemeral=True)
+            return
+        await self.save()
+        await ctx.send(self.messages["removed"].format(id=alert_id), ephemeral=True)
+
+    async def metric_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        current = current.strip().lower()
+        return [app_commands.Choice(name=metric, value=metric) for metric in alerting.METRICS if metric.startswith(current)]
+
+    async def name_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        # Suggested from the reports ReportManager has in memory
+        reports = self.bot.get_cog("ReportManager")
+        return await reports.name_autocomplete(interaction, current) if reports is not None else []
+
+    async def alert_id_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[int]]:
+        return [
+            app_commands.Choice(name=f"#{alert.id} {self.condition(alert)}"[:100], value=alert.id)
+            for alert in self.store.of_user(interaction.user.id) if str(alert.id).startswith(current.strip())
+        ][:MAX_CHOICES]
+
+    alert.autocomplete("metric")(metric_autocomplete)
+    alert.autocomplete("name")(name_autocomplete)
+    alert_remove.autocomplete("alert_id")(alert_id_autocomplete)
+
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(AlertManager(bot))
@@ -102,6 +102,34 @@ class BotManager(commands.Cog):
         logger.info("%s show loaded cogs: %s", ctx.author, value)
         await ctx.send(embed=embed)
 
+    @commands.hybrid_command(name="send_queue", help="Show the outbound send queue.")
+    @commands.has_any_role(settings.guild["role"]["tester"]["id"])
+    async def send_queue(self, ctx: commands.Context):
+        """
+        Show the depth, throughput and wait time of the outbound send dispatcher.
+
+        Parameters
+        ----------
+        ctx : commands.Context
+            Represent the context in which a command is being invoked.
+        """
+        stats = self.bot.dispatcher.stats()
+
+        # Construct the embed message
+        title = self.bot_message["send_queue"]["title"]
+        description = self.bot_message["send_queue"]["description"].format(**stats)
+        embed = discord.Embed(title=title, description=description)
+        for priority, depth in stats["depth"].items():
+            wait = stats["wait"][priority]
+            embed.add_field(
+                name=priority,
+                value=self.bot_message["send_queue"]["value"].format(depth=depth, avg=wait["avg"], max=wait["max"]),
+                inline=True
+            )
+
+        logger.info("%s show send queue: %s", ctx.author, stats)
+        await ctx.send(embed=embed)
+
     @commands.hybrid_command(name="set_activity", help="set_activity <name>")
     @commands.is_owner()
     async def set_activity(self, ctx: commands.Context, name: str):
@@ -3,8 +3,10 @@ import logging
 import discord
 from discord.ext import commands
 
+import admission
 import settings
 import utilities
+from dispatcher import Priority
 
 logger = logging.getLogger("guild_manager")
 
@@ -16,6 +18,7 @@ class GuildManager(commands.Cog):
 
     @commands.hybrid_command(name="audit_log", help="audit_log <number of rows>")
     @commands.is_owner()
+    @admission.limit(admission.controller("audit_log"))
     async def audit_log(self, ctx: commands.Context, number: int):
         """
         Retrieves the latest audit log entries for the guild.
@@ -32,11 +35,14 @@ class GuildManager(commands.Cog):
         None
             Sends a confirmation message in the Discord channel.
         """
-        # Retrieves latest logs
+        # Retrieves latest logs, consecutive entries are merged into as few messages as possible
         guild = discord.utils.get(self.bot.guilds, id=ctx.guild.id)
+        count = 0
         async for entry in guild.audit_logs(limit=number):
-            draft = str(entry) + "\n"
-            await ctx.send(draft)
+            draft = str(entry)
+            self.bot.dispatcher.send(ctx.channel, draft, priority=Priority.NORMAL)
+            count += 1
+        await ctx.send(self.bot_message["audit_log"]["succeeded"].format(count=count), ephemeral=True)
 
 
 async def setup(bot: commands.Bot):
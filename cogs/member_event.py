@@ -7,6 +7,7 @@ from discord.ext import commands
 
 import settings
 import utilities
+from dispatcher import Priority
 
 logger = logging.getLogger("member_event")
 
@@ -88,12 +89,12 @@ class MemberEvent(commands.Cog):
         text = self.bot.user.display_name
         icon_url = self.get_avatar_url(member)
         embed.set_footer(text=text, icon_url=icon_url)
-        await log_channel.send(embed=embed)
+        self.bot.dispatcher.send(log_channel, embed=embed, priority=Priority.LOW)
 
         # Send welcome message
         welcome_channel = discord.utils.get(member.guild.channels, id=self.guild["channel"]["welcome"]["id"])
         draft = self.event_message["join"]["welcome"].format(mention=member.mention, guild=member.guild)
-        await welcome_channel.send(draft)
+        self.bot.dispatcher.send(welcome_channel, draft, priority=Priority.HIGH)
 
     @commands.Cog.listener()
     async def on_member_update(self, before: discord.Member, after: discord.Member):
@@ -129,7 +130,7 @@ class MemberEvent(commands.Cog):
                 text = entry.user.display_name
                 icon_url = self.get_avatar_url(entry.user)
                 embed.set_footer(text=text, icon_url=icon_url)
-                await log_channel.send(embed=embed)
+                self.bot.dispatcher.send(log_channel, embed=embed, priority=Priority.LOW)
 
     @commands.Cog.listener()
     async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
@@ -157,7 +158,7 @@ class MemberEvent(commands.Cog):
         text = self.bot.user.display_name
         icon_url = self.get_avatar_url(payload.user)
         embed.set_footer(text=text, icon_url=icon_url)
-        await log_channel.send(embed=embed)
+        self.bot.dispatcher.send(log_channel, embed=embed, priority=Priority.LOW)
 
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
@@ -203,7 +204,7 @@ class MemberEvent(commands.Cog):
                 member = discord.utils.find(lambda m: m.id == payload.user_id, guild.members)
                 if member is not None:
                     logger.info("%s role added to %s", role.name, member.display_name)
-                    await member.add_roles(role)
+                    self.bot.dispatcher.add_roles(member, role)
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
@@ -248,7 +249,7 @@ class MemberEvent(commands.Cog):
                 member = discord.utils.find(lambda m: m.id == payload.user_id, guild.members)
                 if member is not None:
                     logger.info("%s role removed from %s", role.name, member.display_name)
-                    await member.remove_roles(role)
+                    self.bot.dispatcher.remove_roles(member, role)
 
 # Buttons for approval
 class ButtonView(discord.ui.View):
@@ -384,7 +385,8 @@ class OnboardFormModal(discord.ui.Modal):
 
         # Create buttons
         view = ButtonView(timeout=20)
-        log_message = await log_channel.send(embed=embed, view=view)
+        dispatcher = interaction.client.dispatcher
+        log_message = await dispatcher.send(log_channel, embed=embed, view=view, priority=Priority.HIGH)
         view.message = log_message
 
         # Response to the candidate
@@ -394,10 +396,10 @@ class OnboardFormModal(discord.ui.Modal):
 
         if view.status is True:
             # Approve
-            await log_channel.send(self.event_message["onboard"]["decision"]["approve"])
+            dispatcher.send(log_channel, self.event_message["onboard"]["decision"]["approve"], priority=Priority.LOW)
         else:
             # Decline
-            await log_channel.send(self.event_message["onboard"]["decision"]["decline"])
+            dispatcher.send(log_channel, self.event_message["onboard"]["decision"]["decline"], priority=Priority.LOW)
 
         await view.disable_all_items()
 
@@ -1,23 +1,34 @@
+import asyncio
 import logging
-import random
-from typing import Tuple
+from typing import Any, Dict
 
 import discord
 from discord.ext import commands
 
+import admission
 import settings
-import utilities
+from dispatcher import Priority
+from rule_engine import RuleEngine
 
 logger = logging.getLogger("message_handler")
 
 
 class MessageHandler(commands.Cog):
+    IGNORED_PREFIXES = ("<:", "<a:", "https://")
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.guild = settings.guild
-        self.all_keywords = utilities.load_json(settings.all_keywords)
-        self.any_keywords = utilities.load_json(settings.any_keywords)
-        self.vip_keywords = utilities.load_json(settings.vip_keywords)
+        self.conference_channel_id = self.guild["channel"]["conference"]["id"]
+        # Compiled now and recompiled by the catalog whenever a keyword file changes
+        self.bot.catalog.add_compiler("rules", self.compile_rules)
+
+    async def cog_unload(self) -> None:
+        self.bot.catalog.remove_compiler("rules")
+
+    @staticmethod
+    def compile_rules(files: Dict[str, Dict[str, Any]]) -> RuleEngine:
+        return RuleEngine(files.get("keywords/all", {}), files.get("keywords/any", {}), files.get("keywords/vip", {}))
 
     @staticmethod
     def convertible_to_int(string: str) -> bool:
@@ -48,10 +59,6 @@ class MessageHandler(commands.Cog):
             url = user.default_avatar.url
         return url
 
-    @staticmethod
-    def on_chance(percent: int) -> bool:
-        return random.randint(1, 100) <= percent
-
     @commands.hybrid_command(name="forward", description="forward <message>")
     @commands.has_any_role(settings.guild["role"]["admin"]["id"])
     async def forward(self, ctx: commands.Context, *, message: str):
@@ -66,7 +73,7 @@ class MessageHandler(commands.Cog):
             The message to be forwarded.
         """
         try:
-            await ctx.channel.send(message)
+            await self.bot.dispatcher.send(ctx.channel, message, priority=Priority.HIGH)
             await ctx.send(f"Forwarded message: {message}", ephemeral=True)
 
         except Exception as e:
@@ -74,6 +81,7 @@ class MessageHandler(commands.Cog):
 
     @commands.hybrid_command(name="react_emoji", description="react_emoji <message_id> <number_of_option>")
     @commands.has_any_role(settings.guild["role"]["admin"]["id"])
+    @admission.limit(admission.controller("react_emoji"))
     async def react_emoji(self, ctx: commands.Context, message_id, number_of_option):
         """
         React emoji on a message.
@@ -111,8 +119,7 @@ class MessageHandler(commands.Cog):
                     "\U0001F1FE", "\U0001F1FF"
                 ]
 
-                for i in range(number_of_option):
-                    await message.add_reaction(emojis[i])
+                await asyncio.gather(*(self.bot.dispatcher.add_reaction(message, emojis[i]) for i in range(number_of_option)))
 
             except Exception as e:
                 logger.exception("Failed to send announcement: %s", e)
@@ -134,7 +141,7 @@ class MessageHandler(commands.Cog):
         """
         try:
             # Construct embed message
-            draft = utilities.load_json(settings.embed_message_template)
+            draft = self.bot.catalog.copy("templates/embed")
             embed = discord.Embed.from_dict(draft)
 
             # Sign bot on embed message
@@ -142,7 +149,7 @@ class MessageHandler(commands.Cog):
             icon_url = self.get_avatar_url(self.bot.user)
             embed.set_footer(text=text, icon_url=icon_url)
 
-            await ctx.channel.send(embed=embed)
+            await self.bot.dispatcher.send(ctx.channel, embed=embed, priority=Priority.HIGH)
             await ctx.send("Embed message sent", ephemeral=True)
 
         except Exception as e:
@@ -171,7 +178,7 @@ class MessageHandler(commands.Cog):
         else:
             try:
                 # Construct embed message
-                draft = utilities.load_json(settings.embed_message_template)
+                draft = self.bot.catalog.copy("templates/embed")
                 embed = discord.Embed.from_dict(draft)
 
                 # Sign bot on embed message
@@ -180,7 +187,7 @@ class MessageHandler(commands.Cog):
                 embed.set_footer(text=text, icon_url=icon_url)
 
                 message = await ctx.fetch_message(message_id)
-                await message.edit(embed=embed)
+                await self.bot.dispatcher.edit(message, embed=embed)
 
             except Exception as e:
                 logger.exception("Failed to edit announcement: %s", e)
@@ -195,128 +202,27 @@ class MessageHandler(commands.Cog):
         message : discord.Message
             The message that was sent.
         """
-        logger.info("%s - %s - %s, %s (%d): %s", message.guild, message.channel, message.author.display_name, message.author, message.author.id, message.content)
-
+        # Cheap rejections first, before any other per-message work
         # Ignore message sent by bot
         if message.author == self.bot.user:
             return
 
         # Ignore messages in a specific channel
-        if message.channel.id == self.guild["channel"]["conference"]["id"]:
+        if message.channel.id == self.conference_channel_id:
             return
 
         # Ignore emoji, gif and links
-        if (message.content.startswith("<:") or message.content.startswith("<a:") or message.content.startswith("https://")):
+        content = message.content
+        if content.startswith(self.IGNORED_PREFIXES):
             return
 
-        reply, draft = self.check_all_keywords(message.content)
-        if not reply:
-            reply, draft = self.check_vip_mentioned(message)
-        if not reply:
-            reply, draft = self.check_vip_sender(message)
-        if not reply:
-            reply, draft = self.check_any_keywords(message.content)
+        logger.info("%s - %s - %s, %s (%d): %s", message.guild, message.channel, message.author.display_name, message.author, message.author.id, content)
 
+        rules: RuleEngine = self.bot.catalog.compiled("rules")
+        # discord.py resolves the mentions once, without duplicates and with the author of a replied-to message
+        reply, draft = rules.evaluate(content, message.author.id, [member.id for member in message.mentions])
         if reply:
-            await message.channel.send(draft)
-
-    def check_all_keywords(self, content: str) -> Tuple[bool, str]:
-        """
-        Check whether the message contains all keywords for a topic.
-
-        Parameters
-        ----------
-        content : str
-            The content of the message.
-
-        Returns
-        -------
-        tuple
-            (reply: bool, draft: str)
-        """
-        for topic, data in self.all_keywords["topic"].items():
-            keywords = list(data["keyword"])
-            if all(word in content for word in keywords):
-                logger.debug("Message included all keywords in a topic %s", topic)
-                if self.on_chance(percent=data["chance"]):
-                    return True, random.choice(data["reply"])
-        return False, ""
-
-    def check_any_keywords(self, content: str) -> Tuple[bool, str]:
-        """
-        Check whether the message contains any keywords for a topic.
-
-        Parameters
-        ----------
-        content : str
-            The content of the message.
-
-        Returns
-        -------
-        tuple
-            (reply: bool, draft: str)
-        """
-        for topic, data in self.any_keywords["topic"].items():
-            keywords = list(data["keyword"])
-            if any(word in content for word in keywords):
-                logger.debug("Message included any keywords in a topic %s", topic)
-                if self.on_chance(percent=data["chance"]):
-                    return True, random.choice(data["reply"])
-        return False, ""
-
-    def check_vip_sender(self, message: discord.Message) -> Tuple[bool, str]:
-        """
-        Check whether the message is sent by a VIP.
-
-        Parameters
-        ----------
-        message : discord.Message
-            The message that was sent.
-
-        Returns
-        -------
-        tuple
-            (reply: bool, draft: str)
-        """
-        for user, data in self.vip_keywords.items():
-            if message.author.id == data["id"]:
-                logger.debug("Message send by a VIP %s", user)
-                if len(message.mentions) > 0:
-                    if self.on_chance(percent=data["topic"]["mentions"]["chance"]):
-                        return True, random.choice(data["topic"]["mentions"]["reply"])
-                else:
-                    if self.on_chance(percent=data["topic"]["send"]["chance"]):
-                        topics = list(data["topic"].keys())
-                        keyword = random.choice(topics)
-                        return True, random.choice(data["topic"][keyword]["reply"])
-        return False, ""
-
-    def check_vip_mentioned(self, message: discord.Message) -> Tuple[bool, str]:
-        """
-        Check whether the message mentioned a VIP.
-
-        Parameters
-        ----------
-        message : discord.Message
-            The message that was sent.
-
-        Returns
-        -------
-        tuple
-            (reply: bool, draft: str)
-        """
-        if len(message.mentions) > 0:
-            logger.debug("Message mentioned someone")
-            for member in message.mentions:
-                for user, data in self.vip_keywords.items():
-                    if member.id == data["id"]:
-                        logger.debug("Message mentioned VIP %s", user)
-                        if self.on_chance(percent=data["topic"]["be_mentioned"]["chance"]):
-                            return True, random.choice(data["topic"]["be_mentioned"]["reply"])
-            logger.debug("Message mentioned NonVIP user")
-        else:
-            logger.debug("Message NOT mentioned anyone")
-        return False, ""
+            self.bot.dispatcher.send(message.channel, draft, priority=Priority.HIGH)
 
 
 async def setup(bot: commands.Bot):
@@ -1,26 +1,324 @@
+import asyncio
+import functools
+import io
 import json
-import locale
 import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime as dt
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple, TypeVar
 
 import discord
-import pandas as pd
-import requests
-from discord.ext import commands
+from discord import app_commands
+from discord.ext import commands, tasks
 
+import admission
 import settings
 import utilities
+from dispatcher import Priority
+from reports.cache import ReportCache
+from reports.chart import ChartRenderer
+from reports.client import REQUEST_ERRORS, ReportAPIError, ReportClient
+from reports.health import CircuitBreaker, HealthMonitor
+from reports.ingest import ReportStreamParser
+from reports.render import EmbedMemo, enhance_label, format_decimal, format_thousands
+from reports.view import ReportPager
+from startup_profile import lazy_import
+
+if TYPE_CHECKING:
+    from reports.archive import SnapshotArchive
+    from reports.diff import SnapshotDiff
+    from reports.snapshot import Snapshot
+
+# Only needed once a report is loaded
+snapshots = lazy_import("reports.snapshot", lazy=settings.startup_mode == "lazy")
+archives = lazy_import("reports.archive", lazy=settings.startup_mode == "lazy")
+diffs = lazy_import("reports.diff", lazy=settings.startup_mode == "lazy")
 
 logger = logging.getLogger("report_manager")
 
+T = TypeVar("T")
+
+report_admission = admission.controller("report")
+chart_admission = admission.controller("chart")
+
+# Report type as typed -> report type
+REPORT_TYPES = {"profit": "profit", "p": "profit", "trends": "trends", "t": "trends"}
+SORT_ORDERS = {"desc": "descending", "asc": "ascending"}
+
+# Discord shows at most 25 choices of up to 100 characters
+MAX_CHOICES = 25
+MAX_CHOICE_LENGTH = 100
+
+# Characters of an embed field value
+MAX_FIELD_LENGTH = 1024
 
-locale.setlocale(locale.LC_ALL, "en_US.UTF-8")
 
 class ReportManager(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
         self.bot_message = utilities.load_json(settings.bot_message_template)
+        self.breaker = CircuitBreaker(failure_threshold=settings.api_breaker_failures, reset_timeout=settings.api_breaker_reset)
+        self.monitor = HealthMonitor(history=settings.api_health_history)
+        self.client = ReportClient(
+            settings.api_url,
+            timeout=settings.api_timeout,
+            connect_timeout=settings.api_connect_timeout,
+            max_connections=settings.api_max_connections,
+            breaker=self.breaker,
+        )
+        self.cache = ReportCache(
+            self.load_snapshot,
+            ttl=settings.report_cache_ttl,
+            max_stale=settings.report_cache_max_stale,
+            max_entries=settings.report_cache_max_entries,
+            version=lambda snapshot: snapshot.timestamp,
+        )
+        self.embeds = EmbedMemo(max_entries=settings.report_embed_cache_size)
+        self.charts = ChartRenderer(workers=settings.chart_workers, max_entries=settings.chart_cache_size)
+        self.prefetch_failures = 0
+        self.archives: Dict[str, "SnapshotArchive"] = {}
+        self.executor: Optional[ThreadPoolExecutor] = None
+        # The last unfiltered snapshot of each report type a change digest was computed against
+        self.feed_snapshots: Dict[str, "Snapshot"] = {}
+        self.feed_tasks: Set[asyncio.Task] = set()
+
+    async def cog_load(self) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=max(1, settings.report_workers), thread_name_prefix="report")
+        await self.client.start()
+        if settings.report_prefetch_interval > 0:
+            self.prefetch.change_interval(seconds=settings.report_prefetch_interval)
+            self.prefetch.start()
+        if settings.api_health_interval > 0:
+            self.probe.change_interval(seconds=settings.api_health_interval)
+            self.probe.start()
+
+    async def cog_unload(self) -> None:
+        self.prefetch.cancel()
+        self.probe.cancel()
+        for task in self.feed_tasks:
+            task.cancel()
+        await self.cache.close()
+        await self.client.close()
+        self.charts.close()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        for archive in self.archives.values():
+            archive.close()
+
+    async def offload(self, snapshot: "Snapshot", function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run CPU work on a report in the worker pool, or inline when the report is too small to be worth the hand-over.
+        """
+        if self.executor is None or snapshot.size <= settings.report_inline_items:
+            return function(*args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(function, *args, **kwargs))
+
+    def archive(self, report_type: str) -> "SnapshotArchive":
+        """
+        The on-disk snapshot history of a report type, opened on first use.
+        """
+        archive = self.archives.get(report_type)
+        if archive is None:
+            archive = self.archives[report_type] = archives.SnapshotArchive(settings.report_archive_directory / report_type)
+        return archive
+
+    def archive_snapshot(self, report_type: str, timestamp: str, columns: Dict[str, List[Any]]) -> None:
+        try:
+            self.archive(report_type).append(timestamp, columns)
+        except (OSError, ValueError) as e:
+            logger.exception("Failed to archive %s report at %s: %s", report_type, timestamp, e)
+
+    async def load_snapshot(self, report_type: str, period: Optional[int] = None) -> "Snapshot":
+        """
+        Request a report and index it, the indexed snapshot in the cache is reused while the timestamp is unchanged.
+
+        Parameters
+        ----------
+        report_type : str
+            "profit" or "trends".
+        period : int, optional
+            Period filter of the report in days.
+
+        Returns
+        -------
+        Snapshot
+            The indexed report.
+        """
+        previous = self.cache.peek(report_type, period)
+        parser = ReportStreamParser(known_timestamp=previous.timestamp if previous is not None else None)
+        await self.client.stream_report(report_type, period, parser, executor=self.executor, inline_bytes=settings.report_inline_bytes)
+        if parser.unchanged:
+            return previous
+        loop = asyncio.get_running_loop()
+        if period is None:
+            # Only the unfiltered reports are archived, periods are computed locally from them
+            await loop.run_in_executor(self.executor, self.archive_snapshot, report_type, parser.timestamp, parser.columns)
+        snapshot = await loop.run_in_executor(self.executor, self.build_snapshot, parser.timestamp, parser.columns)
+        if period is None:
+            self.feed(report_type, snapshot)
+            # For the alert manager and any other listener of new reports
+            self.bot.dispatch("report_snapshot", report_type, snapshot)
+        return snapshot
+
+    @staticmethod
+    def build_snapshot(timestamp: str, columns: Dict[str, List[Any]]) -> "Snapshot":
+        """
+        Index a report, with the rankings of the common sort keys ready so sorting by them costs nothing later.
+        """
+        snapshot = snapshots.Snapshot.from_columns(timestamp, columns)
+        for key in settings.report_ranked_keys:
+            snapshot.ranking(key, descending=True)
+        return snapshot
+
+    def feed(self, report_type: str, snapshot: "Snapshot") -> None:
+        """
+        Post what changed since the last snapshot of a report type to the feed channel, in the background.
+
+        The first snapshot after a start is only remembered, older snapshots loaded late are ignored.
+        """
+        if not settings.report_feed_channel_id:
+            return
+        previous = self.feed_snapshots.get(report_type)
+        if previous is not None and snapshot.report_time <= previous.report_time:
+            return
+        self.feed_snapshots[report_type] = snapshot
+        if previous is None:
+            return
+        task = asyncio.create_task(self.post_changes(report_type, previous, snapshot))
+        self.feed_tasks.add(task)
+        task.add_done_callback(self.feed_tasks.discard)
+
+    async def post_changes(self, report_type: str, previous: "Snapshot", snapshot: "Snapshot") -> None:
+        try:
+            diff = await self.offload(snapshot, diffs.diff_snapshots, previous, snapshot, settings.report_feed_thresholds, settings.report_feed_rank_change)
+            if not diff:
+                logger.info("No changes in the %s report at %s", report_type, snapshot.timestamp)
+                return
+            channel = self.bot.get_channel(settings.report_feed_channel_id)
+            if channel is None:
+                logger.warning("Report feed channel %s not found", settings.report_feed_channel_id)
+                return
+            self.bot.dispatcher.send(channel, embed=self.render_digest(report_type, diff), priority=Priority.LOW)
+        except Exception as e:
+            logger.exception("Failed to post the changes of the %s report at %s: %s", report_type, snapshot.timestamp, e)
+
+    def render_digest(self, report_type: str, diff: "SnapshotDiff") -> discord.Embed:
+        """
+        One compact embed listing the new, dropped and most changed items, the largest moves first.
+        """
+        template = self.bot.catalog.get("templates/change_digest")
+        report = self.bot.catalog.get(f"templates/{report_type}_report").get("title", report_type)
+        embed = discord.Embed()
+        embed.title = template["title"].format(report=report)
+        embed.description = template["description"].format(
+            added=len(diff.added), removed=len(diff.removed), changed=len(diff.changed), since=diff.previous.timestamp
+        )
+
+        limit = settings.report_feed_max_lines
+        sections = {
+            "added": [template["fields"]["added"]["line"].format(**diff.current.row_labels(row_id)) for row_id in diff.added[:limit]],
+            "removed": [template["fields"]["removed"]["line"].format(**diff.previous.row_labels(row_id)) for row_id in diff.removed[:limit]],
+            "changed": [],
+        }
+        for change in diff.largest_changes(limit):
+            changes = [
+                # A change from 0 has no percent, its values are shown instead
+                template["changes"][key].format(change=f"{value:+.1f}%" if value is not None else f"{format_thousands(diff.previous.columns[key][change.before])} → {format_thousands(diff.current.columns[key][change.after])}")
+                for key, value in change.changes.items()
+            ]
+            if change.moved:
+                changes.append(template["changes"]["rank"].format(before=change.before + 1, after=change.after + 1))
+            sections["changed"].append(template["fields"]["changed"]["line"].format(changes=", ".join(changes), **diff.current.row_labels(change.after)))
+
+        totals = {"added": len(diff.added), "removed": len(diff.removed), "changed": len(diff.changed)}
+        for section, lines in sections.items():
+            if not lines:
+                continue
+            more = template["more"].format(count=totals[section] - len(lines))
+            # Drop lines until the field fits, the count of the rest is always shown
+            while len(lines) > 1 and len("\n".join(lines + [more])) > MAX_FIELD_LENGTH:
+                lines.pop()
+                more = template["more"].format(count=totals[section] - len(lines))
+            value = "\n".join(lines + [more] if totals[section] > len(lines) else lines)
+            embed.add_field(name=template["fields"][section]["name"], value=value[:MAX_FIELD_LENGTH], inline=False)
+
+        embed.set_footer(text=template["footer"]["text"], icon_url=template["footer"]["icon_url"].format(icon_url=self.get_avatar_url(self.bot.user)))
+        embed.timestamp = diff.current.report_time
+        return embed
+
+    @staticmethod
+    def prefetch_keys() -> List[Tuple[str, Optional[int]]]:
+        """
+        The reports kept warm by the prefetcher, both report types unfiltered and for each common period.
+        """
+        periods = [None] + settings.report_prefetch_periods
+        return [(report_type, period) for report_type in ("profit", "trends") for period in periods]
+
+    @staticmethod
+    def prefetch_delay(failures: int) -> float:
+        """
+        Seconds until the next poll, doubled after every failed poll up to `report_prefetch_max_backoff`.
+        """
+        delay = settings.report_prefetch_interval * 2 ** min(failures, 16)
+        return min(delay, max(settings.report_prefetch_max_backoff, settings.report_prefetch_interval))
+
+    @tasks.loop(seconds=60)
+    async def prefetch(self) -> None:
+        """
+        Poll the report endpoints in the background, so /report is answered from memory.
+        """
+        # Spread the polls of several bots sharing an API server, the first poll warms the cache at once
+        if self.prefetch.current_loop:
+            await asyncio.sleep(random.uniform(0, settings.report_prefetch_jitter))
+
+        failed = False
+        for report_type, period in self.prefetch_keys():
+            try:
+                snapshot = await self.load_snapshot(report_type, period)
+            except (ReportAPIError,) + REQUEST_ERRORS as e:
+                failed = True
+                logger.warning("Failed to prefetch %s report (period %s): %r", report_type, period, e)
+                continue
+            previous = self.cache.peek(report_type, period)
+            if self.cache.put(report_type, period, snapshot) is not previous:
+                logger.info("Prefetched new %s report (period %s) at %s, %d items", report_type, period, snapshot.timestamp, snapshot.size)
+
+        self.prefetch_failures = self.prefetch_failures + 1 if failed else 0
+        self.prefetch.change_interval(seconds=self.prefetch_delay(self.prefetch_failures))
+
+    @prefetch.error
+    async def prefetch_error(self, error: BaseException) -> None:
+        logger.exception("Report prefetcher stopped: %s", error)
+
+    async def probe_once(self) -> None:
+        """
+        Check the health endpoint once and record the outcome and latency.
+        """
+        start = time.perf_counter()
+        try:
+            status = await self.client.health()
+        except REQUEST_ERRORS as e:
+            self.monitor.record(time.perf_counter() - start, None, False)
+            logger.debug("Health check failed: %r", e)
+            return
+        self.monitor.record(time.perf_counter() - start, status, status == 200)
+        if status != 200:
+            logger.debug("Health check status code: %s", status)
+
+    @tasks.loop(seconds=30)
+    async def probe(self) -> None:
+        """
+        Check the API server in the background, so /health answers at once and the circuit closes as soon as it recovers.
+        """
+        await self.probe_once()
+
+    @probe.error
+    async def probe_error(self, error: BaseException) -> None:
+        logger.exception("API health prober stopped: %s", error)
 
     @staticmethod
     def get_avatar_url(user: discord.User) -> str:
@@ -43,46 +341,96 @@ class ReportManager(commands.Cog):
             url = user.default_avatar.url
         return url
 
-    @staticmethod
-    def map_enhance_level(number: int) -> str:
-        enhance_map = {0: "_", 1: "I", 2: "II", 3: "III", 4: "IV", 5: "V", 6: "VI", 7: "VII", 8: "VIII", 9: "IX", 10: "X"}
-        return enhance_map.get(number, str("_"))
-
-    @staticmethod
-    def format_thousands(number: int) -> str:
-        return locale.format_string("%d", number, grouping=True)
-    
     @commands.hybrid_command(name="health", description="Check the status of the API server")
     @commands.has_any_role(settings.guild["role"]["admin"]["id"], settings.guild["role"]["tester"]["id"])
     async def health(self, ctx: commands.Context) -> None:
         """
-        Checks the status of the API server and sends a message with the status.
+        Sends the status of the API server as observed by the background health checks, without waiting for a new one.
 
         Parameters
         ----------
         ctx : discord.ext.commands.Context
             The context in which the command was invoked.
         """
-        try:
-            response = requests.get(f"{settings.api_url}/health", timeout=10)
-            if response.status_code == 200:
-                await ctx.send(f"API server is online and reachable: {response.status_code}")
-            else:
-                logger.warning("status code: %s", response.status_code)
-                await ctx.send(f"API server returned status code: {response.status_code}")
+        # Only before the first background check, or with the prober turned off
+        if not self.monitor.samples:
+            await self.probe_once()
+
+        summary = self.monitor.summary()
+        breaker = self.breaker.stats()
+        if summary["ok"]:
+            lines = [f"API server is online and reachable: {summary['status']}"]
+        elif summary["status"] is not None:
+            lines = [f"API server returned status code: {summary['status']}"]
+        else:
+            lines = ["API server is unreachable"]
+        lines.append(f"Circuit: {breaker['circuit']} ({breaker['consecutive_failures']} consecutive failures)")
+        lines.append(f"Last check: {summary['age']:.0f}s ago")
+        lines.append(f"Success rate: {summary['success_rate']:.1%} of the last {summary['checks']} checks")
+        if summary["p50"] is not None:
+            lines.append(f"Latency p50 / p95: {summary['p50'] * 1000:.0f} ms / {summary['p95'] * 1000:.0f} ms")
+        await ctx.send("\n".join(lines))
+
+    @commands.hybrid_command(name="report_stats", description="Show the report cache statistics")
+    @commands.has_any_role(settings.guild["role"]["admin"]["id"], settings.guild["role"]["tester"]["id"])
+    async def report_stats(self, ctx: commands.Context) -> None:
+        """
+        Sends the hit, miss and refresh counters of the report cache.
 
-        except requests.exceptions.RequestException as re:
-            logger.exception("Failed to ping API server: %s", re)
-            await ctx.send(f"An error occurred while checking health of the API server: {re}")
+        Parameters
+        ----------
+        ctx : discord.ext.commands.Context
+            The context in which the command was invoked.
+        """
+        stats = {**self.cache.stats(), **self.embeds.stats(), **self.breaker.stats(), **self.charts.stats(), **report_admission.stats(), "prefetch_failures": self.prefetch_failures}
+        logger.info("Report cache: %s", stats)
+        await ctx.send("\n".join(f"{key}: {value}" for key, value in stats.items()))
 
-    def generate_report(self, json_string: Dict[str, Any], template: Dict[str, Any], report_type: str, category: str = None, name: str = None, enhance: int = None, period: int = 7) -> discord.Embed:
+    @staticmethod
+    def select_rows(snapshot: "Snapshot", category: str = None, name: str = None, enhance: int = None) -> List[int]:
+        """
+        The items of a snapshot passing the filters, in report order.
+        """
+        filters = {}
+        if category:
+            filters["category"] = category
+        if name:
+            filters["name"] = name
+        if enhance is not None:
+            filters["enhance"] = enhance
+        return snapshot.query(**filters)
+
+    @staticmethod
+    def page_count(row_ids: List[int]) -> int:
+        return max(1, -(-len(row_ids) // settings.report_page_size))
+
+    def render_payload(self, snapshot: "Snapshot", report_type: str, category: str = None, name: str = None, enhance: int = None, period: int = None, row_ids: List[int] = None, page: int = 0, sort: str = None, descending: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Generate a report page as an embed payload, safe to run in a worker thread.
+        """
+        embed = self.generate_report(
+            snapshot,
+            template=self.bot.catalog.copy(f"templates/{report_type}_report"),
+            report_type=report_type,
+            category=category,
+            name=name,
+            enhance=enhance,
+            period=period,
+            row_ids=row_ids,
+            page=page,
+            sort=sort,
+            descending=descending
+        )
+        return embed.to_dict() if embed is not None else None
+
+    def generate_report(self, snapshot: "Snapshot", template: Dict[str, Any], report_type: str, category: str = None, name: str = None, enhance: int = None, period: int = 7, row_ids: List[int] = None, page: int = 0, sort: str = None, descending: bool = True) -> discord.Embed:
         """
         Generate a formatted report based on the provided data and filters.
 
         Parameters
         ----------
-        json_string : Dict[str, Any]
-            The JSON response form the API containing report data
+        snapshot : Snapshot
+            The indexed report data
         template : Dict[str, Any]
             The template for formatting the report
         report_type : str
@@ -95,6 +443,14 @@ class ReportManager(commands.Cog):
             Enhancement level filter (0 - 10)
         period : int, optional
             Period filter for trends report (1 - 30 days)
+        row_ids : List[int], optional
+            The items selected by the filters, selected here when omitted
+        page : int, optional
+            The page of items to show, 0-based
+        sort : str, optional
+            Item attribute to order the items by, report order when omitted
+        descending : bool, optional
+            Largest values first
 
         Returns
         -------
@@ -103,29 +459,23 @@ class ReportManager(commands.Cog):
         """
         logger.debug(f"Generating report for {report_type=}, {category=}, {name=}, {enhance=}, {period=}")
 
-        # Extract data from the API responsed json string
-        report_time = dt.fromisoformat(json_string["timestamp"])
-        report_data = json_string["data"]
-
-        # Process report content
-        df = pd.DataFrame(report_data)
-        logger.debug(f"DataFrame shape: {df.shape}")
-
         # Apply filters if provided
         if category:
             # Filter by category
-            df = df[df["category"] == category]
             template["description"] = template["description"] + f"\nFilter by category: {category}"
         if name:
             # Filter by item name
-            df = df[df["name"].str.contains(name, case=False)]
             template["description"] = template["description"] + f"\nFilter by item name: {name}"
-        if enhance:
+        if enhance is not None:
             # Filter by enhance level
-            df = df[df["enhance"].astype(int) == enhance]
             template["description"] = template["description"] + f"\nFilter by enhance level: {enhance}"
+        if row_ids is None:
+            row_ids = self.select_rows(snapshot, category, name, enhance)
+        logger.debug(f"Matched {len(row_ids)} of {snapshot.size} items")
         if period:
             template["description"] = template["description"] + f"\nWithin {period} days"
+        if sort:
+            template["description"] = template["description"] + f"\nSorted by {sort} ({'descending' if descending else 'ascending'})"
 
         # Construct embed message
         embed = discord.Embed()
@@ -136,6 +486,9 @@ class ReportManager(commands.Cog):
 
         # Message footer
         footer_text = template["footer"]["text"]
+        pages = self.page_count(row_ids)
+        if pages > 1:
+            footer_text = self.bot_message["report_view"]["page"].format(text=footer_text, page=page + 1, pages=pages)
         footer_icon_url = template["footer"]["icon_url"].format(icon_url=self.get_avatar_url(self.bot.user))
         embed.set_footer(text=footer_text, icon_url=footer_icon_url)
 
@@ -144,58 +497,15 @@ class ReportManager(commands.Cog):
 
         # Construct fields based on report type
         try:
-            # Up to 18 items or available data
-            max_items = min(18, len(df))
-            for i in range(max_items):
-                row = df.iloc[i]
-
-                # Field value, format field value based on report type
-                if report_type == "profit":
-                    # Field name
-                    item_category = row["category"]
-                    item_enhance = self.map_enhance_level(row["enhance"])
-                    item_name = row["name"]
-                    field_name = field_template["name"].format(
-                        category=item_category,
-                        enhance=item_enhance,
-                        name=item_name
-                    )
-                    # Prepare item's stat
-                    item_price = self.format_thousands(row["price"])
-                    item_profit = self.format_thousands(row["profit"])
-                    item_rate = f"{row['rate']:.3f}"
-                    item_stock = row["stock"]
-                    # Field value for that item
-                    field_value = field_template["value"].format(
-                        category=item_category,
-                        price=item_price,
-                        profit=item_profit,
-                        rate=item_rate,
-                        stock=item_stock
-                    )
-
-                if report_type == "trends":
-                    # Field name
-                    item_enhance = self.map_enhance_level(row["enhance"])
-                    item_name = row["name"]
-                    field_name = field_template["name"].format(
-                        enhance=item_enhance,
-                        name=item_name
-                    )
-                    # Prepare item's stat
-                    item_category = row["category"]
-                    item_price = self.format_thousands(row["price"])
-                    item_stock = row["stock"]
-                    item_volume_change = row["volumechange"]
-                    item_average_trades = row["averagetradesperday"]
-                    # Field value for that item
-                    field_value = field_template["value"].format(
-                        category=item_category,
-                        price=item_price,
-                        stock=item_stock,
-                        volumechange=item_volume_change,
-                        averagetradesperday=f"{item_average_trades:.3f}"
-                    )
+            # One page of items, only the items up to this page are ranked
+            start = page * settings.report_page_size
+            end = start + settings.report_page_size
+            page_rows = snapshot.top(row_ids, sort, descending, end)[start:] if sort else row_ids[start:end]
+            for row_id in page_rows:
+                # Labels are formatted once per snapshot
+                labels = snapshot.row_labels(row_id)
+                field_name = field_template["name"].format(**labels)
+                field_value = field_template["value"].format(**labels)
 
                 # Field inline
                 field_inline = field_template["inline"]
@@ -218,7 +528,7 @@ class ReportManager(commands.Cog):
             )
 
             # Set timestamp
-            embed.timestamp = report_time
+            embed.timestamp = snapshot.report_time
             return embed
 
         except IndexError as ie:
@@ -226,9 +536,10 @@ class ReportManager(commands.Cog):
         except KeyError as ke:
             logger.error("Missing required field in data: %s", ke)
 
-    @commands.hybrid_command(name="report", description="report <report_type> [category] [name] [enhance] [period]")
+    @commands.hybrid_command(name="report", description="report <report_type> [category] [name] [enhance] [period] [sort] [order]")
     @commands.has_any_role(settings.guild["role"]["subscriber"]["id"])
-    async def report(self, ctx: commands.Context, report_type: str, category: str = None, name: str = None, enhance: str = None, period: str = None) -> None:
+    @admission.limit(report_admission)
+    async def report(self, ctx: commands.Context, report_type: str, category: str = None, name: str = None, enhance: str = None, period: str = None, sort: str = None, order: str = None) -> None:
         """
         Fetches the latest report from the API server and sends it as an embedded message.
 
@@ -248,64 +559,341 @@ class ReportManager(commands.Cog):
             Filter by enhancement level (0 - 10)
         period : str, optional
             Filter by period (1 - 30 days), available for trends report only.
+        sort : str, optional
+            Order the items by "price", "profit", "rate", "stock", "volumechange" or "averagetradesperday"
+        order : str, optional
+            "desc" (default) or "asc", used with sort
 
         Raises
         ------
-        requests.exceptions.RequestException
+        aiohttp.ClientError
             If there is an error while making the request to the API server.
         """
-        logger.debug(f"Report command invoked by {ctx.author} with args: {report_type=}, {category=}, {name=}, {enhance=}, {period=}")
-        try:            
-            # Process report type
-            match report_type:
-                case "profit" | "p":
-                    template = utilities.load_json(settings.profit_report_template)
-                    report_type = "profit"
-                case "trends" | "t":
-                    template = utilities.load_json(settings.trends_report_template)
-                    report_type = "trends"
-                case _:
-                    await ctx.send(f"Invalid report type: {report_type}")
-                    return
-
-            # Process filters
-            category = category.lower() if category is not None else None
-            name = name.lower() if name is not None else None
-            enhance = int(enhance) if enhance is not None else None
-            period = int(period) if period is not None else None
-
-            logger.debug(f"{report_type=}, {category=}, {name=}, {enhance=}, {period=}")
-
-            # Requests report from API server
-            params = {"period": period}
-            response = requests.get(
-                f"{settings.api_url}/report/{report_type}",
-                params={key: value for key, value in params.items() if value is not None}
-            )
-            logger.debug(f"Request URL: {response.url}")
-            logger.debug(f"API response: {response.status_code}")
-
-            if response.status_code == 200:
-                json_string = response.json()
-                # Generate and send report
-                embed = self.generate_report(
-                    json_string,
-                    template=template,
-                    report_type=report_type,
-                    category=category,
-                    name=name,
-                    enhance=enhance,
-                    period=period
-                )
-                await ctx.send(embed=embed)
+        logger.debug(f"Report command invoked by {ctx.author} with args: {report_type=}, {category=}, {name=}, {enhance=}, {period=}, {sort=}, {order=}")
+        # Process report type
+        match report_type:
+            case "profit" | "p":
+                report_type = "profit"
+            case "trends" | "t":
+                report_type = "trends"
+            case _:
+                await ctx.send(f"Invalid report type: {report_type}")
+                return
+
+        # Process filters
+        category = category.lower() if category is not None else None
+        name = name.lower() if name is not None else None
+        try:
+            level = int(enhance) if enhance is not None else None
+        except ValueError:
+            level = -1
+        if level is not None and not 0 <= level <= 10:
+            await ctx.send("Invalid enhance level")
+            return
+        enhance = level
+        try:
+            days = int(period) if period is not None else None
+        except ValueError:
+            days = 0
+        if days is not None and not 1 <= days <= 30:
+            await ctx.send(f"Invalid period: {period}")
+            return
+        period = days
+        sort = sort.lower() if sort is not None else None
+        if sort is not None and sort not in snapshots.SORT_KEYS:
+            await ctx.send(f"Invalid sort key: {sort}")
+            return
+        order = order.lower() if order is not None else "desc"
+        if order not in SORT_ORDERS:
+            await ctx.send(f"Invalid order: {order}")
+            return
+        descending = order == "desc"
+
+        logger.debug(f"{report_type=}, {category=}, {name=}, {enhance=}, {period=}, {sort=}, {descending=}")
 
-            else:
-                logger.warning("status code: %d", response.status_code)
-                await ctx.send(f"status code: {response.status_code}")
+        try:
+            # Requests report from API server, or fall back to the last one while it is down
+            notice = None
+            try:
+                snapshot = await self.cache.get(report_type, period)
+            except (ReportAPIError,) + REQUEST_ERRORS as e:
+                snapshot = self.cache.peek(report_type, period)
+                if snapshot is None:
+                    raise
+                logger.warning("Serving the cached %s report (period %s) of %s: %r", report_type, period, snapshot.timestamp, e)
+                notice = self.bot_message["report_health"]["fallback"].format(timestamp=snapshot.timestamp)
+
+            # Select the items once, every page of the view is rendered from this selection
+            row_ids = await self.offload(snapshot, self.select_rows, snapshot, category, name, enhance)
+            template_version = self.bot.catalog.snapshot.version
+
+            async def render(page: int) -> discord.Embed:
+                # Identical requests on the same snapshot and templates get the same embed
+                key = (report_type, category, name, enhance, period, sort, descending, page, snapshot.timestamp, template_version)
+                embed = self.embeds.get(key)
+                if embed is not None:
+                    return embed
+                # Generate report, only the finished payload comes back to the event loop
+                payload = await self.offload(snapshot, self.render_payload, snapshot, report_type, category, name, enhance, period, row_ids, page, sort, descending)
+                if payload is None:
+                    return None
+                self.embeds.put_payload(key, payload)
+                return self.embeds.embed(payload)
+
+            embed = await render(0)
+            pages = self.page_count(row_ids)
+            if pages == 1 or embed is None:
+                await ctx.send(notice, embed=embed)
+                return
+
+            view = ReportPager(render, pages, ctx.author.id, self.bot_message["report_view"]["not_owner"], timeout=settings.report_view_timeout)
+            view.embeds[0] = embed
+            view.message = await ctx.send(notice, embed=embed, view=view)
+
+        except ReportAPIError as rae:
+            logger.warning("status code: %d", rae.status)
+            await ctx.send(f"status code: {rae.status}")
+
+        except REQUEST_ERRORS as re:
+            await ctx.send(f"An error occurred: {re!r}")
+
+    def item_history(self, report_type: str, name: str, enhance: Optional[int], days: int) -> Tuple[Optional[str], List[Tuple[int, Dict[str, Any]]]]:
+        """
+        The price movement of an item at one or every enhancement level, read from the archive.
 
-        except requests.exceptions.RequestException as re:
-            await ctx.send(f"An error occurred: {re}")
+        Returns
+        -------
+        Tuple[Optional[str], List[Tuple[int, Dict[str, Any]]]]
+            The latest archived timestamp, and the enhancement levels with their summaries.
+        """
+        archive = self.archive(report_type)
+        levels = [enhance] if enhance is not None else archive.enhance_levels(name)
+        summaries = []
+        for level in levels:
+            summary = archives.summarize(archive.history(name, level, days))
+            if summary is not None:
+                summaries.append((level, summary))
+        return archive.latest, summaries
+
+    def suggestion_snapshot(self, interaction: discord.Interaction) -> Optional["Snapshot"]:
+        """
+        The cached snapshot closest to the report being typed, autocomplete never calls the API server.
+        """
+        namespace = interaction.namespace
+        report_type = REPORT_TYPES.get(str(namespace.report_type or "").lower(), "profit")
+        try:
+            period = int(namespace.period) if namespace.period else None
+        except ValueError:
+            period = None
+        for key in ((report_type, period), (report_type, None)):
+            snapshot = self.cache.peek(*key)
+            if snapshot is not None:
+                return snapshot
+        return next((entry.value for entry in self.cache.entries.values()), None)
+
+    async def name_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        snapshot = self.suggestion_snapshot(interaction)
+        if snapshot is None:
+            return []
+        names = snapshot.name_index.suggest(current, limit=MAX_CHOICES)
+        return [app_commands.Choice(name=name[:MAX_CHOICE_LENGTH], value=name[:MAX_CHOICE_LENGTH]) for name in names]
+
+    async def category_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        snapshot = self.suggestion_snapshot(interaction)
+        if snapshot is None:
+            return []
+        current = current.strip().lower()
+        categories = sorted(str(category) for category in snapshot.by_category if category is not None)
+        return [app_commands.Choice(name=category, value=category) for category in categories if current in category.lower()][:MAX_CHOICES]
+
+    async def enhance_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        snapshot = self.suggestion_snapshot(interaction)
+        if snapshot is None:
+            return []
+        current = current.strip()
+        return [
+            app_commands.Choice(name=f"{level} ({enhance_label(level)})", value=str(level))
+            for level in sorted(snapshot.by_enhance) if str(level).startswith(current)
+        ][:MAX_CHOICES]
+
+    async def sort_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        current = current.strip().lower()
+        return [app_commands.Choice(name=key, value=key) for key in snapshots.SORT_KEYS if key.startswith(current)]
+
+    async def order_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        current = current.strip().lower()
+        return [app_commands.Choice(name=label, value=order) for order, label in SORT_ORDERS.items() if order.startswith(current)]
+
+    @commands.hybrid_command(name="history", description="history <report_type> <name> [enhance] [days]")
+    @commands.has_any_role(settings.guild["role"]["subscriber"]["id"])
+    async def history(self, ctx: commands.Context, report_type: str, name: str, enhance: str = None, days: str = None) -> None:
+        """
+        Sends the price movement of an item over the archived report snapshots, without asking the API server.
 
+        Parameters
+        ----------
+        ctx : discord.ext.commands.Context
+            The context in which the command was invoked.
+        report_type : str
+            "p" for profit report
+            "t" for trends report
+        name : str
+            The exact item name
+        enhance : str, optional
+            The enhancement level (0 - 10), every archived level when omitted
+        days : str, optional
+            The period (1 - 30 days), 30 when omitted
+        """
+        logger.debug(f"History command invoked by {ctx.author} with args: {report_type=}, {name=}, {enhance=}, {days=}")
+        match report_type:
+            case "profit" | "p":
+                report_type = "profit"
+            case "trends" | "t":
+                report_type = "trends"
+            case _:
+                await ctx.send(f"Invalid report type: {report_type}")
+                return
+
+        try:
+            level = int(enhance) if enhance is not None else None
+        except ValueError:
+            level = -1
+        if level is not None and not 0 <= level <= 10:
+            await ctx.send("Invalid enhance level")
+            return
+        enhance = level
+        try:
+            period = int(days) if days is not None else 30
+        except ValueError:
+            period = 0
+        if not 1 <= period <= 30:
+            await ctx.send(f"Invalid period: {days}")
+            return
+        days = period
+
+        template = self.bot.catalog.copy("templates/history_report")
+        try:
+            latest, summaries = await asyncio.get_running_loop().run_in_executor(self.executor, self.item_history, report_type, name, enhance, days)
+        except OSError as e:
+            logger.exception("Failed to read the %s archive: %s", report_type, e)
+            await ctx.send(f"An error occurred: {e!r}")
+            return
+        if not summaries:
+            await ctx.send(template["empty"].format(name=name))
+            return
+
+        embed = discord.Embed()
+        embed.title = template["title"]
+        embed.description = template["description"].format(name=name, since=min(summary["since"] for _, summary in summaries))
+        field_template = template["fields"][0]
+        # An embed holds 25 fields including the reference
+        for level, summary in summaries[:24]:
+            labels = {
+                "name": name,
+                "enhance": enhance_label(level),
+                "first": format_thousands(summary["first"]),
+                "last": format_thousands(summary["last"]),
+                "change": f"{summary['change']:+.2f}%" if summary["change"] is not None else "-",
+                "low": format_thousands(summary["low"]),
+                "high": format_thousands(summary["high"]),
+                "averagetradesperday": format_decimal(summary["averagetradesperday"]),
+                "count": summary["count"],
+            }
+            embed.add_field(name=field_template["name"].format(**labels), value=field_template["value"].format(**labels), inline=field_template["inline"])
+        reference_field_template = template["fields"][-1]
+        embed.add_field(name=reference_field_template["name"], value=reference_field_template["value"], inline=reference_field_template["inline"])
+        embed.set_footer(text=template["footer"]["text"], icon_url=template["footer"]["icon_url"].format(icon_url=self.get_avatar_url(self.bot.user)))
+        embed.timestamp = dt.fromisoformat(latest)
+        await ctx.send(embed=embed)
+
+    @commands.hybrid_command(name="chart", description="chart <name> <enhance> [days]")
+    @commands.has_any_role(settings.guild["role"]["subscriber"]["id"])
+    @admission.limit(chart_admission)
+    async def chart(self, ctx: commands.Context, name: str, enhance: str, days: str = None) -> None:
+        """
+        Sends a chart of the price and the trades of an item over the archived trends reports.
+
+        Parameters
+        ----------
+        ctx : discord.ext.commands.Context
+            The context in which the command was invoked.
+        name : str
+            The exact item name
+        enhance : str
+            The enhancement level (0 - 10)
+        days : str, optional
+            The period (1 - 30 days), 7 when omitted
+        """
+        logger.debug(f"Chart command invoked by {ctx.author} with args: {name=}, {enhance=}, {days=}")
+        try:
+            enhance = int(enhance)
+        except ValueError:
+            enhance = -1
+        if not 0 <= enhance <= 10:
+            await ctx.send("Invalid enhance level")
+            return
+        try:
+            period = int(days) if days is not None else 7
+        except ValueError:
+            period = 0
+        if not 1 <= period <= 30:
+            await ctx.send(f"Invalid period: {days}")
+            return
+        days = period
+
+        template = self.bot.catalog.get("templates/chart")
+        archive = self.archive("trends")
+        latest = archive.latest
+        # A new snapshot or edited templates make a new chart
+        key = (name.lower(), enhance, days, latest, self.bot.catalog.snapshot.version)
+        image = self.charts.get(key)
+        if image is None:
+            try:
+                points = await asyncio.get_running_loop().run_in_executor(self.executor, archive.history, name, enhance, days)
+            except OSError as e:
+                logger.exception("Failed to read the trends archive: %s", e)
+                await ctx.send(f"An error occurred: {e!r}")
+                return
+            if not points:
+                await ctx.send(template["empty"].format(name=name))
+                return
+            labels = {
+                "title": template["chart_title"].format(enhance=enhance_label(enhance), name=name),
+                "price": template["price"],
+                "volume": template["volume"],
+                "font": template["font"],
+            }
+            try:
+                image = await self.charts.render(
+                    key,
+                    [point["timestamp"] for point in points],
+                    [point["price"] for point in points],
+                    [point["averagetradesperday"] for point in points],
+                    labels,
+                )
+            except (ImportError, BrokenProcessPool) as e:
+                logger.exception("Failed to render a chart: %s", e)
+                await ctx.send(template["unavailable"].format(error=e))
+                return
+
+        embed = discord.Embed()
+        embed.title = template["title"]
+        embed.description = template["description"].format(enhance=enhance_label(enhance), name=name, days=days)
+        embed.set_image(url="attachment://chart.png")
+        embed.set_footer(text=template["footer"]["text"], icon_url=template["footer"]["icon_url"].format(icon_url=self.get_avatar_url(self.bot.user)))
+        if latest is not None:
+            embed.timestamp = dt.fromisoformat(latest)
+        await ctx.send(embed=embed, file=discord.File(io.BytesIO(image), filename="chart.png"))
+
+    report.autocomplete("name")(name_autocomplete)
+    report.autocomplete("category")(category_autocomplete)
+    report.autocomplete("enhance")(enhance_autocomplete)
+    report.autocomplete("sort")(sort_autocomplete)
+    report.autocomplete("order")(order_autocomplete)
+    history.autocomplete("name")(name_autocomplete)
+    history.autocomplete("enhance")(enhance_autocomplete)
+    chart.autocomplete("name")(name_autocomplete)
+    chart.autocomplete("enhance")(enhance_autocomplete)
 
 
 async def setup(bot: commands.Bot) -> None:
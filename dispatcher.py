@@ -0,0 +1,314 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Discord limits of a single message
+MAX_CONTENT_LENGTH = 2000
+MAX_EMBEDS = 10
+
+
+class Priority(IntEnum):
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+class Job:
+    """
+    An outbound call waiting in a route queue.
+
+    Parameters
+    ----------
+    factory : Callable[[], Awaitable[Any]]
+        Create the coroutine performing the call, invoked when the job is due.
+    priority : Priority
+        The priority of the job within its route.
+    channel : discord.abc.Messageable, optional
+        The destination of a plain send, jobs with a channel can be merged with their neighbours.
+    content : str, optional
+        The text of a plain send.
+    embeds : List[discord.Embed], optional
+        The embeds of a plain send.
+    """
+
+    __slots__ = ("factory", "priority", "channel", "content", "embeds", "future", "enqueued_at")
+
+    def __init__(self, factory: Optional[Callable[[], Awaitable[Any]]], priority: Priority, channel: Any = None, content: Optional[str] = None, embeds: Optional[List[discord.Embed]] = None) -> None:
+        self.factory = factory
+        self.priority = priority
+        self.channel = channel
+        self.content = content
+        self.embeds = embeds or []
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.future.add_done_callback(_consume_exception)
+        self.enqueued_at = time.monotonic()
+
+    @property
+    def mergeable(self) -> bool:
+        return self.channel is not None
+
+    def can_absorb(self, other: "Job") -> bool:
+        """
+        Whether the other plain send fits into the same message as this one.
+        """
+        if not (self.mergeable and other.mergeable and self.priority == other.priority):
+            return False
+        if self.content is not None and other.content is not None:
+            return not self.embeds and not other.embeds and len(self.content) + len(other.content) + 1 <= MAX_CONTENT_LENGTH
+        if self.content is None and other.content is None:
+            return len(self.embeds) + len(other.embeds) <= MAX_EMBEDS
+        return False
+
+    def absorb(self, other: "Job") -> None:
+        if self.content is not None:
+            self.content = f"{self.content}\n{other.content}"
+        self.embeds.extend(other.embeds)
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    # Failures are logged by the worker, callers that never await must not trigger "exception was never retrieved"
+    if not future.cancelled():
+        future.exception()
+
+
+class RouteQueue:
+    """
+    The pending jobs of one route, ordered by priority then arrival.
+    """
+
+    def __init__(self) -> None:
+        self.heap: List[Tuple[int, int, Job]] = []
+        self.worker: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+
+class SendDispatcher:
+    """
+    Central scheduler of outbound Discord calls, shared by all cogs through `bot.dispatcher`.
+
+    Each route (usually a channel) has its own priority queue drained by one worker, so a route
+    waiting on its rate limit bucket never holds up the handler that submitted the call.
+    Consecutive plain sends of the same priority are merged into one message, and low priority
+    work is dropped when it gets stale or the route is backed up.
+
+    Parameters
+    ----------
+    max_queue : int, optional
+        The number of pending jobs per route before low priority work is shed.
+    stale_after : float, optional
+        Seconds after which a pending low priority job is dropped.
+    """
+
+    def __init__(self, max_queue: int = 100, stale_after: float = 60.0) -> None:
+        self.max_queue = max_queue
+        self.stale_after = stale_after
+        self.routes: Dict[Hashable, RouteQueue] = {}
+        self.sequence = itertools.count()
+        self.closed = False
+
+        # Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.merged = 0
+        self.dropped = 0
+        self.wait_total: Dict[Priority, float] = {priority: 0.0 for priority in Priority}
+        self.wait_count: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self.wait_max: Dict[Priority, float] = {priority: 0.0 for priority in Priority}
+
+    @staticmethod
+    def route_of(channel: Any) -> Hashable:
+        return ("channel", getattr(channel, "id", id(channel)))
+
+    def submit(self, route: Hashable, factory: Callable[[], Awaitable[Any]], priority: Priority = Priority.NORMAL) -> asyncio.Future:
+        """
+        Queue an arbitrary outbound call.
+
+        Parameters
+        ----------
+        route : Hashable
+            Calls on the same route run one after another.
+        factory : Callable[[], Awaitable[Any]]
+            Create the coroutine performing the call.
+        priority : Priority, optional
+            The priority of the call within its route.
+
+        Returns
+        -------
+        asyncio.Future
+            Resolves to the result of the call, or None if the call was dropped.
+        """
+        return self._enqueue(route, Job(factory, priority))
+
+    def send(self, channel: discord.abc.Messageable, content: Optional[str] = None, *, embed: Optional[discord.Embed] = None, priority: Priority = Priority.NORMAL, **kwargs: Any) -> asyncio.Future:
+        """
+        Queue a message to a channel. Plain text or embed only messages may be merged with their neighbours.
+
+        Parameters
+        ----------
+        channel : discord.abc.Messageable
+            The destination of the message.
+        content : str, optional
+            The text of the message.
+        embed : discord.Embed, optional
+            The embed of the message.
+        priority : Priority, optional
+            The priority of the message within the channel.
+        **kwargs
+            Any other argument of `channel.send`, a message with extra arguments is never merged.
+
+        Returns
+        -------
+        asyncio.Future
+            Resolves to the sent discord.Message, or None if it was dropped.
+        """
+        route = self.route_of(channel)
+        if kwargs or (content is None and embed is None) or (content is not None and embed is not None):
+            return self._enqueue(route, Job(lambda: channel.send(content, embed=embed, **kwargs), priority))
+        embeds = [embed] if embed is not None else None
+        return self._enqueue(route, Job(None, priority, channel=channel, content=content, embeds=embeds))
+
+    def edit(self, message: discord.Message, *, priority: Priority = Priority.NORMAL, **kwargs: Any) -> asyncio.Future:
+        return self.submit(self.route_of(message.channel), lambda: message.edit(**kwargs), priority)
+
+    def add_reaction(self, message: discord.Message, emoji: Any, *, priority: Priority = Priority.NORMAL) -> asyncio.Future:
+        return self.submit(self.route_of(message.channel), lambda: message.add_reaction(emoji), priority)
+
+    def add_roles(self, member: discord.Member, *roles: discord.abc.Snowflake, priority: Priority = Priority.NORMAL) -> asyncio.Future:
+        return self.submit(("guild", member.guild.id), lambda: member.add_roles(*roles), priority)
+
+    def remove_roles(self, member: discord.Member, *roles: discord.abc.Snowflake, priority: Priority = Priority.NORMAL) -> asyncio.Future:
+        return self.submit(("guild", member.guild.id), lambda: member.remove_roles(*roles), priority)
+
+    def _enqueue(self, route: Hashable, job: Job) -> asyncio.Future:
+        if self.closed:
+            self._drop(job)
+            return job.future
+
+        queue = self.routes.get(route)
+        if queue is None:
+            queue = self.routes[route] = RouteQueue()
+
+        # Backpressure, shed the oldest low priority job to make room, or refuse a new one
+        if len(queue) >= self.max_queue:
+            victim = self._oldest_low(queue)
+            if victim is not None:
+                queue.heap.remove(victim)
+                heapq.heapify(queue.heap)
+                self._drop(victim[2])
+            elif job.priority == Priority.LOW:
+                self._drop(job)
+                return job.future
+
+        self.submitted += 1
+        heapq.heappush(queue.heap, (job.priority, next(self.sequence), job))
+        if queue.worker is None or queue.worker.done():
+            queue.worker = asyncio.create_task(self._drain(route, queue))
+        return job.future
+
+    @staticmethod
+    def _oldest_low(queue: RouteQueue) -> Optional[Tuple[int, int, Job]]:
+        low = [entry for entry in queue.heap if entry[0] == Priority.LOW]
+        return min(low, key=lambda entry: entry[1]) if low else None
+
+    def _drop(self, job: Job) -> None:
+        self.dropped += 1
+        if not job.future.done():
+            job.future.set_result(None)
+
+    async def _drain(self, route: Hashable, queue: RouteQueue) -> None:
+        while queue.heap:
+            _, _, job = heapq.heappop(queue.heap)
+            now = time.monotonic()
+            if job.priority == Priority.LOW and now - job.enqueued_at > self.stale_after:
+                logger.debug("Dropped stale job on %s", route)
+                self._drop(job)
+                continue
+
+            # Merge the following plain sends of the same priority into this message
+            batch = [job]
+            while queue.heap and job.can_absorb(queue.heap[0][2]):
+                _, _, other = heapq.heappop(queue.heap)
+                job.absorb(other)
+                batch.append(other)
+            self.merged += len(batch) - 1
+
+            for item in batch:
+                wait = now - item.enqueued_at
+                self.wait_total[item.priority] += wait
+                self.wait_count[item.priority] += 1
+                self.wait_max[item.priority] = max(self.wait_max[item.priority], wait)
+
+            try:
+                if job.factory is not None:
+                    result = await job.factory()
+                else:
+                    result = await job.channel.send(job.content, embeds=job.embeds or discord.utils.MISSING)
+            except asyncio.CancelledError:
+                for item in batch:
+                    item.future.cancel()
+                raise
+            except Exception as e:
+                self.failed += len(batch)
+                logger.exception("Failed to dispatch on %s: %s", route, e)
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+            else:
+                self.completed += len(batch)
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_result(result)
+
+        # Forget idle routes, the worker is recreated with the next job
+        if self.routes.get(route) is queue and not queue.heap:
+            del self.routes[route]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of the queue depth, throughput and wait time per priority.
+        """
+        depth = {priority.name: 0 for priority in Priority}
+        for queue in self.routes.values():
+            for priority, _, _ in queue.heap:
+                depth[Priority(priority).name] += 1
+        wait = {
+            priority.name: {
+                "avg": self.wait_total[priority] / self.wait_count[priority] if self.wait_count[priority] else 0.0,
+                "max": self.wait_max[priority],
+            }
+            for priority in Priority
+        }
+        return {
+            "routes": len(self.routes),
+            "depth": depth,
+            "wait": wait,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "merged": self.merged,
+            "dropped": self.dropped,
+        }
+
+    async def close(self) -> None:
+        """
+        Stop accepting work and cancel the workers, pending jobs resolve to None.
+        """
+        self.closed = True
+        for queue in list(self.routes.values()):
+            for _, _, job in queue.heap:
+                self._drop(job)
+            queue.heap.clear()
+            if queue.worker is not None:
+                queue.worker.cancel()
+        self.routes.clear()
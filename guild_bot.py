@@ -4,7 +4,11 @@ import sys
 import discord
 from discord.ext import commands
 
+import admission
 import settings
+from catalog import Catalog
+from dispatcher import SendDispatcher
+from startup_profile import StartupProfile
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +21,26 @@ intents.reactions = True
 class GuildBot(commands.Bot):
     def __init__(self) -> None:
         super().__init__(command_prefix="/", intents=intents)
+        self.startup_profile = StartupProfile()
+        self.dispatcher = SendDispatcher(max_queue=settings.dispatcher_max_queue, stale_after=settings.dispatcher_stale_after)
+        self.catalog = Catalog(settings.languages_directory / settings.language, poll_interval=settings.catalog_poll_interval)
+
+    async def setup_hook(self) -> None:
+        """
+        Start watching the keyword and template files for changes.
+        """
+        self.catalog.start()
+
+    async def close(self) -> None:
+        await self.catalog.close()
+        await self.dispatcher.close()
+        await super().close()
+
+    async def on_command_error(self, context: commands.Context, exception: commands.CommandError, /) -> None:
+        # Rejected commands were already answered by the admission control
+        if isinstance(exception, admission.Rejected):
+            return
+        await super().on_command_error(context, exception)
 
     async def on_ready(self) -> None:
         """
@@ -28,18 +52,7 @@ class GuildBot(commands.Bot):
         logger.info("Logged in as %s (%s)", self.user.name, self.user.id)
         logger.info("Serving guilds %s", self.guilds)
 
-        # Load listed cog files
-        number_of_cogs = len(settings.cogs)
-        count = 0
-        for file in settings.cogs:
-            count += 1
-            file = file[:-3]
-            try:
-                await self.load_extension(f"cogs.{file}")
-            except commands.ExtensionNotFound as enf:
-                logger.exception("Failed to load %s: %s", file, enf)
-            else:
-                logger.info("Loaded %s [%d/%d]", file, count, number_of_cogs)
+        await self.load_cogs()
 
         # Sync commands
         try:
@@ -49,3 +62,24 @@ class GuildBot(commands.Bot):
         else:
             logger.info("Synced commands")
             logger.info("Bot is ready")
+
+        if self.startup_profile.ready is None:
+            self.startup_profile.mark_ready()
+            self.startup_profile.log()
+
+    async def load_cogs(self) -> None:
+        """
+        Load the listed cog files, timing each of them for the startup profile.
+        """
+        number_of_cogs = len(settings.cogs)
+        count = 0
+        for file in settings.cogs:
+            count += 1
+            file = file[:-3]
+            try:
+                with self.startup_profile.measure(f"cogs.{file}"):
+                    await self.load_extension(f"cogs.{file}")
+            except commands.ExtensionError as ee:
+                logger.exception("Failed to load %s: %s", file, ee)
+            else:
+                logger.info("Loaded %s [%d/%d]", file, count, number_of_cogs)
@@ -0,0 +1,313 @@
+import logging
+import re
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Pattern, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Match modes of a topic, set with the optional "match" entry of the topic, e.g. "match": ["casefold", "word"]
+# exact    : case-sensitive substring (default)
+# casefold : case-insensitive
+# nfkc     : Unicode NFKC normalized, e.g. full-width "？" matches "?"
+# word     : the keyword must not be surrounded by letters, digits or "_"
+# regex    : every keyword is a regular expression
+MATCH_MODES = frozenset(("exact", "casefold", "nfkc", "word", "regex"))
+
+# Normalization forms, derived from the match modes
+RAW = "raw"
+CASEFOLD = "casefold"
+NFKC = "nfkc"
+NFKC_CASEFOLD = "nfkc_casefold"
+
+
+def normalize(text: str, form: str) -> str:
+    """
+    Normalize a text. Message content goes through here uncached, NormalizedText already keeps each form per message.
+    """
+    if form == RAW:
+        return text
+    if form == CASEFOLD:
+        return text.casefold()
+    if form == NFKC:
+        return unicodedata.normalize("NFKC", text)
+    if form == NFKC_CASEFOLD:
+        return unicodedata.normalize("NFKC", text).casefold()
+    raise ValueError(f"Invalid normalization form: {form}")
+
+
+@lru_cache(maxsize=4096)
+def normalize_keyword(keyword: str, form: str) -> str:
+    """
+    Normalize a keyword, cached since the same keywords come up again on every catalog rebuild.
+    """
+    return normalize(keyword, form)
+
+
+class NormalizedText:
+    """
+    A message content and its normalized forms, each computed at most once and shared by every check.
+
+    Parameters
+    ----------
+    content : str
+        The content of the message.
+    """
+
+    __slots__ = ("forms",)
+
+    def __init__(self, content: str) -> None:
+        self.forms: Dict[str, str] = {RAW: content}
+
+    def __getitem__(self, form: str) -> str:
+        text = self.forms.get(form)
+        if text is None:
+            text = self.forms[form] = normalize(self.forms[RAW], form)
+        return text
+
+
+def parse_modes(value: Union[str, Iterable[str], None]) -> FrozenSet[str]:
+    """
+    Read the "match" entry of a topic.
+    """
+    if value is None:
+        return frozenset(("exact",))
+    modes = frozenset((value,) if isinstance(value, str) else value)
+    unknown = modes - MATCH_MODES
+    if unknown:
+        raise ValueError(f"Invalid match mode: {', '.join(sorted(unknown))}")
+    return modes
+
+
+def form_of(modes: FrozenSet[str]) -> str:
+    if "nfkc" in modes:
+        return NFKC_CASEFOLD if "casefold" in modes else NFKC
+    return CASEFOLD if "casefold" in modes else RAW
+
+
+def is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton reporting every keyword contained in a text in a single pass.
+
+    Parameters
+    ----------
+    keywords : Iterable[str]
+        The keywords to be matched, the position of a keyword is its id.
+    words : Iterable[bool], optional
+        Whether each keyword only matches as a whole word.
+    """
+
+    def __init__(self, keywords: Iterable[str], words: Optional[Iterable[bool]] = None) -> None:
+        self.keywords: List[str] = list(keywords)
+        self.words: List[bool] = list(words) if words is not None else [False] * len(self.keywords)
+        self.has_words = any(self.words)
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]
+
+        for keyword_id, keyword in enumerate(self.keywords):
+            if keyword:
+                self._insert(keyword, keyword_id)
+        self._link()
+
+    def _insert(self, keyword: str, keyword_id: int) -> None:
+        state = 0
+        for char in keyword:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append(keyword_id)
+
+    def _link(self) -> None:
+        # Breadth first, so the failure state of a parent is always resolved before its children
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def search(self, text: str) -> Set[int]:
+        """
+        Find the ids of all keywords contained in the text.
+
+        Parameters
+        ----------
+        text : str
+            The text to be scanned.
+
+        Returns
+        -------
+        Set[int]
+            The ids of the matched keywords.
+        """
+        if self.has_words:
+            return self._search_words(text)
+
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        found: Set[int] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+    def _search_words(self, text: str) -> Set[int]:
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        keywords = self.keywords
+        words = self.words
+        found: Set[int] = set()
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword_id in output[state]:
+                if words[keyword_id]:
+                    start = end - len(keywords[keyword_id]) + 1
+                    if start > 0 and is_word_char(text[start - 1]):
+                        continue
+                    if end + 1 < len(text) and is_word_char(text[end + 1]):
+                        continue
+                found.add(keyword_id)
+        return found
+
+
+class TopicMatcher:
+    """
+    Compiled keyword topics, decides which topics are hit by a message with one automaton scan per normalization form.
+
+    Parameters
+    ----------
+    topics : Dict[str, Any]
+        The "topic" section of a keyword file, topic name -> {"chance", "keyword", "reply", "match" (optional)}.
+    mode : str
+        "all" when every keyword of a topic must be present, "any" when one is enough.
+    """
+
+    def __init__(self, topics: Dict[str, Any], mode: str) -> None:
+        if mode not in ("all", "any"):
+            raise ValueError(f"Invalid match mode: {mode}")
+        self.mode = mode
+        self.topics: List[str] = list(topics)
+        self.data: List[Dict[str, Any]] = [topics[topic] for topic in self.topics]
+
+        # Deduplicate keywords across topics, each unit maps to the topics requiring it
+        units: Dict[Tuple[Any, ...], int] = {}
+        self.unit_topics: List[List[int]] = []
+        self.required: List[int] = []
+        self.always: List[int] = []
+        scans: Dict[str, List[Tuple[str, bool, int]]] = {}
+        self.regexes: List[Tuple[str, Pattern, int]] = []
+
+        for index, data in enumerate(self.data):
+            try:
+                modes = parse_modes(data.get("match"))
+                keys = self._compile_keywords(data["keyword"], modes)
+            except (ValueError, re.error) as e:
+                logger.error("Disabled topic %s: %s", self.topics[index], e)
+                self.required.append(-1)
+                continue
+
+            # An empty keyword is contained in every message
+            has_empty = None in keys
+            keys.discard(None)
+            if has_empty and mode == "any":
+                self.always.append(index)
+            elif not keys and mode == "all":
+                self.always.append(index)
+            for key in keys:
+                if key not in units:
+                    units[key] = len(units)
+                    self.unit_topics.append([])
+                    if key[0] == "regex":
+                        self.regexes.append((key[1], key[2], units[key]))
+                    else:
+                        scans.setdefault(key[1], []).append((key[2], key[3], units[key]))
+                self.unit_topics[units[key]].append(index)
+            self.required.append(len(keys))
+
+        self.scanners: List[Tuple[str, KeywordAutomaton, List[int]]] = []
+        for form, entries in scans.items():
+            automaton = KeywordAutomaton([text for text, _, _ in entries], [word for _, word, _ in entries])
+            self.scanners.append((form, automaton, [unit for _, _, unit in entries]))
+        logger.debug("Compiled %d %s topics with %d keywords", len(self.topics), mode, len(units))
+
+    @staticmethod
+    def _compile_keywords(keywords: Iterable[str], modes: FrozenSet[str]) -> Set[Optional[Tuple[Any, ...]]]:
+        keys: Set[Optional[Tuple[Any, ...]]] = set()
+        if "regex" in modes:
+            form = NFKC if "nfkc" in modes else RAW
+            flags = re.IGNORECASE if "casefold" in modes else 0
+            for pattern in keywords:
+                keys.add(("regex", form, re.compile(pattern, flags)) if pattern else None)
+            return keys
+
+        form = form_of(modes)
+        word = "word" in modes
+        for keyword in keywords:
+            text = normalize_keyword(keyword, form)
+            keys.add(("text", form, text, word) if text else None)
+        return keys
+
+    def match(self, content: Union[str, NormalizedText]) -> List[int]:
+        """
+        Find the topics hit by the content.
+
+        Parameters
+        ----------
+        content : Union[str, NormalizedText]
+            The content of the message, pass a NormalizedText to share the normalized forms between matchers.
+
+        Returns
+        -------
+        List[int]
+            Indexes of the topics hit, in the order the topics are defined.
+        """
+        text = content if isinstance(content, NormalizedText) else NormalizedText(content)
+        found: Set[int] = set()
+        for form, automaton, units in self.scanners:
+            for keyword_id in automaton.search(text[form]):
+                found.add(units[keyword_id])
+        for form, pattern, unit in self.regexes:
+            if pattern.search(text[form]):
+                found.add(unit)
+        if not found:
+            return list(self.always)
+
+        unit_topics = self.unit_topics
+        if self.mode == "any":
+            hits = set(self.always)
+            for unit in found:
+                hits.update(unit_topics[unit])
+            return sorted(hits)
+
+        counters: Dict[int, int] = {}
+        for unit in found:
+            for index in unit_topics[unit]:
+                counters[index] = counters.get(index, 0) + 1
+        required = self.required
+        hits = [index for index, count in counters.items() if count == required[index]]
+        hits.extend(self.always)
+        return sorted(hits)
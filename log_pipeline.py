@@ -0,0 +1,156 @@
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.config import dictConfig
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Tuple, Union
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep one in every `rate` records and at most `per_second` records per second.
+
+    Records above `max_level` are never sampled, so warnings and errors always get through.
+
+    Parameters
+    ----------
+    rate : int, optional
+        Keep 1 in `rate` records, 1 keeps everything.
+    per_second : int, optional
+        Cap of records kept per second, 0 means no cap.
+    max_level : Union[int, str], optional
+        The highest level subject to sampling.
+    """
+
+    def __init__(self, rate: int = 1, per_second: int = 0, max_level: Union[int, str] = logging.INFO) -> None:
+        super().__init__()
+        self.rate = max(1, int(rate))
+        self.per_second = max(0, int(per_second))
+        self.max_level = logging.getLevelName(max_level) if isinstance(max_level, str) else max_level
+        self.seen = 0
+        self.dropped = 0
+        self.window = 0
+        self.window_count = 0
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+
+        with self.lock:
+            self.seen += 1
+            if self.seen % self.rate:
+                self.dropped += 1
+                return False
+
+            if self.per_second:
+                window = int(time.monotonic())
+                if window != self.window:
+                    self.window = window
+                    self.window_count = 0
+                if self.window_count >= self.per_second:
+                    self.dropped += 1
+                    return False
+                self.window_count += 1
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format a record as a single line JSON object.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    A QueueHandler that never blocks the caller, records are dropped when the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _install_queue_handlers(config: Dict[str, Any], queue_size: int) -> List[QueueListener]:
+    """
+    Replace the handlers of every configured logger with queue handlers feeding background listeners.
+
+    Loggers sharing the same handlers share one queue and one listener thread.
+    """
+    groups: Dict[Tuple[logging.Handler, ...], DroppingQueueHandler] = {}
+    listeners: List[QueueListener] = []
+    for name in config.get("loggers", {}):
+        logger = logging.getLogger(name or None)
+        handlers = tuple(logger.handlers)
+        if not handlers:
+            continue
+        if handlers not in groups:
+            queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+            listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+            listener.start()
+            groups[handlers] = queue_handler
+            listeners.append(listener)
+        for handler in handlers:
+            logger.removeHandler(handler)
+        logger.addHandler(groups[handlers])
+    return listeners
+
+
+def stop_listener(listener: QueueListener) -> None:
+    """
+    Flush and stop a listener, safe to call more than once.
+    """
+    if listener._thread is not None:
+        listener.stop()
+
+
+def configure_logging(config: Dict[str, Any], mode: str = "sync", queue_size: int = 10000) -> List[QueueListener]:
+    """
+    Apply the logging configuration.
+
+    Parameters
+    ----------
+    config : Dict[str, Any]
+        A logging.config.dictConfig dictionary.
+    mode : str, optional
+        "sync" writes on the calling thread, "queue" hands records to background listener threads.
+    queue_size : int, optional
+        The capacity of each queue in "queue" mode, records are dropped when it is full.
+
+    Returns
+    -------
+    List[QueueListener]
+        The started listeners, they are stopped and flushed at exit.
+    """
+    dictConfig(config)
+    if mode != "queue":
+        return []
+
+    listeners = _install_queue_handlers(config, queue_size)
+    for listener in listeners:
+        atexit.register(stop_listener, listener)
+    return listeners
@@ -1,16 +1,16 @@
 import logging
-from logging.config import dictConfig
 
 from dotenv import load_dotenv
 
 import settings
 from guild_bot import GuildBot
+from log_pipeline import configure_logging
 
 # Load environment variables
 load_dotenv()
 
 # Apply logging configuration
-dictConfig(settings.LOGGING_CONFIG)
+configure_logging(settings.LOGGING_CONFIG, mode=settings.LOG_MODE, queue_size=settings.LOG_QUEUE_SIZE)
 logger = logging.getLogger(__name__)
 
 def run() -> None:
@@ -0,0 +1,270 @@
+import bisect
+import json
+import logging
+import os
+import pathlib
+import threading
+from array import array
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from reports.snapshot import SORT_KEYS, Snapshot
+
+logger = logging.getLogger("alert_manager")
+
+# Item attributes an alert can watch, and how it compares them with its threshold
+METRICS = SORT_KEYS
+OPERATORS = (">=", "<=")
+
+# (name, enhance, category), None matches anything
+Scope = Tuple[Optional[str], Optional[int], Optional[str]]
+
+
+class Alert:
+    """
+    A subscriber's condition on one metric of the items within a scope of a report.
+
+    Parameters
+    ----------
+    id : int
+        Unique id, shown to the subscriber to remove it.
+    user_id : int
+        The subscriber notified.
+    report_type : str
+        "profit" or "trends".
+    metric : str
+        The item attribute watched.
+    operator : str
+        ">=" or "<=".
+    threshold : float
+        The value the metric is compared with.
+    name : str, optional
+        Exact item name, lowercased.
+    enhance : int, optional
+        Enhancement level.
+    category : str, optional
+        Item category.
+    firing : bool, optional
+        Whether the condition held on the last evaluated snapshot, a firing alert is not notified again until it clears.
+    """
+
+    __slots__ = ("id", "user_id", "report_type", "metric", "operator", "threshold", "name", "enhance", "category", "firing")
+
+    def __init__(self, id: int, user_id: int, report_type: str, metric: str, operator: str, threshold: float, name: Optional[str] = None, enhance: Optional[int] = None, category: Optional[str] = None, firing: bool = False) -> None:
+        self.id = id
+        self.user_id = user_id
+        self.report_type = report_type
+        self.metric = metric
+        self.operator = operator
+        self.threshold = threshold
+        self.name = name
+        self.enhance = enhance
+        self.category = category
+        self.firing = firing
+
+    @property
+    def scope(self) -> Scope:
+        return self.name, self.enhance, self.category
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Alert":
+        return cls(**{key: data[key] for key in cls.__slots__ if key in data})
+
+
+class Trigger(NamedTuple):
+    """
+    An alert whose condition holds on a snapshot, with the best matching item and how many items match.
+    """
+    alert: Alert
+    row_id: int
+    value: Any
+    count: int
+
+
+def scope_rows(snapshot: Snapshot, scope: Scope) -> Optional[Sequence[int]]:
+    """
+    The rows of a snapshot within a scope, None for the whole snapshot.
+    """
+    name, enhance, category = scope
+    if name is not None:
+        items = snapshot.item_rows()
+        levels = [enhance] if enhance is not None else sorted(snapshot.by_enhance)
+        rows = [items[(name, level)] for level in levels if (name, level) in items]
+        return [row_id for row_id in rows if category is None or snapshot.categories[row_id] == category]
+    if enhance is None and category is None:
+        return None
+    return snapshot.query(category=category, enhance=enhance)
+
+
+class AlertIndex:
+    """
+    Every alert grouped by (report type, scope, metric, operator), each group sorted by threshold.
+
+    A snapshot is evaluated group by group: the values of the group's items are sorted once, then the alerts
+    holding are a slice of the thresholds found by binary search, so thousands of alerts on the same scope
+    cost one pass over its items instead of one per alert. The index is rebuilt on every change and never
+    modified, so it can be evaluated in a worker thread.
+    """
+
+    def __init__(self, alerts: Iterable[Alert]) -> None:
+        groups: Dict[str, Dict[Tuple[Scope, str, str], List[Alert]]] = {}
+        for alert in alerts:
+            groups.setdefault(alert.report_type, {}).setdefault((alert.scope, alert.metric, alert.operator), []).append(alert)
+        self.groups: Dict[str, Dict[Tuple[Scope, str, str], Tuple[array, List[Alert]]]] = {}
+        for report_type, report_groups in groups.items():
+            self.groups[report_type] = {}
+            for key, members in report_groups.items():
+                members.sort(key=lambda alert: alert.threshold)
+                self.groups[report_type][key] = (array("d", (alert.threshold for alert in members)), members)
+
+    def __len__(self) -> int:
+        return sum(len(members) for groups in self.groups.values() for _, members in groups.values())
+
+    def evaluate(self, report_type: str, snapshot: Snapshot) -> List[Trigger]:
+        """
+        The alerts of a report type whose condition holds on a snapshot.
+
+        Parameters
+        ----------
+        report_type : str
+            The report the snapshot belongs to.
+        snapshot : Snapshot
+            The new snapshot.
+
+        Returns
+        -------
+        List[Trigger]
+            One trigger per alert holding.
+        """
+        triggers: List[Trigger] = []
+        for (scope, metric, operator), (thresholds, members) in self.groups.get(report_type, {}).items():
+            column = snapshot.columns.get(metric)
+            if column is None:
+                continue
+            rows = scope_rows(snapshot, scope)
+            if rows is None:
+                # The whole snapshot, its ranking is already sorted
+                ranked = list(reversed(snapshot.ranking(metric, descending=True)))
+            else:
+                ranked = sorted((row_id for row_id in rows if isinstance(column[row_id], (int, float))), key=column.__getitem__)
+            if not ranked:
+                continue
+            values = [column[row_id] for row_id in ranked]
+
+            if operator == ">=":
+                # Every threshold up to the largest value holds, the best item is the largest
+                holding = members[:bisect.bisect_right(thresholds, values[-1])]
+                triggers.extend(Trigger(alert, ranked[-1], values[-1], len(values) - bisect.bisect_left(values, alert.threshold)) for alert in holding)
+            else:
+                holding = members[bisect.bisect_left(thresholds, values[0]):]
+                triggers.extend(Trigger(alert, ranked[0], values[0], bisect.bisect_right(values, alert.threshold)) for alert in holding)
+        return triggers
+
+
+class AlertStore:
+    """
+    The alerts of every subscriber, kept in one JSON file replaced atomically on every change.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The JSON file, created on the first change.
+    """
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = pathlib.Path(path)
+        self.alerts: Dict[int, Alert] = {}
+        self.next_id = 1
+        self._index: Optional[AlertIndex] = None
+        self.version = 0
+        self.written = 0
+        self.lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.alerts = {alert.id: alert for alert in map(Alert.from_dict, data.get("alerts", []))}
+            self.next_id = max(data.get("next_id", 1), max(self.alerts, default=0) + 1)
+        logger.info("Loaded %d alerts from %s", len(self.alerts), self.path)
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+    def _changed(self) -> None:
+        self._index = None
+        self.version += 1
+
+    def index(self) -> AlertIndex:
+        if self._index is None:
+            self._index = AlertIndex(self.alerts.values())
+        return self._index
+
+    def of_user(self, user_id: int) -> List[Alert]:
+        return sorted((alert for alert in self.alerts.values() if alert.user_id == user_id), key=lambda alert: alert.id)
+
+    def add(self, user_id: int, report_type: str, metric: str, operator: str, threshold: float, name: Optional[str] = None, enhance: Optional[int] = None, category: Optional[str] = None) -> Alert:
+        alert = Alert(self.next_id, user_id, report_type, metric, operator, threshold, name, enhance, category)
+        self.alerts[alert.id] = alert
+        self.next_id += 1
+        self._changed()
+        return alert
+
+    def remove(self, user_id: int, alert_id: int) -> bool:
+        """
+        Remove an alert of a subscriber, False if the subscriber has no alert with that id.
+        """
+        alert = self.alerts.get(alert_id)
+        if alert is None or alert.user_id != user_id:
+            return False
+        del self.alerts[alert_id]
+        self._changed()
+        return True
+
+    def update_firing(self, report_type: str, triggers: Iterable[Trigger]) -> List[Trigger]:
+        """
+        Record which alerts of a report type hold now.
+
+        Returns
+        -------
+        List[Trigger]
+            The triggers of the alerts that did not hold on the previous snapshot, the ones to notify.
+        """
+        holding: Set[int] = set()
+        fresh: List[Trigger] = []
+        for trigger in triggers:
+            alert = self.alerts.get(trigger.alert.id)
+            if alert is None:
+                # Removed while the snapshot was evaluated
+                continue
+            holding.add(alert.id)
+            if not alert.firing:
+                alert.firing = True
+                fresh.append(trigger)
+        cleared = [alert for alert in self.alerts.values() if alert.report_type == report_type and alert.firing and alert.id not in holding]
+        for alert in cleared:
+            alert.firing = False
+        if fresh or cleared:
+            # The thresholds are unchanged, the index stays valid
+            self.version += 1
+        return fresh
+
+    def dump(self) -> Tuple[int, Dict[str, Any]]:
+        """
+        The content of the file as of now, to be written by `write` off the event loop.
+        """
+        return self.version, {"next_id": self.next_id, "alerts": [alert.to_dict() for alert in self.alerts.values()]}
+
+    def write(self, version: int, data: Dict[str, Any]) -> None:
+        """
+        Replace the file, unless a newer version was already written.
+        """
+        with self.lock:
+            if version <= self.written:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = self.path.with_name(self.path.name + ".tmp")
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temporary, self.path)
+            self.written = version
@@ -0,0 +1,291 @@
+import bisect
+import json
+import logging
+import math
+import mmap
+import os
+import pathlib
+import threading
+from array import array
+from datetime import datetime as dt, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("report_manager")
+
+# Archived item attributes and the array type code of their column file
+# q: 64-bit integer, MISSING_INT when absent; d: double, NaN when absent
+COLUMNS = {
+    "price": "q",
+    "profit": "q",
+    "rate": "d",
+    "stock": "q",
+    "volumechange": "q",
+    "averagetradesperday": "d",
+}
+MISSING_INT = -(2 ** 63)
+
+ItemKey = Tuple[str, int]
+
+
+def item_key(name: Any, enhance: Any) -> Optional[ItemKey]:
+    try:
+        return str(name).lower(), int(enhance)
+    except (TypeError, ValueError):
+        return None
+
+
+class MappedColumn:
+    """
+    A column file mapped read-only into memory, read through a typed memoryview without loading it.
+    """
+
+    def __init__(self, path: pathlib.Path, typecode: str) -> None:
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        # An empty file cannot be mapped
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.view = memoryview(self.map).cast(typecode) if self.map is not None else memoryview(array(typecode))
+
+    def close(self) -> None:
+        self.view.release()
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+
+class SnapshotArchive:
+    """
+    Append-only on-disk history of the report snapshots of one report type.
+
+    Each archived attribute is a flat binary column file, one value per item per snapshot.
+    The rows of a snapshot are contiguous and sorted by item id, so the value of an item in a
+    snapshot is found with a binary search on the memory-mapped item column. History queries
+    only touch the pages they read, the archive is never loaded into RAM as a whole.
+
+    Files in the directory:
+    - items.json: the item registry, item id -> [lowercased name, enhance level].
+    - snapshots.jsonl: one line per snapshot, {"timestamp", "offset", "count"}, written last so a
+      snapshot interrupted while being appended is dropped on the next start.
+    - item.bin and <attribute>.bin: the columns.
+
+    Parameters
+    ----------
+    directory : pathlib.Path
+        Where the archive of the report type is stored, created when missing.
+    """
+
+    def __init__(self, directory: pathlib.Path) -> None:
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.columns: Dict[str, MappedColumn] = {}
+
+        items = self._read_json(self.directory / "items.json", [])
+        self.items: List[ItemKey] = [(name, enhance) for name, enhance in items]
+        self.item_ids: Dict[ItemKey, int] = {key: item_id for item_id, key in enumerate(self.items)}
+
+        self.snapshots: List[Dict[str, Any]] = []
+        path = self.directory / "snapshots.jsonl"
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                self.snapshots = [json.loads(line) for line in f if line.strip()]
+        self.times = [dt.fromisoformat(snapshot["timestamp"]) for snapshot in self.snapshots]
+        self._truncate(self.rows)
+
+    @property
+    def rows(self) -> int:
+        last = self.snapshots[-1] if self.snapshots else {"offset": 0, "count": 0}
+        return last["offset"] + last["count"]
+
+    @property
+    def latest(self) -> Optional[str]:
+        return self.snapshots[-1]["timestamp"] if self.snapshots else None
+
+    @staticmethod
+    def _read_json(path: pathlib.Path, default: Any) -> Any:
+        if not path.exists():
+            return default
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _truncate(self, rows: int) -> None:
+        # Drop the rows of a snapshot whose append did not complete
+        for name, typecode in [("item", "I")] + list(COLUMNS.items()):
+            path = self.directory / f"{name}.bin"
+            size = rows * array(typecode).itemsize
+            if not path.exists():
+                path.touch()
+            elif path.stat().st_size > size:
+                logger.warning("Truncate incomplete archive column %s", path)
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def _unmap(self) -> None:
+        for column in self.columns.values():
+            column.close()
+        self.columns.clear()
+
+    def _column(self, name: str) -> memoryview:
+        column = self.columns.get(name)
+        if column is None:
+            typecode = "I" if name == "item" else COLUMNS[name]
+            column = self.columns[name] = MappedColumn(self.directory / f"{name}.bin", typecode)
+        return column.view
+
+    def append(self, timestamp: str, columns: Dict[str, List[Any]]) -> bool:
+        """
+        Archive a snapshot, ignored unless it is newer than the latest archived one.
+
+        Parameters
+        ----------
+        timestamp : str
+            The snapshot timestamp.
+        columns : Dict[str, List[Any]]
+            The snapshot columns, at least "name" and "enhance".
+
+        Returns
+        -------
+        bool
+            Whether the snapshot was appended.
+        """
+        with self.lock:
+            if self.times and dt.fromisoformat(timestamp) <= self.times[-1]:
+                return False
+
+            # One row per item, the last one wins if an item is listed twice
+            rows: Dict[int, int] = {}
+            new_items = False
+            for row_id, key in enumerate(map(item_key, columns.get("name", []), columns.get("enhance", []))):
+                if key is None:
+                    continue
+                item_id = self.item_ids.get(key)
+                if item_id is None:
+                    item_id = self.item_ids[key] = len(self.items)
+                    self.items.append(key)
+                    new_items = True
+                rows[item_id] = row_id
+            order = sorted(rows)
+
+            self._unmap()
+            if new_items:
+                temporary = self.directory / "items.json.tmp"
+                with open(temporary, "w", encoding="utf-8") as f:
+                    json.dump(self.items, f, ensure_ascii=False)
+                os.replace(temporary, self.directory / "items.json")
+
+            with open(self.directory / "item.bin", "ab") as f:
+                array("I", order).tofile(f)
+            for attribute, typecode in COLUMNS.items():
+                values = columns.get(attribute) or [None] * (max(rows.values(), default=-1) + 1)
+                column = array(typecode, (self._pack(values[rows[item_id]], typecode) for item_id in order))
+                with open(self.directory / f"{attribute}.bin", "ab") as f:
+                    column.tofile(f)
+
+            snapshot = {"timestamp": timestamp, "offset": self.rows, "count": len(order)}
+            with open(self.directory / "snapshots.jsonl", "a", encoding="utf-8") as f:
+                f.write(json.dumps(snapshot) + "\n")
+            self.snapshots.append(snapshot)
+            self.times.append(dt.fromisoformat(timestamp))
+        logger.info("Archived snapshot %s of %s: %d items", timestamp, self.directory.name, len(order))
+        return True
+
+    @staticmethod
+    def _pack(value: Any, typecode: str) -> Any:
+        try:
+            return int(value) if typecode == "q" else float(value)
+        except (TypeError, ValueError, OverflowError):
+            return MISSING_INT if typecode == "q" else math.nan
+
+    @staticmethod
+    def _unpack(value: Any) -> Any:
+        if value == MISSING_INT or (isinstance(value, float) and math.isnan(value)):
+            return None
+        return value
+
+    def window(self, days: Optional[float] = None, until: Optional[dt] = None) -> range:
+        """
+        The indexes of the snapshots taken within the last days, counted back from the latest one.
+        """
+        if not self.times:
+            return range(0)
+        until = until or self.times[-1]
+        end = bisect.bisect_right(self.times, until)
+        start = bisect.bisect_left(self.times, until - timedelta(days=days)) if days is not None else 0
+        return range(start, end)
+
+    def history(self, name: str, enhance: int, days: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        The archived values of one item over time, read straight from the mapped column files.
+
+        Parameters
+        ----------
+        name : str
+            The item name, case-insensitive.
+        enhance : int
+            The enhancement level.
+        days : float, optional
+            Only the snapshots within that many days before the latest one.
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            One entry per snapshot listing the item, {"timestamp", <attribute>: value}, oldest first.
+        """
+        key = item_key(name, enhance)
+        with self.lock:
+            item_id = self.item_ids.get(key) if key is not None else None
+            if item_id is None:
+                return []
+            items = self._column("item")
+            values = {attribute: self._column(attribute) for attribute in COLUMNS}
+            points = []
+            for index in self.window(days):
+                snapshot = self.snapshots[index]
+                start = snapshot["offset"]
+                end = start + snapshot["count"]
+                row = bisect.bisect_left(items, item_id, start, end)
+                if row < end and items[row] == item_id:
+                    point = {"timestamp": snapshot["timestamp"]}
+                    point.update((attribute, self._unpack(column[row])) for attribute, column in values.items())
+                    points.append(point)
+            return points
+
+    def enhance_levels(self, name: str) -> List[int]:
+        name = str(name).lower()
+        return sorted(enhance for item_name, enhance in self.items if item_name == name)
+
+    def close(self) -> None:
+        with self.lock:
+            self._unmap()
+
+
+def summarize(points: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    The price movement of an item over archived snapshots, computed locally.
+
+    Parameters
+    ----------
+    points : List[Dict[str, Any]]
+        The history of the item, oldest first, as returned by `SnapshotArchive.history`.
+
+    Returns
+    -------
+    Dict[str, Any], optional
+        {"first", "last", "change", "low", "high", "averagetradesperday", "count", "since"}, change in percent,
+        None without any archived price.
+    """
+    prices = [point["price"] for point in points if point.get("price") is not None]
+    if not prices:
+        return None
+    trades = [point["averagetradesperday"] for point in points if point.get("averagetradesperday") is not None]
+    first, last = prices[0], prices[-1]
+    return {
+        "first": first,
+        "last": last,
+        "change": (last - first) / first * 100 if first else None,
+        "low": min(prices),
+        "high": max(prices),
+        "averagetradesperday": sum(trades) / len(trades) if trades else None,
+        "count": len(points),
+        "since": points[0]["timestamp"],
+    }
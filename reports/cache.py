@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger("report_manager")
+
+CacheKey = Tuple[str, Optional[int]]
+
+
+class CacheEntry:
+    __slots__ = ("value", "version", "fetched_at")
+
+    def __init__(self, value: Any, version: Hashable, fetched_at: float) -> None:
+        self.value = value
+        self.version = version
+        self.fetched_at = fetched_at
+
+
+class ReportCache:
+    """
+    TTL cache of reports keyed by (report_type, period).
+
+    - A fresh entry is served from memory.
+    - A stale entry (older than `ttl`, younger than `max_stale`) is served at once while one background refresh runs.
+    - Concurrent misses on the same key share one upstream request.
+    - Entries older than `max_stale` are purged, and the least recently used entry is evicted beyond `max_entries`.
+    - A refresh returning the same snapshot version (the payload "timestamp") keeps the cached value,
+      so everything derived from it stays valid.
+
+    Parameters
+    ----------
+    fetch : Callable[[str, Optional[int]], Awaitable[Any]]
+        Load a report from upstream.
+    ttl : float, optional
+        Seconds an entry is served without revalidation.
+    max_stale : float, optional
+        Seconds after which a stale entry is no longer served and callers wait for upstream.
+    max_entries : int, optional
+        Cap on the number of cached reports.
+    version : Callable[[Any], Hashable], optional
+        Extract the snapshot version from a value.
+    """
+
+    def __init__(self, fetch: Callable[[str, Optional[int]], Awaitable[Any]], ttl: float = 60.0, max_stale: float = 3600.0, max_entries: int = 64, version: Callable[[Any], Hashable] = lambda value: value.get("timestamp")) -> None:
+        self.fetch = fetch
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self.version = version
+        self.entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self.inflight: Dict[CacheKey, asyncio.Task] = {}
+
+        # Counters
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.unchanged = 0
+        self.errors = 0
+        self.evictions = 0
+
+    async def get(self, report_type: str, period: Optional[int] = None) -> Any:
+        """
+        Get a report, from memory whenever possible.
+
+        Parameters
+        ----------
+        report_type : str
+            "profit" or "trends".
+        period : int, optional
+            Period filter of the report in days.
+
+        Returns
+        -------
+        Any
+            The cached or freshly loaded report.
+        """
+        key = (report_type, period)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            age = time.monotonic() - entry.fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                return entry.value
+            if age < self.max_stale:
+                self.stale_hits += 1
+                self._load(key)
+                return entry.value
+
+        self.misses += 1
+        return await asyncio.shield(self._load(key))
+
+    def peek(self, report_type: str, period: Optional[int] = None) -> Any:
+        """
+        The cached report whatever its age, or None. Never calls upstream.
+        """
+        entry = self.entries.get((report_type, period))
+        return entry.value if entry is not None else None
+
+    def put(self, report_type: str, period: Optional[int], value: Any) -> Any:
+        """
+        Store a report loaded elsewhere, e.g. by the prefetcher.
+
+        Returns
+        -------
+        Any
+            The cached value, the previous one if the snapshot version did not change.
+        """
+        key = (report_type, period)
+        version = self.version(value)
+        now = time.monotonic()
+        entry = self.entries.get(key)
+        if entry is not None and entry.version == version:
+            self.unchanged += 1
+            entry.fetched_at = now
+            self.entries.move_to_end(key)
+            return entry.value
+        self.entries[key] = CacheEntry(value, version, now)
+        self.entries.move_to_end(key)
+        self._evict(now)
+        return value
+
+    def _evict(self, now: float) -> None:
+        expired = [key for key, entry in self.entries.items() if now - entry.fetched_at >= self.max_stale]
+        for key in expired:
+            del self.entries[key]
+        self.evictions += len(expired)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    async def close(self) -> None:
+        """
+        Cancel the pending upstream requests, called before the client is closed.
+        """
+        tasks = list(self.inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.inflight.clear()
+
+    def _load(self, key: CacheKey) -> asyncio.Task:
+        task = self.inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+
+        self.refreshes += 1
+        task = asyncio.create_task(self._fetch(key))
+        self.inflight[key] = task
+        task.add_done_callback(lambda done: self._loaded(key, done))
+        return task
+
+    async def _fetch(self, key: CacheKey) -> Any:
+        value = await self.fetch(*key)
+        return self.put(key[0], key[1], value)
+
+    def _loaded(self, key: CacheKey, task: asyncio.Task) -> None:
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.errors += 1
+            logger.warning("Failed to refresh report %s: %r", key, error)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "unchanged": self.unchanged,
+            "errors": self.errors,
+            "evictions": self.evictions,
+        }
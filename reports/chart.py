@@ -0,0 +1,176 @@
+import asyncio
+import functools
+import io
+import logging
+import math
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime as dt
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+logger = logging.getLogger("report_manager")
+
+# Fonts tried for the chart texts when the template names none installed
+DEFAULT_FONT = "DejaVu Sans"
+
+
+def render_chart(times: Sequence[str], prices: Sequence[Optional[float]], volumes: Sequence[Optional[float]], labels: Dict[str, Any]) -> bytes:
+    """
+    Draw the price line and volume area of an item as a PNG, in a worker process.
+
+    matplotlib is imported here, so the bot itself never loads it. Only the Figure API is used,
+    pyplot keeps global state.
+
+    Parameters
+    ----------
+    times : Sequence[str]
+        ISO timestamps of the snapshots, oldest first.
+    prices, volumes : Sequence[Optional[float]]
+        The price and daily trades at each timestamp, None when missing.
+    labels : Dict[str, Any]
+        "title", "price" and "volume" texts, and "font", the font families tried in order.
+
+    Returns
+    -------
+    bytes
+        The PNG image.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib import font_manager
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+
+    installed = {font.name for font in font_manager.fontManager.ttflist}
+    fonts = [font for font in labels.get("font", []) if font in installed] or [DEFAULT_FONT]
+
+    x = [dt.fromisoformat(time) for time in times]
+    price = [value if value is not None else math.nan for value in prices]
+    volume = [value if value is not None else 0 for value in volumes]
+
+    with matplotlib.rc_context({"font.family": fonts}):
+        figure = Figure(figsize=(8, 4.5), dpi=100)
+        price_axes = figure.add_subplot()
+        volume_axes = price_axes.twinx()
+        # One stepped area instead of a bar per snapshot, a patch per bar costs more than the rest of the chart
+        volume_axes.fill_between(x, volume, step="mid", color="#57F287", alpha=0.4, linewidth=0, label=labels["volume"])
+        volume_axes.set_ylim(bottom=0)
+        volume_axes.set_ylabel(labels["volume"])
+        price_axes.plot(x, price, color="#5865F2", marker="o" if len(x) <= 48 else None, markersize=3, label=labels["price"])
+        price_axes.set_ylabel(labels["price"])
+        price_axes.yaxis.set_major_formatter(FuncFormatter(lambda value, _: f"{value:,.0f}"))
+        # The price line above the volume
+        price_axes.set_zorder(volume_axes.get_zorder() + 1)
+        price_axes.patch.set_visible(False)
+        price_axes.grid(alpha=0.3)
+        price_axes.set_title(labels["title"])
+        figure.autofmt_xdate()
+
+        image = io.BytesIO()
+        figure.savefig(image, format="png", bbox_inches="tight")
+    return image.getvalue()
+
+
+class ChartRenderer:
+    """
+    Renders charts in a pool of worker processes and keeps the finished images.
+
+    - Images are kept by a key naming everything they depend on, the least recently used one is dropped beyond `max_entries`.
+    - Concurrent requests for the same chart share one rendering.
+    - The pool is started on the first rendering. Its workers never inherit the threads of the bot: they are forked
+      from a server process which only imported this module, or spawned where there is no fork server (Windows).
+
+    Parameters
+    ----------
+    workers : int, optional
+        Worker processes.
+    max_entries : int, optional
+        Cap on the number of images kept.
+    executor : concurrent.futures.Executor, optional
+        Run the renderings there instead of a process pool of its own.
+    """
+
+    def __init__(self, workers: int = 1, max_entries: int = 64, executor: Optional[Executor] = None) -> None:
+        self.workers = max(1, workers)
+        self.max_entries = max_entries
+        self.executor = executor
+        self.owned = False
+        self.images: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self.inflight: Dict[Hashable, asyncio.Future] = {}
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def pool(self) -> Executor:
+        if self.executor is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload([__name__])
+            else:
+                context = multiprocessing.get_context("spawn")
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            self.owned = True
+        return self.executor
+
+    def close(self) -> None:
+        for future in self.inflight.values():
+            future.cancel()
+        if self.owned:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            self.owned = False
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        image = self.images.get(key)
+        if image is None:
+            return None
+        self.hits += 1
+        self.images.move_to_end(key)
+        return image
+
+    def put(self, key: Hashable, image: bytes) -> None:
+        self.images[key] = image
+        self.images.move_to_end(key)
+        while len(self.images) > self.max_entries:
+            self.images.popitem(last=False)
+
+    async def render(self, key: Hashable, times: List[str], prices: List[Optional[float]], volumes: List[Optional[float]], labels: Dict[str, Any]) -> bytes:
+        """
+        The image of a chart, from memory or rendered by a worker.
+
+        Raises
+        ------
+        ImportError
+            If matplotlib is not installed.
+        concurrent.futures.process.BrokenProcessPool
+            If a worker died.
+        """
+        image = self.get(key)
+        if image is not None:
+            return image
+        future = self.inflight.get(key)
+        if future is None:
+            self.misses += 1
+            loop = asyncio.get_running_loop()
+            future = self.inflight[key] = asyncio.ensure_future(loop.run_in_executor(self.pool(), render_chart, times, prices, volumes, labels))
+            future.add_done_callback(functools.partial(self._rendered, key))
+        else:
+            self.coalesced += 1
+        # A caller giving up does not cancel the rendering the others wait for
+        return await asyncio.shield(future)
+
+    def _rendered(self, key: Hashable, future: asyncio.Future) -> None:
+        self.inflight.pop(key, None)
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.errors += 1
+            return
+        self.put(key, future.result())
+
+    def stats(self) -> Dict[str, int]:
+        return {"charts": len(self.images), "chart_hits": self.hits, "chart_misses": self.misses, "chart_coalesced": self.coalesced, "chart_errors": self.errors}
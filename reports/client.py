@@ -0,0 +1,225 @@
+import asyncio
+import contextlib
+import json
+import logging
+from concurrent.futures import Executor
+from typing import Any, AsyncIterator, Dict, Optional
+
+import aiohttp
+
+from reports.health import CircuitBreaker, CircuitOpenError
+from reports.ingest import ReportFormatError, ReportStreamParser
+
+logger = logging.getLogger("report_manager")
+
+
+class ReportAPIError(Exception):
+    """
+    The report API answered with an unexpected status code.
+    """
+
+    def __init__(self, status: int, url: str) -> None:
+        super().__init__(f"status code: {status}")
+        self.status = status
+        self.url = url
+
+
+class ReportClient:
+    """
+    Async client of the report API, holding one pooled keep-alive session for the lifetime of the cog.
+
+    Parameters
+    ----------
+    base_url : str
+        The root URL of the API server.
+    timeout : float, optional
+        Seconds allowed for a whole request.
+    connect_timeout : float, optional
+        Seconds allowed to open a connection.
+    max_connections : int, optional
+        Cap on the concurrent connections to the API server.
+    keepalive : float, optional
+        Seconds an idle connection is kept in the pool.
+    breaker : CircuitBreaker, optional
+        Guards every report request, and is told the outcome of every health check.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 10.0, connect_timeout: float = 5.0, max_connections: int = 10, keepalive: float = 30.0, breaker: Optional[CircuitBreaker] = None) -> None:
+        self.base_url = (base_url or "").rstrip("/")
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.max_connections = max_connections
+        self.keepalive = keepalive
+        self.breaker = breaker
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self) -> None:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=self.keepalive)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, raise_for_status=False)
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _session(self) -> aiohttp.ClientSession:
+        # The session belongs to the cog, a call after cog_unload must not open a new one that nobody closes
+        if self.session is None or self.session.closed:
+            raise RuntimeError("ReportClient is not started")
+        return self.session
+
+    @contextlib.asynccontextmanager
+    async def _guard(self) -> AsyncIterator[None]:
+        breaker = self.breaker
+        if breaker is None:
+            yield
+            return
+        breaker.before()
+        try:
+            yield
+        except ReportAPIError as e:
+            # The server answered, only its own errors count as failures
+            if e.status >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        except NETWORK_ERRORS:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Including an invalid body: the server answered, a bug in it or in the parser says nothing of its health
+            breaker.release()
+            raise
+        else:
+            breaker.record_success()
+
+    async def health(self) -> int:
+        """
+        Ping the API server.
+
+        Returns
+        -------
+        int
+            The HTTP status code of the health endpoint.
+        """
+        # Made even while the circuit is open, a healthy answer is what closes it
+        try:
+            async with self._session().get(f"{self.base_url}/health") as response:
+                await response.read()
+        except NETWORK_ERRORS:
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            raise
+        if self.breaker is not None:
+            if response.status < 500:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+        return response.status
+
+    async def fetch_report(self, report_type: str, period: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Request a report from the API server.
+
+        Parameters
+        ----------
+        report_type : str
+            "profit" or "trends".
+        period : int, optional
+            Period filter of the report in days.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The decoded report, {"timestamp": ..., "data": [...]}.
+
+        Raises
+        ------
+        ReportAPIError
+            If the API server answered with a status other than 200.
+        aiohttp.ClientError, asyncio.TimeoutError
+            If the API server could not be reached in time.
+        ReportFormatError
+            If the body is not valid JSON.
+        CircuitOpenError
+            If the API server is considered down.
+        RuntimeError
+            If the client is not started.
+        """
+        params = {"period": period} if period is not None else {}
+        url = f"{self.base_url}/report/{report_type}"
+        async with self._guard():
+            async with self._session().get(url, params=params) as response:
+                logger.debug("Request URL: %s", response.url)
+                logger.debug("API response: %s", response.status)
+                if response.status != 200:
+                    raise ReportAPIError(response.status, str(response.url))
+                try:
+                    return await response.json(content_type=None)
+                except json.JSONDecodeError as e:
+                    raise ReportFormatError(str(e)) from e
+
+    async def stream_report(self, report_type: str, period: Optional[int], parser: ReportStreamParser, chunk_size: int = 65536, executor: Optional[Executor] = None, inline_bytes: int = 0) -> ReportStreamParser:
+        """
+        Request a report and feed its body to a streaming parser as it arrives.
+
+        Parameters
+        ----------
+        report_type : str
+            "profit" or "trends".
+        period : int, optional
+            Period filter of the report in days.
+        parser : ReportStreamParser
+            Collects the columns of the report.
+        chunk_size : int, optional
+            Bytes handed to the parser at a time.
+        executor : concurrent.futures.Executor, optional
+            Where the chunks are parsed, off the event loop. Parsed inline when omitted.
+        inline_bytes : int, optional
+            Bodies announced with at most this many bytes are parsed inline even with an executor.
+
+        Returns
+        -------
+        ReportStreamParser
+            The parser, complete unless it found the report unchanged and stopped the download.
+
+        Raises
+        ------
+        ReportAPIError
+            If the API server answered with a status other than 200.
+        aiohttp.ClientError, asyncio.TimeoutError
+            If the API server could not be reached in time.
+        ReportFormatError
+            If the body is not a valid report.
+        CircuitOpenError
+            If the API server is considered down.
+        """
+        params = {"period": period} if period is not None else {}
+        url = f"{self.base_url}/report/{report_type}"
+        async with self._guard():
+            async with self._session().get(url, params=params) as response:
+                logger.debug("Request URL: %s", response.url)
+                logger.debug("API response: %s", response.status)
+                if response.status != 200:
+                    raise ReportAPIError(response.status, str(response.url))
+                # A small body costs less to parse than to hand over to a worker
+                if executor is not None and (response.content_length is None or response.content_length > inline_bytes):
+                    loop = asyncio.get_running_loop()
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        if not await loop.run_in_executor(executor, parser.feed, chunk):
+                            return parser
+                    await loop.run_in_executor(executor, parser.close)
+                    return parser
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    if not parser.feed(chunk):
+                        return parser
+            parser.close()
+        return parser
+
+
+# Errors raised when the API server cannot be reached in time, the only ones counted by the circuit breaker
+NETWORK_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+# Errors raised when the API server cannot be reached, answers with an invalid body, or is considered down
+REQUEST_ERRORS = NETWORK_ERRORS + (ReportFormatError, CircuitOpenError)
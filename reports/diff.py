@@ -0,0 +1,127 @@
+import heapq
+import math
+from typing import Any, Dict, List, Optional
+
+from reports.snapshot import Snapshot
+
+def relative_change(before: Any, after: Any) -> Optional[float]:
+    """
+    The change from before to after in percent of before, None when either is not a number or before is 0.
+    """
+    if not isinstance(before, (int, float)) or not isinstance(after, (int, float)):
+        return None
+    if before == after:
+        return 0.0
+    if before == 0:
+        return None
+    return (after - before) / abs(before) * 100
+
+
+class ItemChange:
+    """
+    An item listed in both snapshots whose price, profit or rank moved beyond a threshold.
+
+    Attributes
+    ----------
+    before, after : int
+        The row of the item in the previous and the new snapshot, its rank is the row order of the report.
+    changes : Dict[str, Optional[float]]
+        The relative change in percent of each tracked attribute beyond its threshold, None for a change from 0.
+    moved : bool
+        Whether the rank moved beyond its threshold.
+    """
+
+    __slots__ = ("before", "after", "changes", "moved")
+
+    def __init__(self, before: int, after: int, changes: Dict[str, Optional[float]], moved: bool) -> None:
+        self.before = before
+        self.after = after
+        self.changes = changes
+        self.moved = moved
+
+    @property
+    def weight(self) -> float:
+        # Largest moves first in a digest, a change from 0 is larger than any relative change
+        return max((abs(change) if change is not None else math.inf for change in self.changes.values()), default=0.0) + abs(self.after - self.before) * self.moved
+
+
+class SnapshotDiff:
+    """
+    What changed between two snapshots of a report.
+
+    Attributes
+    ----------
+    added : List[int]
+        Rows of the new snapshot whose item was not listed before, in report order.
+    removed : List[int]
+        Rows of the previous snapshot whose item is no longer listed, in report order.
+    changed : List[ItemChange]
+        Items listed in both snapshots that moved beyond a threshold, in the order of the new report.
+    """
+
+    def __init__(self, previous: Snapshot, current: Snapshot, added: List[int], removed: List[int], changed: List[ItemChange]) -> None:
+        self.previous = previous
+        self.current = current
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def largest_changes(self, limit: int) -> List[ItemChange]:
+        return heapq.nlargest(limit, self.changed, key=lambda change: change.weight)
+
+
+def diff_snapshots(previous: Snapshot, current: Snapshot, thresholds: Dict[str, float], rank_threshold: int) -> SnapshotDiff:
+    """
+    Compare two snapshots of a report item by item.
+
+    Items are matched on (name, enhance level) through the item index of each snapshot, so only the items of the
+    new snapshot are visited once, plus a set difference for the items that dropped out.
+
+    Parameters
+    ----------
+    previous, current : Snapshot
+        The snapshot already seen and the new one.
+    thresholds : Dict[str, float]
+        Smallest relative change in percent reported, by tracked attribute.
+    rank_threshold : int
+        Smallest rank move reported, 0 ignores the rank.
+
+    Returns
+    -------
+    SnapshotDiff
+        The new, dropped and changed items.
+    """
+    before_rows = previous.item_rows()
+    after_rows = current.item_rows()
+    before_columns = {key: previous.columns.get(key) for key in thresholds}
+    after_columns = {key: current.columns.get(key) for key in thresholds}
+
+    added: List[int] = []
+    changed: List[ItemChange] = []
+    for item, after in after_rows.items():
+        before = before_rows.get(item)
+        if before is None:
+            added.append(after)
+            continue
+        changes: Dict[str, Optional[float]] = {}
+        for key, threshold in thresholds.items():
+            if before_columns[key] is None or after_columns[key] is None:
+                continue
+            old, new = before_columns[key][before], after_columns[key][after]
+            change = relative_change(old, new)
+            if change is None:
+                # No percent of 0, any change from it is listed
+                if old == 0 and isinstance(new, (int, float)):
+                    changes[key] = None
+            elif abs(change) >= threshold:
+                changes[key] = change
+        moved = rank_threshold > 0 and abs(after - before) >= rank_threshold
+        if changes or moved:
+            changed.append(ItemChange(before, after, changes, moved))
+
+    # The item index is in row order, only the dropped items need sorting
+    removed = sorted(before_rows[item] for item in before_rows.keys() - after_rows.keys())
+    return SnapshotDiff(previous, current, added, removed, changed)
@@ -0,0 +1,163 @@
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger("report_manager")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    The API server is considered down, the call was not made.
+    """
+
+    def __init__(self, retry_in: float) -> None:
+        super().__init__(f"circuit open, retry in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Fail fast while the API server is down instead of letting every caller wait for a timeout.
+
+    - closed: calls go through, `failure_threshold` consecutive failures open the circuit.
+    - open: calls raise CircuitOpenError until `reset_timeout` seconds have passed.
+    - half_open: one trial call goes through, its success closes the circuit and its failure opens it again.
+
+    Parameters
+    ----------
+    failure_threshold : int, optional
+        Consecutive failures opening the circuit.
+    reset_timeout : float, optional
+        Seconds the circuit stays open before a trial call.
+    clock : Callable[[], float], optional
+        Monotonic time source.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial = False
+
+        # Counters
+        self.rejected = 0
+        self.opened = 0
+
+    def before(self) -> None:
+        """
+        Called before a call, raises CircuitOpenError if it must not be made.
+        """
+        if self.state == CLOSED:
+            return
+        retry_in = self.opened_at + self.reset_timeout - self.clock()
+        if self.state == OPEN and retry_in <= 0:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self.trial:
+            self.trial = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(max(retry_in, 0.0))
+
+    def release(self) -> None:
+        """
+        Called when a call ended without an outcome, e.g. it was cancelled.
+        """
+        self.trial = False
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info("API server recovered, circuit closed")
+        self.state = CLOSED
+        self.failures = 0
+        self.trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.trial = False
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            if self.state == CLOSED:
+                logger.warning("API server failed %d times in a row, circuit opened", self.failures)
+            self.state = OPEN
+            self.opened_at = self.clock()
+            self.opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "circuit": self.state,
+            "consecutive_failures": self.failures,
+            "circuit_rejected": self.rejected,
+            "circuit_opened": self.opened,
+        }
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    The nearest-rank percentile, q in [0, 100], None without values.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class HealthSample:
+    __slots__ = ("checked_at", "latency", "status", "ok")
+
+    def __init__(self, checked_at: float, latency: float, status: Optional[int], ok: bool) -> None:
+        self.checked_at = checked_at
+        self.latency = latency
+        self.status = status
+        self.ok = ok
+
+
+class HealthMonitor:
+    """
+    The outcome and latency of the recent health checks of the API server.
+
+    Parameters
+    ----------
+    history : int, optional
+        Number of checks kept.
+    clock : Callable[[], float], optional
+        Monotonic time source.
+    """
+
+    def __init__(self, history: int = 120, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self.samples: Deque[HealthSample] = deque(maxlen=max(1, history))
+
+    def record(self, latency: float, status: Optional[int], ok: bool) -> None:
+        self.samples.append(HealthSample(self.clock(), latency, status, ok))
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        The state of the API server as last observed, computed from the kept checks only.
+
+        Returns
+        -------
+        Dict[str, Any]
+            {"checks", "success_rate", "p50", "p95", "status", "ok", "age"}, latencies and age in seconds,
+            the last four None before the first check.
+        """
+        samples = list(self.samples)
+        latencies = [sample.latency for sample in samples if sample.ok]
+        last = samples[-1] if samples else None
+        return {
+            "checks": len(samples),
+            "success_rate": sum(sample.ok for sample in samples) / len(samples) if samples else None,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "status": last.status if last is not None else None,
+            "ok": last.ok if last is not None else None,
+            "age": self.clock() - last.checked_at if last is not None else None,
+        }
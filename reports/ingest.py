@@ -0,0 +1,180 @@
+import codecs
+import json
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+# The item attributes used by the report templates, the others are dropped while parsing
+FIELDS = ("category", "name", "enhance", "price", "profit", "rate", "stock", "volumechange", "averagetradesperday")
+
+# Few distinct values repeated on every item, shared instead of one string per item
+INTERNED = ("category",)
+
+WHITESPACE = " \t\n\r"
+
+# Returned while a value continues in the next chunk
+_INCOMPLETE = object()
+
+
+class ReportFormatError(ValueError):
+    """
+    The body of a report is not a valid report.
+    """
+
+
+class ReportStreamParser:
+    """
+    Incremental parser of a report body, {"timestamp": ..., "data": [...]}, fed chunk by chunk as it is downloaded.
+
+    Each item of "data" is decoded on its own and its fields are appended to the columns straight away,
+    so neither the whole body nor a list of item dicts is ever held in memory.
+
+    Parameters
+    ----------
+    fields : Sequence[str], optional
+        The item attributes kept as columns.
+    known_timestamp : str, optional
+        Stop as soon as the report turns out to have this timestamp, the snapshot is already loaded.
+    """
+
+    def __init__(self, fields: Sequence[str] = FIELDS, known_timestamp: Optional[str] = None) -> None:
+        self.fields = tuple(fields)
+        self.known_timestamp = known_timestamp
+        self.columns: Dict[str, List[Any]] = {field: [] for field in self.fields}
+        self.timestamp: Optional[str] = None
+        self.unchanged = False
+        self.size = 0
+
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.state = "start"
+        self.key: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Parse the next chunk of the body.
+
+        Returns
+        -------
+        bool
+            False once the rest of the body is not needed.
+
+        Raises
+        ------
+        ReportFormatError
+            If the body is not a valid report.
+        """
+        self.buffer = self.buffer[self.pos:] + self._decode(chunk, final=False)
+        self.pos = 0
+        self._parse(final=False)
+        return not self.unchanged
+
+    def close(self) -> None:
+        """
+        Parse the end of the body, the columns are complete afterwards.
+        """
+        self.buffer = self.buffer[self.pos:] + self._decode(b"", final=True)
+        self.pos = 0
+        self._parse(final=True)
+        if self.unchanged:
+            return
+        if self.state != "end":
+            raise ReportFormatError("Truncated report")
+        if self.timestamp is None:
+            raise ReportFormatError("Report without timestamp")
+
+    def _decode(self, chunk: bytes, final: bool) -> str:
+        try:
+            return self.decoder.decode(chunk, final=final)
+        except UnicodeDecodeError as e:
+            raise ReportFormatError(str(e)) from e
+
+    def _value(self, final: bool) -> Any:
+        # A value ending exactly at the end of the buffer may be a number cut in two, wait for the next chunk
+        try:
+            value, end = self.json.raw_decode(self.buffer, self.pos)
+        except json.JSONDecodeError as e:
+            if final:
+                raise ReportFormatError(str(e)) from e
+            return _INCOMPLETE
+        if end >= len(self.buffer) and not final:
+            return _INCOMPLETE
+        self.pos = end
+        return value
+
+    def _add_item(self, item: Any) -> None:
+        if not isinstance(item, dict):
+            raise ReportFormatError(f"Invalid report item: {item!r}")
+        for field in self.fields:
+            value = item.get(field)
+            if field in INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            self.columns[field].append(value)
+        self.size += 1
+
+    def _parse(self, final: bool) -> None:
+        buffer = self.buffer
+        while True:
+            while self.pos < len(buffer) and buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos >= len(buffer):
+                return
+            char = buffer[self.pos]
+            state = self.state
+
+            if state == "start":
+                self._expect(char, "{")
+                self.state = "key_or_end"
+            elif state in ("key_or_end", "key"):
+                if char == "}" and state == "key_or_end":
+                    self.pos += 1
+                    self.state = "end"
+                    continue
+                self._expect(char, '"', advance=False)
+                key = self._value(final)
+                if key is _INCOMPLETE:
+                    return
+                self.key = key
+                self.state = "colon"
+            elif state == "colon":
+                self._expect(char, ":")
+                self.state = "data" if self.key == "data" else "value"
+            elif state == "value":
+                value = self._value(final)
+                if value is _INCOMPLETE:
+                    return
+                if self.key == "timestamp":
+                    self.timestamp = value
+                    if self.known_timestamp is not None and value == self.known_timestamp:
+                        self.unchanged = True
+                        return
+                self.state = "next_key"
+            elif state == "next_key":
+                self._expect(char, ",}")
+                self.state = "key" if char == "," else "end"
+            elif state == "data":
+                self._expect(char, "[")
+                self.state = "item_or_end"
+            elif state in ("item_or_end", "item"):
+                if char == "]" and state == "item_or_end":
+                    self.pos += 1
+                    self.state = "next_key"
+                    continue
+                item = self._value(final)
+                if item is _INCOMPLETE:
+                    return
+                self._add_item(item)
+                self.state = "next_item"
+            elif state == "next_item":
+                self._expect(char, ",]")
+                self.state = "item" if char == "," else "next_key"
+            else:
+                raise ReportFormatError(f"Unexpected {char!r} after the report")
+
+    def _expect(self, char: str, expected: str, advance: bool = True) -> None:
+        if char not in expected:
+            raise ReportFormatError(f"Expected {' or '.join(expected)} at {self.pos} in {self.state}, got {char!r}")
+        if advance:
+            self.pos += 1
+
@@ -0,0 +1,103 @@
+import copy
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+import discord
+
+# Shown in place of a value missing from an item
+MISSING = "-"
+
+ENHANCE_LEVELS = {0: "_", 1: "I", 2: "II", 3: "III", 4: "IV", 5: "V", 6: "VI", 7: "VII", 8: "VIII", 9: "IX", 10: "X"}
+
+
+def enhance_label(number: Any) -> str:
+    return ENHANCE_LEVELS.get(number, "_")
+
+
+def format_thousands(number: Any) -> str:
+    """
+    Group the digits by thousands with commas, the same output as the en_US locale without depending on it.
+    """
+    if number is None:
+        return MISSING
+    return f"{int(number):,}"
+
+
+def format_decimal(number: Any) -> str:
+    if number is None:
+        return MISSING
+    return f"{number:.3f}"
+
+
+# Item attribute -> formatter of its label, the other attributes are shown as they are
+FORMATTERS = {
+    "enhance": enhance_label,
+    "price": format_thousands,
+    "profit": format_thousands,
+    "rate": format_decimal,
+    "averagetradesperday": format_decimal,
+}
+
+
+def label_columns(columns: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+    """
+    Format every column once, ready to be filled into the report templates.
+
+    Parameters
+    ----------
+    columns : Dict[str, List[Any]]
+        The columns of a snapshot.
+
+    Returns
+    -------
+    Dict[str, List[Any]]
+        The label columns, sharing the unformatted columns.
+    """
+    labels: Dict[str, List[Any]] = {}
+    for key, column in columns.items():
+        formatter = FORMATTERS.get(key)
+        labels[key] = [formatter(value) for value in column] if formatter is not None else column
+    return labels
+
+
+class EmbedMemo:
+    """
+    Finished report embeds, kept as payloads and keyed by everything the embed depends on.
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        Cap on the number of payloads, the least recently used one is dropped beyond it.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self.payloads: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def embed(payload: Dict[str, Any]) -> discord.Embed:
+        # Embed.from_dict keeps references to the nested fields, hand out a private copy
+        return discord.Embed.from_dict(copy.deepcopy(payload))
+
+    def get(self, key: Hashable) -> Optional[discord.Embed]:
+        payload = self.payloads.get(key)
+        if payload is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.payloads.move_to_end(key)
+        return self.embed(payload)
+
+    def put(self, key: Hashable, embed: discord.Embed) -> None:
+        self.put_payload(key, embed.to_dict())
+
+    def put_payload(self, key: Hashable, payload: Dict[str, Any]) -> None:
+        self.payloads[key] = payload
+        self.payloads.move_to_end(key)
+        while len(self.payloads) > self.max_entries:
+            self.payloads.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"embeds": len(self.payloads), "embed_hits": self.hits, "embed_misses": self.misses}
@@ -0,0 +1,205 @@
+import heapq
+import logging
+from array import array
+from datetime import datetime as dt
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from reports.render import label_columns
+from reports.suggest import NameIndex, ngrams
+
+logger = logging.getLogger("report_manager")
+
+# Item attributes a report can be sorted by
+SORT_KEYS = ("price", "profit", "rate", "stock", "volumechange", "averagetradesperday")
+
+# A filtered selection at least this fraction of the snapshot walks a cached ranking instead of selecting its own top rows
+RANKING_WALK_FRACTION = 1 / 8
+
+
+def _sortable(value: Any) -> bool:
+    return isinstance(value, (int, float))
+
+
+class Snapshot:
+    """
+    One report snapshot in columnar form, built once per snapshot and shared by every query on it.
+
+    Every item attribute is a column (a list indexed by row id), rows keep the order of the API response.
+    Category and enhance level map to the row ids having them, and every 3 character fragment of a lowercased
+    name maps to the row ids containing it, so a filtered query only visits the rows of its smallest index.
+
+    Parameters
+    ----------
+    payload : Dict[str, Any]
+        The decoded report, {"timestamp": ..., "data": [...]}.
+    """
+
+    def __init__(self, payload: Dict[str, Any]) -> None:
+        data: List[Dict[str, Any]] = payload["data"]
+        # A column for every attribute seen in any row, missing values are None
+        keys: Dict[str, None] = {}
+        for row in data:
+            keys.update(dict.fromkeys(row))
+        self._build(payload["timestamp"], {key: [row.get(key) for row in data] for key in keys})
+
+    @classmethod
+    def from_columns(cls, timestamp: str, columns: Dict[str, List[Any]]) -> "Snapshot":
+        """
+        Index columns collected elsewhere, e.g. by the streaming parser, all of the same length.
+        """
+        snapshot = cls.__new__(cls)
+        snapshot._build(timestamp, columns)
+        return snapshot
+
+    def _build(self, timestamp: str, columns: Dict[str, List[Any]]) -> None:
+        self.timestamp = timestamp
+        self.report_time = dt.fromisoformat(timestamp)
+        self.columns = columns
+        self.size = len(next(iter(columns.values()), []))
+        # Formatted once here, rendering a report only looks them up
+        self.labels: Dict[str, List[Any]] = label_columns(self.columns)
+
+        self.names: List[str] = [str(name).lower() if name is not None else "" for name in self.columns.get("name", [None] * self.size)]
+        self.enhances: List[Optional[int]] = [self._to_int(value) for value in self.columns.get("enhance", [None] * self.size)]
+        self.categories: List[Any] = self.columns.get("category", [None] * self.size)
+
+        self.by_category: Dict[Any, array] = {}
+        self.by_enhance: Dict[int, array] = {}
+        self.by_ngram: Dict[str, array] = {}
+        for row_id in range(self.size):
+            self.by_category.setdefault(self.categories[row_id], array("I")).append(row_id)
+            if self.enhances[row_id] is not None:
+                self.by_enhance.setdefault(self.enhances[row_id], array("I")).append(row_id)
+            for gram in set(ngrams(self.names[row_id])):
+                self.by_ngram.setdefault(gram, array("I")).append(row_id)
+        # Distinct names for autocomplete
+        self.name_index = NameIndex(self.columns.get("name", []))
+        # Full orderings of the rows by (sort key, descending), computed once per snapshot on demand
+        self.rankings: Dict[Tuple[str, bool], array] = {}
+        # Row of every item by (lowercased name, enhance level), built on first use
+        self.item_index: Optional[Dict[Tuple[str, Optional[int]], int]] = None
+        logger.debug("Indexed snapshot %s: %d rows, %d name fragments", self.timestamp, self.size, len(self.by_ngram))
+
+    @staticmethod
+    def _to_int(value: Any) -> Optional[int]:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def row(self, row_id: int) -> Dict[str, Any]:
+        return {key: column[row_id] for key, column in self.columns.items()}
+
+    def row_labels(self, row_id: int) -> Dict[str, Any]:
+        return {key: column[row_id] for key, column in self.labels.items()}
+
+    def item_rows(self) -> Dict[Tuple[str, Optional[int]], int]:
+        """
+        The row of every item by (lowercased name, enhance level), the first one when an item is listed twice.
+        """
+        if self.item_index is None:
+            index: Dict[Tuple[str, Optional[int]], int] = {}
+            for row_id in range(self.size):
+                if self.names[row_id]:
+                    index.setdefault((self.names[row_id], self.enhances[row_id]), row_id)
+            self.item_index = index
+        return self.item_index
+
+    def ranking(self, key: str, descending: bool = True) -> array:
+        """
+        Every row with a value for the key, ordered by it, ties in report order. Computed once and kept.
+        """
+        ranking = self.rankings.get((key, descending))
+        if ranking is None:
+            column = self.columns.get(key) or [None] * self.size
+            rows = [row_id for row_id in range(self.size) if _sortable(column[row_id])]
+            rows.sort(key=column.__getitem__, reverse=descending)
+            ranking = self.rankings[(key, descending)] = array("I", rows)
+        return ranking
+
+    def top(self, row_ids: Sequence[int], key: str, descending: bool = True, k: Optional[int] = None) -> List[int]:
+        """
+        The first k rows of a selection ordered by a key, without sorting the whole selection.
+
+        A cached ranking is reused when there is one and the selection is a large part of the snapshot,
+        otherwise only the k best rows are selected from the selection. Rows without a value come last.
+
+        Parameters
+        ----------
+        row_ids : Sequence[int]
+            The selected rows, in report order.
+        key : str
+            The item attribute to sort by.
+        descending : bool, optional
+            Largest values first.
+        k : int, optional
+            Rows wanted, all of them when omitted.
+
+        Returns
+        -------
+        List[int]
+            At most k row ids.
+        """
+        k = len(row_ids) if k is None else min(k, len(row_ids))
+        column = self.columns.get(key) or [None] * self.size
+        ranking = self.rankings.get((key, descending))
+        if ranking is not None and len(row_ids) == self.size:
+            rows = list(ranking[:k])
+        elif ranking is not None and len(row_ids) >= self.size * RANKING_WALK_FRACTION:
+            selected = set(row_ids)
+            rows = []
+            for row_id in ranking:
+                if row_id in selected:
+                    rows.append(row_id)
+                    if len(rows) >= k:
+                        break
+        else:
+            valid = [row_id for row_id in row_ids if _sortable(column[row_id])]
+            select = heapq.nlargest if descending else heapq.nsmallest
+            rows = select(k, valid, key=column.__getitem__)
+        if len(rows) < k:
+            rows.extend([row_id for row_id in row_ids if not _sortable(column[row_id])][:k - len(rows)])
+        return rows
+
+    def query(self, category: Optional[str] = None, name: Optional[str] = None, enhance: Optional[int] = None) -> List[int]:
+        """
+        Find the rows matching every given filter.
+
+        Parameters
+        ----------
+        category : str, optional
+            Exact category.
+        name : str, optional
+            Case-insensitive substring of the item name.
+        enhance : int, optional
+            Exact enhancement level.
+
+        Returns
+        -------
+        List[int]
+            The matching row ids, in the order of the API response.
+        """
+        candidates: List[Sequence[int]] = []
+        if category is not None:
+            candidates.append(self.by_category.get(category, ()))
+        if enhance is not None:
+            candidates.append(self.by_enhance.get(enhance, ()))
+        if name is not None:
+            name = name.lower()
+            grams = set(ngrams(name))
+            candidates.extend(self.by_ngram.get(gram, ()) for gram in grams)
+        if category is None and enhance is None and name is None:
+            return list(range(self.size))
+
+        # Walk the smallest index and check the remaining filters on each of its rows, names shorter than
+        # a fragment have no index of their own and are checked on every row
+        rows = min(candidates, key=len) if candidates else range(self.size)
+        categories = self.categories
+        enhances = self.enhances
+        names = self.names
+        return [
+            row_id for row_id in rows
+            if (category is None or categories[row_id] == category)
+            and (enhance is None or enhances[row_id] == enhance)
+            and (name is None or name in names[row_id])
+        ]
@@ -0,0 +1,111 @@
+import bisect
+import heapq
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Sequence, Set
+
+# Length of the name fragments indexed for substring and misspelling search
+NGRAM = 3
+
+
+def ngrams(text: str, n: int = NGRAM) -> Iterable[str]:
+    return (text[i:i + n] for i in range(len(text) - n + 1))
+
+
+class NameIndex:
+    """
+    The distinct item names of a snapshot, indexed for autocomplete.
+
+    A lookup tries, in order, until it has enough suggestions:
+    - names starting with the text, by binary search on the sorted names,
+    - names with a later word starting with the text, by binary search on the sorted words,
+    - names containing the text, through the 3 character fragments,
+    - names sharing the most fragments with the text, for misspelled names.
+
+    Parameters
+    ----------
+    names : Sequence[Any]
+        The name column of a snapshot, duplicates and None allowed.
+    """
+
+    def __init__(self, names: Sequence[Any]) -> None:
+        labels: Dict[str, str] = {}
+        for name in names:
+            if name is not None:
+                labels.setdefault(str(name).lower(), str(name))
+        self.keys: List[str] = sorted(labels)
+        self.labels: List[str] = [labels[key] for key in self.keys]
+
+        words = sorted((word, name_id) for name_id, key in enumerate(self.keys) for word in key.split()[1:])
+        self.words: List[str] = [word for word, _ in words]
+        self.word_names = array("I", (name_id for _, name_id in words))
+
+        self.by_ngram: Dict[str, array] = {}
+        for name_id, key in enumerate(self.keys):
+            for gram in set(ngrams(key)):
+                self.by_ngram.setdefault(gram, array("I")).append(name_id)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def suggest(self, text: str, limit: int = 25) -> List[str]:
+        """
+        Names matching what has been typed so far.
+
+        Parameters
+        ----------
+        text : str
+            The text typed so far, case-insensitive.
+        limit : int, optional
+            Most suggestions returned.
+
+        Returns
+        -------
+        List[str]
+            The names as the API spells them, best matches first.
+        """
+        text = text.strip().lower()
+        if not text:
+            return self.labels[:limit]
+
+        found: List[int] = []
+        seen: Set[int] = set()
+
+        def add(name_ids: Iterable[int]) -> bool:
+            for name_id in name_ids:
+                if name_id not in seen:
+                    seen.add(name_id)
+                    found.append(name_id)
+                    if len(found) >= limit:
+                        return True
+            return False
+
+        # Sorts right after every string starting with the text
+        end = text + "\uffff"
+        start = bisect.bisect_left(self.keys, text)
+        if add(range(start, bisect.bisect_left(self.keys, end, start))):
+            return self._labels(found)
+        start = bisect.bisect_left(self.words, text)
+        if add(self.word_names[index] for index in range(start, bisect.bisect_left(self.words, end, start))):
+            return self._labels(found)
+        if len(text) < NGRAM:
+            return self._labels(found)
+
+        grams = set(ngrams(text))
+        postings = [self.by_ngram.get(gram, ()) for gram in grams]
+        keys = self.keys
+        if add(name_id for name_id in min(postings, key=len) if text in keys[name_id]):
+            return self._labels(found)
+
+        if not found:
+            # Misspelled, rank the names by the fragments they share with the text
+            shared = Counter()
+            for posting in postings:
+                shared.update(posting)
+            threshold = max(1, len(grams) // 3)
+            best = heapq.nsmallest(limit, ((-count, name_id) for name_id, count in shared.items() if count >= threshold))
+            add(name_id for _, name_id in best)
+        return self._labels(found)
+
+    def _labels(self, name_ids: List[int]) -> List[str]:
+        return [self.labels[name_id] for name_id in name_ids]
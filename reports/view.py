@@ -0,0 +1,81 @@
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+import discord
+
+logger = logging.getLogger("report_manager")
+
+
+class ReportPager(discord.ui.View):
+    """
+    Previous/next buttons paging through a report whose items were selected once, when the report was requested.
+
+    Pages are rendered from that selection on demand and kept for the life of the view. Once the view
+    times out the buttons are disabled and the selection and rendered pages are released.
+
+    Parameters
+    ----------
+    render : Callable[[int], Awaitable[discord.Embed]]
+        Render a page, 0-based, from the kept selection.
+    pages : int
+        The number of pages.
+    author_id : int
+        The ID of the user who requested the report, the only one allowed to page.
+    not_owner : str
+        The reply to anyone else pressing a button.
+    timeout : float, optional
+        Seconds without a button press before the view expires.
+    """
+
+    def __init__(self, render: Callable[[int], Awaitable[discord.Embed]], pages: int, author_id: int, not_owner: str, timeout: float = 300.0) -> None:
+        super().__init__(timeout=timeout)
+        self.render: Optional[Callable[[int], Awaitable[discord.Embed]]] = render
+        self.pages = pages
+        self.page = 0
+        self.author_id = author_id
+        self.not_owner = not_owner
+        self.message: Optional[discord.Message] = None
+        self.embeds: Dict[int, discord.Embed] = {}
+        self._update_buttons()
+
+    async def page_embed(self, page: int) -> discord.Embed:
+        embed = self.embeds.get(page)
+        if embed is None:
+            embed = self.embeds[page] = await self.render(page)
+        return embed
+
+    def _update_buttons(self) -> None:
+        self.previous.disabled = self.page <= 0
+        self.next.disabled = self.page >= self.pages - 1
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message(self.not_owner, ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction, page: int) -> None:
+        self.page = max(0, min(page, self.pages - 1))
+        self._update_buttons()
+        embed = await self.page_embed(self.page)
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        await self._show(interaction, self.page + 1)
+
+    async def on_timeout(self) -> None:
+        # Release the selection and the rendered pages, only the sent message remains
+        self.render = None
+        self.embeds.clear()
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException as e:
+                logger.debug("Failed to disable report buttons: %s", e)
@@ -0,0 +1,170 @@
+import logging
+import random
+from typing import Any, Callable, Dict, Iterable, Tuple, Union
+
+from keyword_matcher import NormalizedText, TopicMatcher
+
+logger = logging.getLogger(__name__)
+
+
+def on_chance(percent: int) -> bool:
+    return random.randint(1, 100) <= percent
+
+
+class RuleEngine:
+    """
+    The keyword and VIP reply rules compiled once, evaluated in a single pass per message.
+
+    Priority: all keywords -> VIP mentioned -> VIP sender -> any keywords.
+
+    Parameters
+    ----------
+    all_keywords : Dict[str, Any]
+        The content of all.json.
+    any_keywords : Dict[str, Any]
+        The content of any.json.
+    vip_keywords : Dict[str, Any]
+        The content of vip.json.
+    chance : Callable[[int], bool], optional
+        Roll whether a rule with the given percentage fires.
+    """
+
+    def __init__(self, all_keywords: Dict[str, Any], any_keywords: Dict[str, Any], vip_keywords: Dict[str, Any], chance: Callable[[int], bool] = on_chance) -> None:
+        self.chance = chance
+        self.all_matcher = TopicMatcher(all_keywords.get("topic", {}), mode="all")
+        self.any_matcher = TopicMatcher(any_keywords.get("topic", {}), mode="any")
+
+        # VIP id -> (user, rule), the first definition of an id wins as the linear scan did
+        self.vips: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+        for user, data in vip_keywords.items():
+            self.vips.setdefault(data["id"], (user, data))
+
+    def evaluate(self, content: str, author_id: int, mention_ids: Iterable[int]) -> Tuple[bool, str]:
+        """
+        Find the reply of the highest priority rule fired by a message.
+
+        Parameters
+        ----------
+        content : str
+            The content of the message.
+        author_id : int
+            The ID of the message author.
+        mention_ids : Iterable[int]
+            The IDs of the users mentioned in the message, in order of appearance.
+
+        Returns
+        -------
+        tuple
+            (reply: bool, draft: str)
+        """
+        # Normalized forms are computed on demand, once, and shared by both keyword checks
+        text = NormalizedText(content)
+        mention_ids = list(mention_ids)
+        reply, draft = self.check_all_keywords(text)
+        if not reply:
+            reply, draft = self.check_vip_mentioned(mention_ids)
+        if not reply:
+            reply, draft = self.check_vip_sender(author_id, bool(mention_ids))
+        if not reply:
+            reply, draft = self.check_any_keywords(text)
+        return reply, draft
+
+    def _check_topics(self, matcher: TopicMatcher, content: Union[str, NormalizedText]) -> Tuple[bool, str]:
+        for index in matcher.match(content):
+            data = matcher.data[index]
+            logger.debug("Message included %s keywords in a topic %s", matcher.mode, matcher.topics[index])
+            if self.chance(data["chance"]):
+                return True, random.choice(data["reply"])
+        return False, ""
+
+    def check_all_keywords(self, content: Union[str, NormalizedText]) -> Tuple[bool, str]:
+        """
+        Check whether the message contains all keywords for a topic.
+
+        Parameters
+        ----------
+        content : Union[str, NormalizedText]
+            The content of the message.
+
+        Returns
+        -------
+        tuple
+            (reply: bool, draft: str)
+        """
+        return self._check_topics(self.all_matcher, content)
+
+    def check_any_keywords(self, content: Union[str, NormalizedText]) -> Tuple[bool, str]:
+        """
+        Check whether the message contains any keywords for a topic.
+
+        Parameters
+        ----------
+        content : Union[str, NormalizedText]
+            The content of the message.
+
+        Returns
+        -------
+        tuple
+            (reply: bool, draft: str)
+        """
+        return self._check_topics(self.any_matcher, content)
+
+    def check_vip_mentioned(self, mention_ids: Iterable[int]) -> Tuple[bool, str]:
+        """
+        Check whether the message mentioned a VIP.
+
+        Parameters
+        ----------
+        mention_ids : Iterable[int]
+            The IDs of the users mentioned in the message.
+
+        Returns
+        -------
+        tuple
+            (reply: bool, draft: str)
+        """
+        vips = self.vips
+        for member_id in mention_ids:
+            vip = vips.get(member_id)
+            if vip is None:
+                continue
+            user, data = vip
+            logger.debug("Message mentioned VIP %s", user)
+            rule = data["topic"].get("be_mentioned")
+            if rule and self.chance(rule["chance"]):
+                return True, random.choice(rule["reply"])
+        return False, ""
+
+    def check_vip_sender(self, author_id: int, mentioned: bool) -> Tuple[bool, str]:
+        """
+        Check whether the message is sent by a VIP.
+
+        Parameters
+        ----------
+        author_id : int
+            The ID of the message author.
+        mentioned : bool
+            Whether the message mentioned someone.
+
+        Returns
+        -------
+        tuple
+            (reply: bool, draft: str)
+        """
+        vip = self.vips.get(author_id)
+        if vip is None:
+            return False, ""
+
+        user, data = vip
+        logger.debug("Message send by a VIP %s", user)
+        topics = data["topic"]
+        if mentioned:
+            rule = topics.get("mentions")
+            if rule and self.chance(rule["chance"]):
+                return True, random.choice(rule["reply"])
+        else:
+            rule = topics.get("send")
+            if rule and self.chance(rule["chance"]):
+                keyword = random.choice(list(topics.keys()))
+                return True, random.choice(topics[keyword]["reply"])
+        return False, ""
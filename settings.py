@@ -1,6 +1,6 @@
 import os
 import pathlib
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from dotenv import load_dotenv
 
@@ -15,6 +15,25 @@ ROOT_DIR = pathlib.Path(os.path.dirname(os.path.abspath(__file__)))
 cogs_directory = ROOT_DIR / "cogs"
 languages_directory = ROOT_DIR / "languages"
 
+# Startup, "lazy" defers heavy imports of the cogs until first use, "eager" imports them when the cog loads
+startup_mode: str = os.getenv("STARTUP_MODE") or "eager"
+# Seconds a cold start may take until the cogs are loaded, checked by tests/test_startup.py
+startup_budget: float = float(os.getenv("STARTUP_BUDGET") or 5)
+
+# Admission control of the expensive commands: invocations running at once, commands per second a member and a guild
+# may sustain and how many they may send at once, and invocations waiting for a slot in total and per member
+admission: Dict[str, Dict[str, float]] = {
+    "report": {"concurrency": 4, "user_rate": 0.2, "user_burst": 3, "guild_rate": 2.0, "guild_burst": 20, "max_queue": 20, "max_queue_per_user": 2},
+    "audit_log": {"concurrency": 1, "user_rate": 1 / 30, "user_burst": 2, "guild_rate": 0.1, "guild_burst": 3, "max_queue": 2, "max_queue_per_user": 1},
+    "react_emoji": {"concurrency": 2, "user_rate": 0.1, "user_burst": 3, "guild_rate": 0.5, "guild_burst": 5, "max_queue": 5, "max_queue_per_user": 1},
+    "chart": {"concurrency": 2, "user_rate": 0.1, "user_burst": 3, "guild_rate": 1.0, "guild_burst": 10, "max_queue": 10, "max_queue_per_user": 1},
+}
+# Seconds a queued command waits for a slot before the member is asked to try again
+admission_queue_timeout: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT") or 30)
+
+# Seconds between two checks for edited keyword and template files
+catalog_poll_interval: float = float(os.getenv("CATALOG_POLL_INTERVAL") or 5)
+
 # Files
 keywords_directory = languages_directory / language / "keywords"
 all_keywords = keywords_directory / "all.json"
@@ -39,6 +58,7 @@ cogs = [
     "member_event.py",
     "message_handler.py",
     "report_manager.py",
+    "alert_manager.py",
 ]
 
 # Guild setting
@@ -65,7 +85,25 @@ guild: Dict[str, Any] = {
     }
 }
 
+# Outbound send dispatcher, pending calls per channel before low priority work is dropped,
+# and seconds after which a pending low priority call is dropped
+dispatcher_max_queue: int = int(os.getenv("DISPATCHER_MAX_QUEUE") or 100)
+dispatcher_stale_after: float = float(os.getenv("DISPATCHER_STALE_AFTER") or 60)
+
 # Logging configuration
+# "sync" writes records on the calling thread, "queue" hands them to a background listener thread
+LOG_MODE: str = os.getenv("LOG_MODE") or "sync"
+# "text" or "json" (one JSON object per line)
+LOG_FORMAT: str = os.getenv("LOG_FORMAT") or "text"
+LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE") or 10000)
+# Per logger sampling, keep 1 in "rate" records and at most "per_second" records per second (0 = no cap)
+LOG_SAMPLING: Dict[str, Dict[str, int]] = {
+    "message_handler": {
+        "rate": int(os.getenv("LOG_MESSAGE_SAMPLE_RATE") or 1),
+        "per_second": int(os.getenv("LOG_MESSAGE_RATE_CAP") or 0),
+    },
+}
+
 LOGGING_CONFIG = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -73,12 +111,19 @@ LOGGING_CONFIG = {
         "default": {
             "format": "[%(asctime)s] %(levelname)s in %(module)s: %(message)s",
         },
+        "json": {
+            "()": "log_pipeline.JsonFormatter",
+        },
+    },
+    "filters": {
+        f"{name}_sampling": {"()": "log_pipeline.SamplingFilter", **sampling}
+        for name, sampling in LOG_SAMPLING.items()
     },
     "handlers": {
         "console": {
             "level": os.getenv("LOG_LEVEL", "INFO"),
             "class": "logging.StreamHandler",
-            "formatter": "default",            
+            "formatter": "json" if LOG_FORMAT == "json" else "default",
         },
     },
     "loggers": {
@@ -94,8 +139,78 @@ LOGGING_CONFIG = {
             "level": "INFO",
             "handlers": ["console"],
         },
+        **{
+            name: {"filters": [f"{name}_sampling"]}
+            for name in LOG_SAMPLING
+        },
     }
 }
 
 # API URL
 api_url: str = os.getenv("API_URL")
+# Seconds allowed for a whole API request and for opening a connection, and the cap on concurrent connections
+api_timeout: float = float(os.getenv("API_TIMEOUT") or 10)
+api_connect_timeout: float = float(os.getenv("API_CONNECT_TIMEOUT") or 5)
+api_max_connections: int = int(os.getenv("API_MAX_CONNECTIONS") or 10)
+# Seconds between two background health checks of the API server (0 disables them), and the number of checks kept for /health
+api_health_interval: float = float(os.getenv("API_HEALTH_INTERVAL") or 30)
+api_health_history: int = int(os.getenv("API_HEALTH_HISTORY") or 120)
+# Consecutive failed API calls after which calls fail fast, and seconds until a trial call is let through again
+api_breaker_failures: int = int(os.getenv("API_BREAKER_FAILURES") or 5)
+api_breaker_reset: float = float(os.getenv("API_BREAKER_RESET") or 30)
+
+# Report cache, seconds a report is served without asking the API server,
+# and seconds a stale report may still be served while it is refreshed in the background
+report_cache_ttl: float = float(os.getenv("REPORT_CACHE_TTL") or 60)
+report_cache_max_stale: float = float(os.getenv("REPORT_CACHE_MAX_STALE") or 3600)
+# Cap on the number of cached reports, the least recently used one is dropped beyond it
+report_cache_max_entries: int = int(os.getenv("REPORT_CACHE_MAX_ENTRIES") or 64)
+# Cap on the number of finished report embeds kept for identical requests
+report_embed_cache_size: int = int(os.getenv("REPORT_EMBED_CACHE_SIZE") or 256)
+
+# Items per report page (at most 24, an embed holds 25 fields including the reference), and seconds without a button press before a paged report stops responding
+report_page_size: int = min(int(os.getenv("REPORT_PAGE_SIZE") or 18), 24)
+report_view_timeout: float = float(os.getenv("REPORT_VIEW_TIMEOUT") or 300)
+# Sort keys of /report ranked as soon as a snapshot is loaded, sorting by the other keys ranks only the items shown
+report_ranked_keys: List[str] = [key.strip() for key in (os.getenv("REPORT_RANKED_KEYS") or "rate,profit,volumechange").split(",") if key.strip()]
+
+# Threads parsing, indexing, filtering and rendering reports off the event loop, and the report sizes still handled
+# inline, in items and in response bytes, because handing them over to a worker costs more than the work itself
+report_workers: int = int(os.getenv("REPORT_WORKERS") or 2)
+report_inline_items: int = int(os.getenv("REPORT_INLINE_ITEMS") or 5000)
+report_inline_bytes: int = int(os.getenv("REPORT_INLINE_BYTES") or 131072)
+
+# Report prefetcher, seconds between two polls of the API server (0 disables it), random extra delay per poll,
+# the cap on the delay while the API server keeps failing, and the periods polled besides the unfiltered reports
+report_prefetch_interval: float = float(os.getenv("REPORT_PREFETCH_INTERVAL") or 60)
+report_prefetch_jitter: float = float(os.getenv("REPORT_PREFETCH_JITTER") or 10)
+report_prefetch_max_backoff: float = float(os.getenv("REPORT_PREFETCH_MAX_BACKOFF") or 900)
+report_prefetch_periods: List[int] = [int(period) for period in (os.getenv("REPORT_PREFETCH_PERIODS") or "7").split(",") if period.strip()]
+
+# Where every new unfiltered report snapshot is archived, one sub-directory per report type, for /history
+report_archive_directory = pathlib.Path(os.getenv("REPORT_ARCHIVE_DIRECTORY") or ROOT_DIR / "archive")
+
+# Worker processes drawing /chart images, and the cap on the finished images kept for identical requests
+chart_workers: int = int(os.getenv("CHART_WORKERS") or 1)
+chart_cache_size: int = int(os.getenv("CHART_CACHE_SIZE") or 64)
+
+# Channel receiving a digest of what changed in every new unfiltered report snapshot (0 disables it), the smallest
+# price and profit changes in percent and rank moves listed, and the items listed per section of a digest
+report_feed_channel_id: int = int(os.getenv("REPORT_FEED_CHANNEL_ID") or 0)
+report_feed_thresholds: Dict[str, float] = {
+    "price": float(os.getenv("REPORT_FEED_PRICE_CHANGE") or 5),
+    "profit": float(os.getenv("REPORT_FEED_PROFIT_CHANGE") or 10),
+}
+report_feed_rank_change: int = int(os.getenv("REPORT_FEED_RANK_CHANGE") or 10)
+report_feed_max_lines: int = int(os.getenv("REPORT_FEED_MAX_LINES") or 10)
+
+# Price alerts of subscribers, stored in a JSON file, checked against every new unfiltered report snapshot
+alert_store = pathlib.Path(os.getenv("ALERT_STORE") or ROOT_DIR / "alerts.json")
+alert_max_per_user: int = int(os.getenv("ALERT_MAX_PER_USER") or 20)
+# "dm" sends each subscriber a direct message, "channel" mentions them in the alert channel, which also receives
+# the alerts of subscribers not accepting direct messages (0 = no alert channel)
+alert_delivery: str = os.getenv("ALERT_DELIVERY") or "dm"
+alert_channel_id: int = int(os.getenv("ALERT_CHANNEL_ID") or 0)
+# Seconds the alerts of a subscriber are collected into one notification, and the alerts listed in it
+alert_coalesce_seconds: float = float(os.getenv("ALERT_COALESCE_SECONDS") or 5)
+alert_max_lines: int = int(os.getenv("ALERT_MAX_LINES") or 10)
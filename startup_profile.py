@@ -0,0 +1,151 @@
+import importlib.abc
+import importlib.util
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def lazy_import(name: str, lazy: bool = True) -> ModuleType:
+    """
+    Import a module, deferring its execution until an attribute is first accessed.
+
+    Parameters
+    ----------
+    name : str
+        The absolute name of the module.
+    lazy : bool, optional
+        Import at once when False, e.g. to surface import errors at startup.
+
+    Returns
+    -------
+    ModuleType
+        The module, or a placeholder which becomes the module on first use.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    if not lazy:
+        return importlib.import_module(name)
+
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, loader: importlib.abc.Loader, name: str, timings: Dict[str, float]) -> None:
+        self.loader = loader
+        self.name = name
+        self.timings = timings
+
+    def create_module(self, spec: Any) -> Optional[ModuleType]:
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timings[self.name] = time.perf_counter() - start
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.loader, name)
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """
+    Wrap the loader of every module found while installed, recording how long the module takes to execute.
+    """
+
+    def __init__(self, timings: Dict[str, float]) -> None:
+        self.timings = timings
+
+    def find_spec(self, name: str, path: Optional[Sequence[str]], target: Optional[ModuleType] = None) -> Any:
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimedLoader(spec.loader, name, self.timings)
+            return spec
+        return None
+
+
+class StartupProfile:
+    """
+    Import and load times of the extensions loaded at startup, logged once the bot is ready.
+
+    Import times are inclusive: a module imported by another one counts towards both.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.ready: Optional[float] = None
+        self.imports: Dict[str, float] = {}
+        self.loads: Dict[str, float] = {}
+        self.modules: Dict[str, List[str]] = {}
+
+    @contextmanager
+    def measure(self, extension: str) -> Iterator[None]:
+        """
+        Record the load time of an extension and the import time of every module it pulls in.
+        """
+        finder = _TimingFinder(self.imports)
+        before = set(sys.modules)
+        sys.meta_path.insert(0, finder)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.loads[extension] = time.perf_counter() - start
+            sys.meta_path.remove(finder)
+            self.modules[extension] = sorted(set(sys.modules) - before)
+
+    def mark_ready(self) -> None:
+        self.ready = time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "extensions": {
+                extension: {
+                    "load": load,
+                    "import": self.imports.get(extension, 0.0),
+                    "modules": len(self.modules.get(extension, [])),
+                    "slowest": self.slowest(extension),
+                }
+                for extension, load in self.loads.items()
+            },
+        }
+
+    def slowest(self, extension: str, count: int = 3) -> List[List[Any]]:
+        """
+        The dependencies of an extension taking the longest to import.
+        """
+        modules = [name for name in self.modules.get(extension, []) if name != extension and name in self.imports]
+        modules.sort(key=self.imports.__getitem__, reverse=True)
+        return [[name, self.imports[name]] for name in modules[:count]]
+
+    def log(self) -> None:
+        for extension, load in sorted(self.loads.items(), key=lambda item: item[1], reverse=True):
+            slowest = ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.slowest(extension))
+            logger.info(
+                "Startup %s: load %.1f ms, import %.1f ms, %d new modules%s",
+                extension, load * 1000, self.imports.get(extension, 0.0) * 1000, len(self.modules.get(extension, [])),
+                f" ({slowest})" if slowest else "",
+            )
+        if self.ready is not None:
+            logger.info("Startup ready in %.1f ms", self.ready * 1000)
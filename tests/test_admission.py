@@ -0,0 +1,191 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import asyncio
+import os
+import unittest
+from types import SimpleNamespace
+
+# settings.py requires the guild configuration, any value will do offline
+for variable in ("GUILD_ID", "LOG_CHANNEL_ID", "WELCOME_CHANNEL_ID", "TEST_CHANNEL_ID", "ROLE_CHANNEL_ID", "CONFERENCE_CHANNEL_ID",
+                 "ADMIN_ROLE_ID", "TESTER_ROLE_ID", "MEMBER_ROLE_ID", "SUBSCRIBER_ROLE_ID", "ROLE_MESSAGE_ID"):
+    os.environ.setdefault(variable, "0")
+
+from discord.ext import commands
+
+from admission import AdmissionController, Rejected, TokenBucket, limit
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=0.5, burst=2, now=0)
+        for _ in range(2):
+            self.assertEqual(bucket.wait_time(0), 0)
+            bucket.take()
+        self.assertEqual(bucket.wait_time(0), 2)
+        self.assertEqual(bucket.wait_time(2), 0)
+
+class TestAdmissionController(unittest.IsolatedAsyncioTestCase):
+    def controller(self, **limits):
+        self.clock = Clock()
+        options = dict(concurrency=1, user_rate=100, user_burst=100, guild_rate=100, guild_burst=100, max_queue=10, max_queue_per_user=5, queue_timeout=5)
+        options.update(limits)
+        return AdmissionController("test", clock=self.clock, **options)
+
+    async def test_rate_limited_per_user_and_guild(self):
+        controller = self.controller(concurrency=10, user_rate=1, user_burst=2, guild_rate=1, guild_burst=3)
+        await controller.acquire(1, "guild")
+        await controller.acquire(1, "guild")
+        with self.assertRaises(Rejected) as context:
+            await controller.acquire(1, "guild")
+        self.assertEqual(context.exception.reason, "rate_limited")
+        self.assertEqual(context.exception.retry_after, 1)
+        await controller.acquire(2, "guild")
+        # The guild is out of tokens as well now, a rejected call takes none
+        with self.assertRaises(Rejected):
+            await controller.acquire(3, "guild")
+        await controller.acquire(3, "other guild")
+        self.assertEqual(controller.rejected["rate_limited"], 2)
+
+    async def test_round_robin_across_users(self):
+        controller = self.controller()
+        await controller.acquire("holder")
+        order = []
+
+        async def command(user):
+            await controller.acquire(user)
+            order.append(user)
+            controller.release()
+
+        # One member queues three commands before two others queue one each
+        tasks = [asyncio.create_task(command(user)) for user in ("a", "a", "a", "b", "c")]
+        await asyncio.sleep(0)
+        self.assertEqual(controller.waiting, 5)
+        controller.release()
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ["a", "b", "c", "a", "a"])
+        self.assertEqual(controller.running, 0)
+
+    async def test_bounded_queue(self):
+        controller = self.controller(max_queue=2, max_queue_per_user=1)
+        await controller.acquire("holder")
+        positions = []
+
+        async def queued(position):
+            positions.append(position)
+
+        waiting = [asyncio.create_task(controller.acquire(user, on_queued=queued)) for user in ("a", "b")]
+        await asyncio.sleep(0)
+        self.assertEqual(positions, [1, 2])
+        with self.assertRaises(Rejected) as context:
+            await controller.acquire("c")
+        self.assertEqual(context.exception.reason, "busy")
+        controller.release()
+        controller.release()
+        await asyncio.gather(*waiting)
+
+    async def test_busy_rejection_takes_no_token(self):
+        controller = self.controller(user_rate=0.01, user_burst=2, max_queue=0)
+        await controller.acquire(1)
+        for _ in range(3):
+            with self.assertRaises(Rejected) as context:
+                await controller.acquire(1)
+            self.assertEqual(context.exception.reason, "busy")
+        controller.release()
+        # The second token is still there
+        await controller.acquire(1)
+        self.assertEqual(controller.rejected["rate_limited"], 0)
+
+    async def test_queue_timeout(self):
+        controller = self.controller(queue_timeout=0.01)
+        await controller.acquire("holder")
+        with self.assertRaises(Rejected) as context:
+            await controller.acquire("a")
+        self.assertEqual(context.exception.reason, "timeout")
+        self.assertEqual(controller.waiting, 0)
+        self.assertEqual(dict(controller.queues), {})
+
+    async def test_cancelled_waiter_hands_its_slot_on(self):
+        controller = self.controller()
+        await controller.acquire("holder")
+        first = asyncio.create_task(controller.acquire("a"))
+        second = asyncio.create_task(controller.acquire("b"))
+        await asyncio.sleep(0)
+        # The slot goes to the first waiter, which is cancelled before it resumes
+        controller.release()
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        await asyncio.wait_for(second, 1)
+        self.assertEqual(controller.running, 1)
+
+class Cog(commands.Cog):
+    controller = AdmissionController("test", concurrency=1, user_rate=100, user_burst=100, queue_timeout=0.01)
+
+    @commands.hybrid_command(name="fail")
+    @limit(controller)
+    async def fail(self, ctx: commands.Context, days: str = None) -> None:
+        int(days)
+
+class TestLimit(unittest.IsolatedAsyncioTestCase):
+    def context(self, messages, errors):
+        sent = []
+
+        async def send(content, **kwargs):
+            sent.append(content)
+
+        async def can_run(ctx, call_once=False):
+            return True
+
+        async def get_context(interaction):
+            return ctx
+
+        bot = SimpleNamespace(
+            catalog=SimpleNamespace(get=lambda name: {"admission": messages}), dispatch=lambda *args: errors.append(args),
+            can_run=can_run, get_context=get_context, _before_invoke=None, _after_invoke=None,
+        )
+        interaction = SimpleNamespace(client=bot, namespace=SimpleNamespace(days="abc"))
+        ctx = SimpleNamespace(bot=bot, interaction=interaction, author=SimpleNamespace(id=1), guild=None, send=send, command_failed=False, kwargs={}, args=[], message=None)
+        return ctx, sent
+
+    async def test_wrapper_takes_and_releases_a_slot(self):
+        controller = AdmissionController("test", concurrency=1, user_rate=1, user_burst=1)
+        running = []
+
+        @limit(controller)
+        async def command(cog, ctx):
+            running.append(controller.running)
+
+        ctx, sent = self.context({"rate_limited": "wait {seconds}s"}, [])
+        await command(Cog(), ctx)
+        self.assertEqual(running, [1])
+        self.assertEqual(controller.running, 0)
+
+        with self.assertRaises(Rejected):
+            await command(Cog(), ctx)
+        self.assertEqual(sent, ["wait 1s"])
+        self.assertEqual(running, [1])
+        self.assertEqual(controller.running, 0)
+
+    async def test_slash_command_failing_releases_its_slot(self):
+        # discord.py skips the after-invoke hooks of a hybrid command invoked as a slash command when it raises
+        cog = Cog()
+        errors = []
+        ctx, _ = self.context({}, errors)
+        for _ in range(3):
+            await cog.fail.app_command._invoke_with_namespace(ctx.interaction, ctx.interaction.namespace)
+            self.assertEqual(Cog.controller.running, 0)
+        self.assertEqual(Cog.controller.admitted, 3)
+        failures = [error for event, *args in errors if event == "command_error" for error in args[1:]]
+        self.assertEqual([type(error).__name__ for error in failures], ["HybridCommandError"] * 3)
+        self.assertIsInstance(failures[0].__cause__.__cause__, ValueError)
+
+if __name__ == "__main__":
+    unittest.main()
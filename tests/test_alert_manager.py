@@ -0,0 +1,108 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import asyncio
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import discord
+
+from benchmarks.bench_report_command import FakeBot, FakeContext, FakeUser
+import settings
+from catalog import Catalog
+from cogs.alert_manager import AlertManager
+from reports.snapshot import Snapshot
+
+def snapshot(timestamp, price):
+    return Snapshot({"timestamp": timestamp, "data": [
+        {"category": "buff", "name": "Storm Sword", "enhance": 3, "price": price, "rate": 1.2},
+        {"category": "costume", "name": "Fire Robe", "enhance": 0, "price": 10, "rate": 2.5},
+    ]})
+
+class FakeDispatcher:
+    def __init__(self, closed=()):
+        self.sent = []
+        self.closed = closed
+
+    def send(self, channel, content=None, **kwargs):
+        future = asyncio.get_running_loop().create_future()
+        if getattr(channel, "id", None) in self.closed:
+            future.set_exception(discord.Forbidden(SimpleNamespace(status=403, reason="Forbidden"), "Cannot send messages to this user"))
+        else:
+            self.sent.append((channel, content, kwargs.get("embed")))
+            future.set_result(None)
+        return future
+
+class TestAlertManager(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        patches = {"alert_store": Path(self.directory.name) / "alerts.json", "alert_coalesce_seconds": 0, "alert_channel_id": 9}
+        for name, value in patches.items():
+            patcher = mock.patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.bot = FakeBot(Catalog(settings.languages_directory / "en"))
+        self.bot.get_user = FakeUser
+        self.bot.get_channel = lambda channel_id: SimpleNamespace(id=channel_id)
+        self.bot.get_cog = lambda name: None
+        self.bot.dispatcher = FakeDispatcher(closed={2})
+        self.cog = AlertManager(self.bot)
+        await self.cog.cog_load()
+
+    async def asyncTearDown(self):
+        await self.cog.cog_unload()
+        self.directory.cleanup()
+
+    async def command(self, user_id, command, *arguments):
+        ctx = FakeContext(FakeUser(user_id))
+        await getattr(self.cog, command).callback(self.cog, ctx, *arguments)
+        return ctx
+
+    async def test_add_list_and_remove(self):
+        ctx = await self.command(1, "alert", "price", "1,000", None, "Storm Sword", "3")
+        self.assertEqual(ctx.sent[0]["content"], "Alert #1 added: profit price >= 1,000 for storm sword at III")
+        ctx = await self.command(1, "alert", "colour", "1")
+        self.assertEqual(ctx.sent[0]["content"], "Invalid metric: colour, use one of price, profit, rate, stock, volumechange, averagetradesperday")
+        ctx = await self.command(1, "alert", "rate", "high")
+        self.assertEqual(ctx.sent[0]["content"], "Invalid threshold: high")
+
+        ctx = await self.command(1, "alerts")
+        self.assertEqual(ctx.embeds[0].description, "#1 profit price >= 1,000 for storm sword at III")
+        ctx = await self.command(2, "alert_remove", 1)
+        self.assertEqual(ctx.sent[0]["content"], "You have no alert #1.")
+        await self.command(1, "alert_remove", 1)
+        ctx = await self.command(1, "alerts")
+        self.assertEqual(ctx.sent[0]["content"], "You have no alerts.")
+
+    async def test_notifications_are_coalesced_per_subscriber(self):
+        await self.command(1, "alert", "price", "1000", None, "storm sword", "3")
+        await self.command(1, "alert", "rate", "2", None, None, None, "costume")
+        await self.command(2, "alert", "rate", "1", ">=")
+        await self.command(3, "alert", "price", "5", "<=")
+
+        await self.cog.on_report_snapshot("profit", snapshot("2024-01-01T00:00:00", 2000))
+        await self.cog.flush_task
+
+        sent = {getattr(channel, "id", None): (content, embed) for channel, content, embed in self.bot.dispatcher.sent}
+        self.assertEqual(set(sent), {1, 9})
+        self.assertEqual(sent[1][1].description.splitlines(), [
+            "#1 profit price >= 1,000 for storm sword at III: III : Storm Sword at 2,000 (1 items)",
+            "#2 profit rate >= 2 in category costume: _ : Fire Robe at 2.500 (1 items)",
+        ])
+        # Direct messages closed, mentioned in the alert channel instead
+        self.assertTrue(sent[9][0].startswith("<@2> #3 profit rate >= 1: _ : Fire Robe at 2.500 (2 items)"))
+
+        # Still holding on the next snapshot, nobody is notified again
+        self.bot.dispatcher.sent.clear()
+        await self.cog.on_report_snapshot("profit", snapshot("2024-01-01T01:00:00", 3000))
+        self.assertEqual(self.cog.pending, {})
+        await self.cog.flush_task
+        self.assertEqual(self.bot.dispatcher.sent, [])
+
+if __name__ == "__main__":
+    unittest.main()
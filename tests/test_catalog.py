@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json
+import os
+import tempfile
+import unittest
+
+from catalog import Catalog
+
+class TestCatalog(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tempdir.name)
+        (self.directory / "keywords").mkdir()
+        self.write("keywords/all.json", {"topic": {"a": 1}}, mtime=1000)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def write(self, name, data, mtime):
+        path = self.directory / name
+        path.write_text(data if isinstance(data, str) else json.dumps(data), encoding="utf-8")
+        os.utime(path, (mtime, mtime))
+
+    async def test_refresh_on_change(self):
+        catalog = Catalog(self.directory)
+        compiled = catalog.add_compiler("topics", lambda files: sorted(files["keywords/all"]["topic"]))
+        self.assertEqual(compiled, ["a"])
+        self.assertFalse(await catalog.refresh())
+
+        self.write("keywords/all.json", {"topic": {"b": 2}}, mtime=2000)
+        self.assertTrue(await catalog.refresh())
+        self.assertEqual(catalog.get("keywords/all"), {"topic": {"b": 2}})
+        self.assertEqual(catalog.compiled("topics"), ["b"])
+        self.assertEqual(catalog.snapshot.version, 2)
+
+    async def test_keep_previous_version_of_invalid_file(self):
+        catalog = Catalog(self.directory)
+        self.write("keywords/all.json", "{invalid", mtime=2000)
+        await catalog.refresh()
+        self.assertEqual(catalog.get("keywords/all"), {"topic": {"a": 1}})
+
+    async def test_copy_is_private(self):
+        catalog = Catalog(self.directory)
+        catalog.copy("keywords/all")["topic"]["a"] = 3
+        self.assertEqual(catalog.get("keywords/all"), {"topic": {"a": 1}})
+
+if __name__ == "__main__":
+    unittest.main()
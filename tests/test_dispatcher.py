@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import asyncio
+import unittest
+
+import discord
+
+from dispatcher import Priority, SendDispatcher
+
+class FakeChannel:
+    def __init__(self, id=1, delay=0.0):
+        self.id = id
+        self.delay = delay
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        self.sent.append((content, kwargs))
+        return len(self.sent)
+
+class TestSendDispatcher(unittest.IsolatedAsyncioTestCase):
+    async def test_priority_order(self):
+        dispatcher = SendDispatcher()
+        channel = FakeChannel()
+        blocker = dispatcher.send(channel, "first", priority=Priority.NORMAL)
+        dispatcher.send(channel, embed=discord.Embed(title="log"), priority=Priority.LOW)
+        reply = dispatcher.send(channel, "reply", priority=Priority.HIGH)
+        await asyncio.gather(blocker, reply)
+        await asyncio.sleep(0)
+        # The worker starts after all three are queued, so the reply jumps the queue
+        self.assertEqual(channel.sent[0][0], "reply")
+        self.assertEqual(channel.sent[1][0], "first")
+
+    async def test_merge_plain_sends(self):
+        dispatcher = SendDispatcher()
+        channel = FakeChannel(delay=0.01)
+        futures = [dispatcher.send(channel, f"line {i}", priority=Priority.LOW) for i in range(5)]
+        results = await asyncio.gather(*futures)
+        self.assertEqual(len(channel.sent), 1)
+        self.assertEqual(channel.sent[0][0], "line 0\nline 1\nline 2\nline 3\nline 4")
+        self.assertEqual(results, [1, 1, 1, 1, 1])
+        self.assertEqual(dispatcher.stats()["merged"], 4)
+
+    async def test_shed_low_priority_under_backpressure(self):
+        dispatcher = SendDispatcher(max_queue=2)
+        channel = FakeChannel(delay=0.01)
+        first = dispatcher.send(channel, embed=discord.Embed(title="0"), priority=Priority.LOW)
+        await asyncio.sleep(0)
+        low = [dispatcher.send(channel, embed=discord.Embed(title=str(i)), priority=Priority.LOW, silent=True) for i in range(1, 4)]
+        high = dispatcher.send(channel, "reply", priority=Priority.HIGH)
+        await asyncio.gather(first, high, *low)
+        self.assertEqual(dispatcher.stats()["dropped"], 2)
+        self.assertIn(("reply", {}), [(content, {}) for content, _ in channel.sent])
+
+    async def test_failure_propagates(self):
+        dispatcher = SendDispatcher()
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            await dispatcher.submit("route", fail)
+        self.assertEqual(dispatcher.stats()["failed"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import unittest
+
+from keyword_matcher import KeywordAutomaton, NormalizedText, TopicMatcher
+
+TOPICS = {
+    "topic1": {"chance": 100, "keyword": ["keyword1", "keyword2", "?"], "reply": ["Reply for topic1."]},
+    "topic2": {"chance": 100, "keyword": ["keyword3", "keyword4", "?"], "reply": ["Reply for topic2."]},
+    "topic3": {"chance": 100, "keyword": ["word"], "reply": ["Reply for topic3."]},
+}
+
+class TestKeywordAutomaton(unittest.TestCase):
+    def test_search_overlapping_keywords(self):
+        automaton = KeywordAutomaton(["he", "she", "his", "hers"])
+        self.assertEqual(automaton.search("ushers"), {0, 1, 3})
+
+    def test_search_no_match(self):
+        automaton = KeywordAutomaton(["abc", "bcd"])
+        self.assertEqual(automaton.search("abxbcx"), set())
+
+    def test_search_non_ascii(self):
+        automaton = KeywordAutomaton(["機器人", "你好"])
+        self.assertEqual(automaton.search("你好，機器人"), {0, 1})
+
+class TestTopicMatcher(unittest.TestCase):
+    def reference(self, content, mode):
+        check = all if mode == "all" else any
+        return [index for index, data in enumerate(TOPICS.values()) if check(word in content for word in data["keyword"])]
+
+    def test_matches_reference_loops(self):
+        messages = ["keyword1 keyword2?", "keyword2 keyword1", "keyword3 ? keyword4 keyword1 keyword2", "a word?", "", "?"]
+        for mode in ("all", "any"):
+            matcher = TopicMatcher(TOPICS, mode=mode)
+            for content in messages:
+                self.assertEqual(matcher.match(content), self.reference(content, mode), (mode, content))
+
+    def test_empty_keyword_list(self):
+        topics = {"empty": {"chance": 100, "keyword": [], "reply": ["r"]}}
+        self.assertEqual(TopicMatcher(topics, mode="all").match("anything"), [0])
+        self.assertEqual(TopicMatcher(topics, mode="any").match("anything"), [])
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            TopicMatcher(TOPICS, mode="some")
+
+class TestMatchModes(unittest.TestCase):
+    def match(self, match, keywords, content, mode="any"):
+        topics = {"topic": {"chance": 100, "keyword": keywords, "reply": ["r"], "match": match}}
+        return TopicMatcher(topics, mode=mode).match(content) == [0]
+
+    def test_exact_is_case_sensitive(self):
+        self.assertFalse(self.match("exact", ["Hi"], "hi there"))
+
+    def test_casefold(self):
+        self.assertTrue(self.match("casefold", ["Hi"], "HI there"))
+        self.assertTrue(self.match("casefold", ["straße"], "STRASSE"))
+
+    def test_nfkc(self):
+        self.assertTrue(self.match("nfkc", ["?", "關鍵字1"], "關鍵字1？", mode="all"))
+        self.assertFalse(self.match(None, ["?", "關鍵字1"], "關鍵字1？", mode="all"))
+
+    def test_word_boundary(self):
+        self.assertFalse(self.match(["word"], ["bot"], "robot"))
+        self.assertFalse(self.match(["word"], ["bot"], "bots"))
+        self.assertTrue(self.match(["word"], ["bot"], "hey bot!"))
+        self.assertTrue(self.match(["word", "casefold"], ["bot"], "Bot"))
+
+    def test_regex(self):
+        self.assertTrue(self.match("regex", [r"\bprice\s+of\b"], "price  of wood"))
+        self.assertTrue(self.match(["regex", "casefold"], [r"^hello"], "HELLO"))
+        self.assertFalse(self.match("regex", [r"^hello"], "say hello"))
+
+    def test_invalid_topic_is_disabled(self):
+        self.assertFalse(self.match("regex", ["("], "("))
+        self.assertFalse(self.match("fuzzy", ["a"], "a"))
+
+    def test_normalized_text_shared(self):
+        text = NormalizedText("HELLO")
+        self.assertEqual(text["casefold"], "hello")
+        self.assertIn("casefold", text.forms)
+        self.assertNotIn("nfkc", text.forms)
+
+if __name__ == "__main__":
+    unittest.main()
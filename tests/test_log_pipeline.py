@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json
+import logging
+import unittest
+
+from log_pipeline import JsonFormatter, SamplingFilter, configure_logging, stop_listener
+
+class CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+def make_record(level=logging.INFO, msg="hello %s", args=("world",)):
+    return logging.LogRecord("message_handler", level, __file__, 1, msg, args, None)
+
+class TestSamplingFilter(unittest.TestCase):
+    def test_keep_one_in_n(self):
+        sampling = SamplingFilter(rate=4)
+        kept = [sampling.filter(make_record()) for _ in range(12)]
+        self.assertEqual(kept.count(True), 3)
+        self.assertEqual(sampling.dropped, 9)
+
+    def test_rate_cap(self):
+        sampling = SamplingFilter(per_second=5)
+        kept = [sampling.filter(make_record()) for _ in range(20)]
+        self.assertLessEqual(kept.count(True), 10)
+
+    def test_warnings_never_sampled(self):
+        sampling = SamplingFilter(rate=100, max_level="INFO")
+        self.assertTrue(all(sampling.filter(make_record(level=logging.WARNING)) for _ in range(10)))
+
+class TestJsonFormatter(unittest.TestCase):
+    def test_format(self):
+        entry = json.loads(JsonFormatter().format(make_record()))
+        self.assertEqual(entry["message"], "hello world")
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["logger"], "message_handler")
+
+class TestConfigureLogging(unittest.TestCase):
+    def test_queue_mode(self):
+        handler = CollectingHandler()
+        config = {
+            "version": 1,
+            "disable_existing_loggers": False,
+            "handlers": {"collect": {"()": lambda: handler}},
+            "loggers": {"test_log_pipeline": {"level": "INFO", "handlers": ["collect"], "propagate": False}},
+        }
+        listeners = configure_logging(config, mode="queue")
+        try:
+            logger = logging.getLogger("test_log_pipeline")
+            self.assertNotIn(handler, logger.handlers)
+            logger.info("queued %d", 1)
+        finally:
+            for listener in listeners:
+                stop_listener(listener)
+        self.assertEqual([record.getMessage() for record in handler.records], ["queued 1"])
+
+if __name__ == "__main__":
+    unittest.main()
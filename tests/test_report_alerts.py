@@ -0,0 +1,94 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import random
+import tempfile
+import unittest
+
+from reports.alerts import Alert, AlertIndex, AlertStore
+from reports.snapshot import Snapshot
+
+def brute_force(alerts, items):
+    """Every alert checked against every row."""
+    holding = {}
+    for alert in alerts:
+        values = [
+            item[alert.metric] for item in items
+            if (alert.name is None or item["name"].lower() == alert.name)
+            and (alert.enhance is None or item["enhance"] == alert.enhance)
+            and (alert.category is None or item["category"] == alert.category)
+        ]
+        matching = [value for value in values if (value >= alert.threshold if alert.operator == ">=" else value <= alert.threshold)]
+        if matching:
+            holding[alert.id] = (max(matching) if alert.operator == ">=" else min(matching), len(matching))
+    return holding
+
+class TestAlertIndex(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(0)
+        items = [
+            {"category": rng.choice(["buff", "costume", "accessory"]), "name": f"Item {i % 300}", "enhance": i // 300,
+             "price": rng.randint(1, 1000), "rate": rng.random() * 3}
+            for i in range(3000)
+        ]
+        snapshot = Snapshot({"timestamp": "2024-01-01T00:00:00", "data": items})
+        alerts = [
+            Alert(id, rng.randint(1, 50), "profit", rng.choice(["price", "rate"]), rng.choice([">=", "<="]), rng.choice([rng.randint(1, 1000), rng.random() * 3]),
+                  name=rng.choice([None, f"item {rng.randint(0, 310)}"]), enhance=rng.choice([None, rng.randint(0, 10)]), category=rng.choice([None, "buff", "costume"]))
+            for id in range(1000)
+        ]
+        triggers = AlertIndex(alerts).evaluate("profit", snapshot)
+        self.assertEqual(
+            {trigger.alert.id: (trigger.value, trigger.count) for trigger in triggers},
+            brute_force(alerts, items),
+        )
+        for trigger in triggers:
+            self.assertEqual(snapshot.columns[trigger.alert.metric][trigger.row_id], trigger.value)
+        self.assertEqual(AlertIndex(alerts).evaluate("trends", snapshot), [])
+
+class TestAlertStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "alerts.json"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_persisted(self):
+        store = AlertStore(self.path)
+        first = store.add(1, "profit", "price", ">=", 100, name="sword", enhance=3)
+        second = store.add(2, "trends", "rate", "<=", 1.5, category="costume")
+        store.write(*store.dump())
+        self.assertTrue(store.remove(2, second.id))
+        self.assertFalse(store.remove(2, first.id))
+        store.write(*store.dump())
+
+        loaded = AlertStore(self.path)
+        self.assertEqual([alert.to_dict() for alert in loaded.of_user(1)], [first.to_dict()])
+        self.assertEqual(len(loaded), 1)
+        self.assertEqual(loaded.add(3, "profit", "stock", ">=", 1).id, 3)
+
+    def test_stale_write_is_skipped(self):
+        store = AlertStore(self.path)
+        store.add(1, "profit", "price", ">=", 100)
+        old = store.dump()
+        store.add(1, "profit", "price", ">=", 200)
+        store.write(*store.dump())
+        store.write(*old)
+        self.assertEqual(len(AlertStore(self.path)), 2)
+
+    def test_notified_once_until_cleared(self):
+        store = AlertStore(self.path)
+        alert = store.add(1, "profit", "price", ">=", 100, name="sword", enhance=0)
+        low = Snapshot({"timestamp": "2024-01-01T00:00:00", "data": [{"name": "Sword", "enhance": 0, "price": 50}]})
+        high = Snapshot({"timestamp": "2024-01-01T01:00:00", "data": [{"name": "Sword", "enhance": 0, "price": 150}]})
+        notified = []
+        for snapshot in (high, high, low, high):
+            fresh = store.update_firing("profit", store.index().evaluate("profit", snapshot))
+            notified.append([trigger.alert.id for trigger in fresh])
+        self.assertEqual(notified, [[alert.id], [], [], [alert.id]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json
+import tempfile
+import unittest
+
+from reports.archive import SnapshotArchive, summarize
+
+def columns(*items):
+    """Snapshot columns of (name, enhance, price) items."""
+    return {
+        "name": [name for name, _, _ in items],
+        "enhance": [enhance for _, enhance, _ in items],
+        "price": [price for _, _, price in items],
+        "averagetradesperday": [1.5 for _ in items],
+    }
+
+class TestSnapshotArchive(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+        self.archive = SnapshotArchive(self.path)
+
+    def tearDown(self):
+        self.archive.close()
+        self.directory.cleanup()
+
+    def reopen(self):
+        self.archive.close()
+        self.archive = SnapshotArchive(self.path)
+
+    def test_history_of_an_item(self):
+        self.archive.append("2024-01-01T00:00:00", columns(("Ring", 1, 100), ("Sword", 0, 50)))
+        self.archive.append("2024-01-02T00:00:00", columns(("Sword", 0, 60), ("Ring", 1, 120), ("Ring", 2, 900)))
+        self.archive.append("2024-01-03T00:00:00", columns(("ring", "1", 90)))
+
+        history = self.archive.history("RING", 1)
+        self.assertEqual([point["price"] for point in history], [100, 120, 90])
+        self.assertEqual(history[0]["timestamp"], "2024-01-01T00:00:00")
+        self.assertIsNone(history[0]["profit"])
+        self.assertEqual(history[0]["averagetradesperday"], 1.5)
+        self.assertEqual([point["price"] for point in self.archive.history("sword", 0)], [50, 60])
+        self.assertEqual(self.archive.history("unknown", 0), [])
+        self.assertEqual(self.archive.enhance_levels("Ring"), [1, 2])
+
+    def test_older_or_same_snapshot_is_ignored(self):
+        self.assertTrue(self.archive.append("2024-01-02T00:00:00", columns(("Ring", 1, 100))))
+        self.assertFalse(self.archive.append("2024-01-02T00:00:00", columns(("Ring", 1, 200))))
+        self.assertFalse(self.archive.append("2024-01-01T00:00:00", columns(("Ring", 1, 300))))
+        self.assertEqual([point["price"] for point in self.archive.history("ring", 1)], [100])
+
+    def test_history_within_days(self):
+        for day in range(1, 11):
+            self.archive.append(f"2024-01-{day:02d}T00:00:00", columns(("Ring", 1, day)))
+        self.assertEqual([point["price"] for point in self.archive.history("ring", 1, days=3)], [7, 8, 9, 10])
+        self.assertEqual(len(self.archive.window()), 10)
+
+    def test_reopen_keeps_history(self):
+        self.archive.append("2024-01-01T00:00:00", columns(("Ring", 1, 100)))
+        self.reopen()
+        self.archive.append("2024-01-02T00:00:00", columns(("Ring", 1, 110), ("Robe", 3, 5)))
+        self.assertEqual(self.archive.latest, "2024-01-02T00:00:00")
+        self.assertEqual([point["price"] for point in self.archive.history("ring", 1)], [100, 110])
+        self.assertEqual(self.archive.rows, 3)
+
+    def test_incomplete_append_is_dropped(self):
+        self.archive.append("2024-01-01T00:00:00", columns(("Ring", 1, 100)))
+        self.archive.close()
+        # Rows written without their snapshots.jsonl line, as if the bot stopped while appending
+        with open(self.path / "price.bin", "ab") as f:
+            f.write(b"\0" * 8)
+        self.archive = SnapshotArchive(self.path)
+        self.assertEqual((self.path / "price.bin").stat().st_size, 8)
+        self.archive.append("2024-01-02T00:00:00", columns(("Ring", 1, 120)))
+        self.assertEqual([point["price"] for point in self.archive.history("ring", 1)], [100, 120])
+
+    def test_items_are_registered_once(self):
+        self.archive.append("2024-01-01T00:00:00", columns(("Ring", 1, 100)))
+        self.archive.append("2024-01-02T00:00:00", columns(("ring", 1, 100)))
+        with open(self.path / "items.json", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), [["ring", 1]])
+
+class TestSummarize(unittest.TestCase):
+    def test_price_movement(self):
+        points = [
+            {"timestamp": "2024-01-01T00:00:00", "price": 100, "averagetradesperday": 1.0},
+            {"timestamp": "2024-01-02T00:00:00", "price": None, "averagetradesperday": None},
+            {"timestamp": "2024-01-03T00:00:00", "price": 150, "averagetradesperday": 3.0},
+            {"timestamp": "2024-01-04T00:00:00", "price": 125, "averagetradesperday": 2.0},
+        ]
+        summary = summarize(points)
+        self.assertEqual((summary["first"], summary["last"], summary["low"], summary["high"]), (100, 125, 100, 150))
+        self.assertAlmostEqual(summary["change"], 25.0)
+        self.assertAlmostEqual(summary["averagetradesperday"], 2.0)
+        self.assertEqual(summary["count"], 4)
+        self.assertEqual(summary["since"], "2024-01-01T00:00:00")
+
+    def test_without_prices(self):
+        self.assertIsNone(summarize([]))
+
+if __name__ == "__main__":
+    unittest.main()
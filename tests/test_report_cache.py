@@ -0,0 +1,102 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import asyncio
+import unittest
+
+from reports.cache import ReportCache
+
+class FakeUpstream:
+    def __init__(self, timestamp="2024-01-01T00:00:00"):
+        self.calls = 0
+        self.timestamp = timestamp
+        self.fail = False
+
+    async def fetch(self, report_type, period):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise ConnectionError("down")
+        return {"timestamp": self.timestamp, "data": [report_type, period, self.calls]}
+
+class TestReportCache(unittest.IsolatedAsyncioTestCase):
+    async def test_coalesce_concurrent_misses(self):
+        upstream = FakeUpstream()
+        cache = ReportCache(upstream.fetch)
+        results = await asyncio.gather(*(cache.get("profit", 7) for _ in range(20)))
+        self.assertEqual(upstream.calls, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(cache.stats()["misses"], 20)
+        self.assertEqual(cache.stats()["coalesced"], 19)
+
+    async def test_fresh_hit(self):
+        upstream = FakeUpstream()
+        cache = ReportCache(upstream.fetch, ttl=60)
+        await cache.get("profit")
+        await cache.get("profit")
+        self.assertEqual(upstream.calls, 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    async def test_stale_while_revalidate(self):
+        upstream = FakeUpstream()
+        cache = ReportCache(upstream.fetch, ttl=10, max_stale=100)
+        first = await cache.get("trends", 7)
+        cache.entries[("trends", 7)].fetched_at -= 20
+        upstream.timestamp = "2024-01-02T00:00:00"
+        stale = await cache.get("trends", 7)
+        self.assertIs(stale, first)
+        await asyncio.sleep(0.05)
+        self.assertEqual(upstream.calls, 2)
+        self.assertEqual(cache.peek("trends", 7)["timestamp"], "2024-01-02T00:00:00")
+
+    async def test_unchanged_snapshot_keeps_value(self):
+        upstream = FakeUpstream()
+        cache = ReportCache(upstream.fetch, ttl=0)
+        first = await cache.get("profit")
+        await asyncio.sleep(0.05)
+        second = cache.put("profit", None, {"timestamp": upstream.timestamp, "data": []})
+        self.assertIs(second, first)
+        self.assertEqual(cache.stats()["unchanged"], 1)
+
+    async def test_failed_refresh_keeps_stale_value(self):
+        upstream = FakeUpstream()
+        cache = ReportCache(upstream.fetch, ttl=0)
+        first = await cache.get("profit")
+        upstream.fail = True
+        self.assertIs(await cache.get("profit"), first)
+        await asyncio.sleep(0.05)
+        self.assertIs(cache.peek("profit"), first)
+        self.assertEqual(cache.stats()["errors"], 1)
+
+    async def test_evict_least_recently_used(self):
+        upstream = FakeUpstream()
+        cache = ReportCache(upstream.fetch, max_entries=2)
+        await cache.get("profit", 1)
+        await cache.get("profit", 2)
+        await cache.get("profit", 1)
+        await cache.get("profit", 3)
+        self.assertEqual(list(cache.entries), [("profit", 1), ("profit", 3)])
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    async def test_purge_expired_entries(self):
+        upstream = FakeUpstream()
+        cache = ReportCache(upstream.fetch, ttl=10, max_stale=100)
+        await cache.get("trends", 7)
+        cache.entries[("trends", 7)].fetched_at -= 200
+        await cache.get("profit")
+        self.assertNotIn(("trends", 7), cache.entries)
+
+    async def test_close_cancels_inflight(self):
+        upstream = FakeUpstream()
+        cache = ReportCache(upstream.fetch)
+        pending = asyncio.ensure_future(cache.get("profit"))
+        await asyncio.sleep(0)
+        await cache.close()
+        self.assertEqual(cache.inflight, {})
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import asyncio
+import importlib.util
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from reports import chart
+from reports.chart import ChartRenderer
+
+HAS_MATPLOTLIB = importlib.util.find_spec("matplotlib") is not None
+TIMES = ["2024-01-01T00:00:00", "2024-01-01T01:00:00", "2024-01-01T02:00:00"]
+LABELS = {"title": "III : Storm Sword", "price": "Price", "volume": "Average Trades", "font": ["Not A Font"]}
+
+class TestChartRenderer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.renderer = ChartRenderer(max_entries=2, executor=self.executor)
+        self.calls = 0
+        self.release = threading.Event()
+
+        def render(times, prices, volumes, labels):
+            self.calls += 1
+            self.release.wait(1)
+            if prices[0] is None:
+                raise ImportError("No module named 'matplotlib'")
+            return f"{labels['title']} {prices}".encode()
+
+        patcher = mock.patch.object(chart, "render_chart", render)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self):
+        self.renderer.close()
+        self.executor.shutdown()
+
+    async def render(self, key, prices=(1, 2, 3)):
+        return await self.renderer.render(key, TIMES, list(prices), [1, 1, 1], LABELS)
+
+    async def test_identical_charts_render_once(self):
+        first = asyncio.gather(*(self.render("a") for _ in range(5)))
+        await asyncio.sleep(0)
+        self.release.set()
+        self.assertEqual(set(await first), {b"III : Storm Sword [1, 2, 3]"})
+        self.assertEqual(await self.render("a"), b"III : Storm Sword [1, 2, 3]")
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.renderer.stats(), {"charts": 1, "chart_hits": 1, "chart_misses": 1, "chart_coalesced": 4, "chart_errors": 0})
+
+    async def test_least_recently_used_is_dropped(self):
+        self.release.set()
+        for key in ("a", "b", "a", "c"):
+            await self.render(key)
+        self.assertEqual(list(self.renderer.images), ["a", "c"])
+
+    async def test_failure_is_not_kept(self):
+        self.release.set()
+        with self.assertRaises(ImportError):
+            await self.render("a", prices=(None, 2, 3))
+        self.assertEqual(await self.render("a"), b"III : Storm Sword [1, 2, 3]")
+        self.assertEqual(self.renderer.errors, 1)
+
+    async def test_cancelled_caller_does_not_cancel_the_rendering(self):
+        first = asyncio.create_task(self.render("a"))
+        second = asyncio.create_task(self.render("a"))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.release.set()
+        self.assertEqual(await second, b"III : Storm Sword [1, 2, 3]")
+        self.assertEqual(self.calls, 1)
+
+@unittest.skipUnless(HAS_MATPLOTLIB, "matplotlib is not installed")
+class TestRenderChart(unittest.IsolatedAsyncioTestCase):
+    async def test_png_from_a_worker_process(self):
+        renderer = ChartRenderer(workers=1)
+        try:
+            image = await renderer.render("a", TIMES, [100, None, 300], [1.5, 2.0, None], LABELS)
+        finally:
+            renderer.close()
+        self.assertTrue(image.startswith(b"\x89PNG\r\n\x1a\n"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from reports.client import REQUEST_ERRORS, ReportAPIError, ReportClient
+from reports.ingest import ReportFormatError, ReportStreamParser
+from reports.health import CLOSED, OPEN, CircuitBreaker, CircuitOpenError
+
+REPORT = {"timestamp": "2024-01-01T00:00:00", "data": []}
+
+class TestReportClient(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.periods = []
+        self.health_status = 503
+
+        async def report(request):
+            self.periods.append(request.query.get("period"))
+            match request.match_info["report_type"]:
+                case "profit":
+                    return web.json_response(REPORT)
+                case "broken":
+                    return web.Response(text="<html>not json</html>")
+                case "down":
+                    return web.Response(status=502)
+                case "slow":
+                    await asyncio.sleep(1)
+                    return web.json_response(REPORT)
+                case _:
+                    return web.Response(status=404)
+
+        async def health(request):
+            return web.Response(status=self.health_status)
+
+        app = web.Application()
+        app.router.add_get("/report/{report_type}", report)
+        app.router.add_get("/health", health)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        self.client = ReportClient(str(self.server.make_url("/")), timeout=0.2, breaker=self.breaker)
+        await self.client.start()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.server.close()
+
+    async def test_fetch_report(self):
+        self.assertEqual(await self.client.fetch_report("profit", 7), REPORT)
+        self.assertEqual(self.periods, ["7"])
+
+    async def test_stream_report(self):
+        parser = await self.client.stream_report("profit", None, ReportStreamParser(), chunk_size=8)
+        self.assertEqual(parser.timestamp, REPORT["timestamp"])
+        self.assertEqual(parser.size, 0)
+
+    async def test_stream_report_in_executor(self):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            parser = await self.client.stream_report("profit", None, ReportStreamParser(), chunk_size=8, executor=executor)
+        self.assertEqual(parser.timestamp, REPORT["timestamp"])
+
+    async def test_non_200_status(self):
+        with self.assertRaises(ReportAPIError) as context:
+            await self.client.fetch_report("unknown")
+        self.assertEqual(context.exception.status, 404)
+
+    async def test_health_status(self):
+        self.assertEqual(await self.client.health(), 503)
+
+    async def test_invalid_body_is_a_request_error(self):
+        with self.assertRaises(ReportFormatError):
+            await self.client.fetch_report("broken")
+
+    async def test_timeout_is_a_request_error(self):
+        with self.assertRaises(REQUEST_ERRORS):
+            await self.client.fetch_report("slow")
+
+    async def test_closed_client_does_not_reopen(self):
+        await self.client.close()
+        with self.assertRaises(RuntimeError):
+            await self.client.fetch_report("profit")
+        self.assertIsNone(self.client.session)
+
+    async def test_circuit_opens_and_fails_fast(self):
+        for _ in range(2):
+            with self.assertRaises(ReportAPIError):
+                await self.client.fetch_report("down")
+        self.assertEqual(self.breaker.state, OPEN)
+        requests = len(self.periods)
+        with self.assertRaises(CircuitOpenError):
+            await self.client.stream_report("profit", None, ReportStreamParser())
+        self.assertEqual(len(self.periods), requests)
+
+    async def test_client_errors_do_not_open_the_circuit(self):
+        for _ in range(3):
+            with self.assertRaises(ReportAPIError):
+                await self.client.fetch_report("unknown")
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    async def test_invalid_bodies_do_not_open_the_circuit(self):
+        for _ in range(3):
+            with self.assertRaises(ReportFormatError):
+                await self.client.fetch_report("broken")
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertEqual(self.breaker.failures, 0)
+
+    async def test_healthy_check_closes_the_circuit(self):
+        for _ in range(2):
+            with self.assertRaises(REQUEST_ERRORS):
+                await self.client.fetch_report("slow")
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(await self.client.health(), 503)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.health_status = 200
+        self.assertEqual(await self.client.health(), 200)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertEqual(await self.client.fetch_report("profit"), REPORT)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import random
+import unittest
+
+from reports.diff import diff_snapshots, relative_change
+from reports.snapshot import Snapshot
+
+THRESHOLDS = {"price": 5, "profit": 10}
+
+def snapshot(timestamp, items):
+    return Snapshot({"timestamp": timestamp, "data": items})
+
+class TestDiff(unittest.TestCase):
+    def test_relative_change(self):
+        self.assertEqual(relative_change(100, 110), 10)
+        self.assertEqual(relative_change(-100, -50), 50)
+        self.assertEqual(relative_change(0, 0), 0)
+        self.assertIsNone(relative_change(0, 5))
+        self.assertIsNone(relative_change(None, 5))
+
+    def test_added_removed_and_changed(self):
+        previous = snapshot("2024-01-01T00:00:00", [
+            {"name": "Sword", "enhance": 0, "price": 100, "profit": 10},
+            {"name": "Sword", "enhance": 1, "price": 200, "profit": 20},
+            {"name": "Ring", "enhance": 0, "price": 300, "profit": 30},
+            {"name": "Robe", "enhance": 0, "price": 400, "profit": 40},
+        ])
+        current = snapshot("2024-01-01T01:00:00", [
+            {"name": "Ring", "enhance": "0", "price": 330, "profit": 31},
+            {"name": "SWORD", "enhance": 0, "price": 102, "profit": 10},
+            {"name": "Shield", "enhance": 3, "price": 500, "profit": 50},
+            {"name": "Robe", "enhance": 0, "price": 400, "profit": 20},
+        ])
+        diff = diff_snapshots(previous, current, THRESHOLDS, rank_threshold=2)
+        self.assertEqual(diff.added, [2])
+        self.assertEqual(diff.removed, [1])
+        changes = {(change.before, change.after): (change.changes, change.moved) for change in diff.changed}
+        self.assertEqual(changes, {
+            (2, 0): ({"price": 10.0}, True),
+            (3, 3): ({"profit": -50.0}, False),
+        })
+        self.assertEqual([change.after for change in diff.largest_changes(1)], [3])
+
+    def test_change_from_zero(self):
+        previous = snapshot("2024-01-01T00:00:00", [{"name": "Sword", "enhance": 0, "price": 100, "profit": 0}, {"name": "Ring", "enhance": 0, "price": 100, "profit": 0}])
+        current = snapshot("2024-01-01T01:00:00", [{"name": "Sword", "enhance": 0, "price": 200, "profit": 0}, {"name": "Ring", "enhance": 0, "price": 101, "profit": 5}])
+        diff = diff_snapshots(previous, current, THRESHOLDS, rank_threshold=0)
+        changes = {change.after: change.changes for change in diff.changed}
+        self.assertEqual(changes, {0: {"price": 100.0}, 1: {"profit": None}})
+        # Listed before any relative change
+        self.assertEqual([change.after for change in diff.largest_changes(1)], [1])
+
+    def test_unchanged(self):
+        items = [{"name": f"item {i}", "enhance": i % 11, "price": i} for i in range(100)]
+        self.assertFalse(diff_snapshots(snapshot("2024-01-01T00:00:00", items), snapshot("2024-01-01T01:00:00", items), THRESHOLDS, 1))
+
+    def test_matches_full_comparison(self):
+        rng = random.Random(0)
+        items = [{"name": f"item {i}", "enhance": rng.randint(0, 10), "price": rng.randint(1, 1000)} for i in range(2000)]
+        moved = items[100:] + [{"name": f"new {i}", "enhance": 0, "price": 1} for i in range(50)]
+        moved = [dict(item, price=item["price"] * rng.choice([1, 1, 2])) for item in moved]
+        diff = diff_snapshots(snapshot("2024-01-01T00:00:00", items), snapshot("2024-01-01T01:00:00", moved), THRESHOLDS, 0)
+
+        before = {(item["name"], item["enhance"]): item for item in items}
+        after = {(item["name"], item["enhance"]): item for item in moved}
+        self.assertEqual(len(diff.added), len(after.keys() - before.keys()))
+        self.assertEqual(len(diff.removed), len(before.keys() - after.keys()))
+        doubled = [key for key in after.keys() & before.keys() if after[key]["price"] != before[key]["price"]]
+        self.assertEqual(len(diff.changed), len(doubled))
+
+if __name__ == "__main__":
+    unittest.main()
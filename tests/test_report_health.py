@@ -0,0 +1,103 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import unittest
+
+from reports.health import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, HealthMonitor, percentile
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=self.clock)
+
+    def fail(self, times):
+        for _ in range(times):
+            self.breaker.before()
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        self.fail(2)
+        self.breaker.before()
+        self.breaker.record_success()
+        self.fail(2)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.fail(1)
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError) as context:
+            self.breaker.before()
+        self.assertEqual(context.exception.retry_in, 10)
+        self.assertEqual(self.breaker.rejected, 1)
+
+    def test_one_trial_call_after_reset_timeout(self):
+        self.fail(3)
+        self.clock.now = 10
+        self.breaker.before()
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        # Other calls keep failing fast while the trial runs
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.before()
+
+    def test_failed_trial_opens_again(self):
+        self.fail(3)
+        self.clock.now = 10
+        self.breaker.before()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.clock.now = 15
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before()
+
+    def test_cancelled_trial_is_released(self):
+        self.fail(3)
+        self.clock.now = 10
+        self.breaker.before()
+        self.breaker.release()
+        self.breaker.before()
+
+    def test_success_closes_an_open_circuit(self):
+        self.fail(3)
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.before()
+
+class TestHealthMonitor(unittest.TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([3.0], 95), 3.0)
+        self.assertIsNone(percentile([], 50))
+
+    def test_summary(self):
+        clock = Clock()
+        monitor = HealthMonitor(history=4, clock=clock)
+        self.assertEqual(monitor.summary()["checks"], 0)
+        self.assertIsNone(monitor.summary()["ok"])
+        for latency in (9.0, 0.1, 0.2, 0.3):
+            monitor.record(latency, 200, True)
+        clock.now = 5
+        monitor.record(10.0, None, False)
+        summary = monitor.summary()
+        # The oldest check is dropped, failed checks count in the success rate but not in the latency
+        self.assertEqual(summary["checks"], 4)
+        self.assertEqual(summary["success_rate"], 0.75)
+        self.assertEqual(summary["p50"], 0.2)
+        self.assertEqual(summary["p95"], 0.3)
+        self.assertFalse(summary["ok"])
+        self.assertIsNone(summary["status"])
+        self.assertEqual(summary["age"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
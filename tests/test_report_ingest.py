@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json
+import random
+import unittest
+
+from reports.ingest import FIELDS, ReportFormatError, ReportStreamParser
+
+def items(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "category": rng.choice(["buff", "costume", "accessory"]),
+            "name": f"Ítem {i} \\u2605",
+            "enhance": rng.randint(0, 10),
+            "price": rng.randint(1, 10 ** 9),
+            "profit": rng.randint(-10 ** 6, 10 ** 6),
+            "rate": rng.random(),
+            "stock": rng.randint(0, 99),
+            "unused": {"nested": [1, 2, 3]},
+        }
+        for i in range(count)
+    ]
+
+def parse(body, chunk_size, **kwargs):
+    parser = ReportStreamParser(**kwargs)
+    for start in range(0, len(body), chunk_size):
+        if not parser.feed(body[start:start + chunk_size]):
+            return parser
+    parser.close()
+    return parser
+
+class TestReportStreamParser(unittest.TestCase):
+    def test_matches_full_decode_at_any_chunk_size(self):
+        data = items(200)
+        body = json.dumps({"timestamp": "2024-01-01T00:00:00", "data": data}, indent=1, ensure_ascii=False).encode("utf-8")
+        for chunk_size in (1, 7, 64, 4096, len(body)):
+            parser = parse(body, chunk_size)
+            self.assertEqual(parser.timestamp, "2024-01-01T00:00:00")
+            self.assertEqual(parser.size, 200)
+            for field in FIELDS:
+                self.assertEqual(parser.columns[field], [item.get(field) for item in data], (chunk_size, field))
+            self.assertNotIn("unused", parser.columns)
+
+    def test_timestamp_after_data_and_empty_data(self):
+        parser = parse(b'{"data": [], "status": null, "timestamp": "t"}', 3)
+        self.assertEqual(parser.timestamp, "t")
+        self.assertEqual(parser.size, 0)
+
+    def test_stop_on_known_timestamp(self):
+        body = json.dumps({"timestamp": "t", "data": items(100)}).encode()
+        parser = parse(body, 16, known_timestamp="t")
+        self.assertTrue(parser.unchanged)
+        self.assertEqual(parser.size, 0)
+
+    def test_invalid_bodies(self):
+        for body in (b"<html>", b'{"timestamp": "t", "data": [1]}', b'{"timestamp": "t", "data": [{}', b'{"data": []}', b'{"timestamp": "t"} x', b'{"timestamp": "\xff"}'):
+            with self.assertRaises(ReportFormatError, msg=body):
+                parse(body, 4)
+
+if __name__ == "__main__":
+    unittest.main()
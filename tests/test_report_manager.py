@@ -0,0 +1,244 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import asyncio
+import importlib.util
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from aiohttp.test_utils import TestServer
+
+from benchmarks.bench_report_command import FakeBot, FakeContext, FakeUser, run_load
+from benchmarks.stub_report_api import StubReportAPI
+import settings
+from catalog import Catalog
+from cogs.report_manager import ReportManager
+from reports.chart import ChartRenderer
+from reports.diff import diff_snapshots
+from reports.snapshot import Snapshot
+from reports.view import ReportPager
+
+class TestReportManager(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.api = StubReportAPI(items=200, seed=1)
+        self.server = TestServer(self.api.app())
+        await self.server.start_server()
+
+        self.archive = tempfile.TemporaryDirectory()
+        patches = {
+            "api_url": str(self.server.make_url("")),
+            "report_archive_directory": Path(self.archive.name),
+            "report_prefetch_interval": 0,
+            "api_health_interval": 0,
+            "api_breaker_failures": 2,
+        }
+        for name, value in patches.items():
+            patcher = mock.patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.bot = FakeBot(Catalog(settings.languages_directory / "en"))
+        self.cog = ReportManager(self.bot)
+        self.cog.bot_message = self.bot.catalog.get("templates/bot")
+        await self.cog.cog_load()
+
+    async def asyncTearDown(self):
+        await self.cog.cog_unload()
+        await self.server.close()
+        self.archive.cleanup()
+
+    async def report(self, *arguments):
+        ctx = FakeContext(FakeUser(42))
+        # Past the admission control, which is tested on its own
+        await self.cog.report.callback.__wrapped__(self.cog, ctx, *arguments)
+        return ctx
+
+    async def test_report_is_filtered(self):
+        ctx = await self.report("p", "buff", None, "3")
+        embed, = ctx.embeds
+        self.assertEqual(embed.title, "Top Profitable Items")
+        self.assertIn("Filter by category: buff", embed.description)
+        items = embed.fields[:-1]
+        self.assertTrue(items)
+        self.assertTrue(all(field.name.startswith("III : ") for field in items))
+        self.assertTrue(all("Category: buff" in field.value for field in items))
+
+    async def test_report_filtered_by_level_zero(self):
+        ctx = await self.report("t", None, None, "0")
+        embed = ctx.embeds[0]
+        self.assertIn("Filter by enhance level: 0", embed.description)
+        snapshot = self.cog.cache.peek("trends", None)
+        expected = snapshot.query(enhance=0)
+        self.assertTrue(expected)
+        self.assertLess(len(expected), snapshot.size)
+        pages = ctx.sent[0].get("view")
+        self.assertEqual(pages.pages if pages is not None else 1, self.cog.page_count(expected))
+        if pages is not None:
+            pages.stop()
+
+    async def test_long_report_is_paged(self):
+        ctx = await self.report("t")
+        message, = ctx.sent
+        self.assertIsInstance(message["view"], ReportPager)
+        self.assertEqual(message["view"].pages, -(-200 // settings.report_page_size))
+        self.assertEqual(len(message["embed"].fields), settings.report_page_size + 1)
+        message["view"].stop()
+
+    async def test_invalid_arguments(self):
+        ctx = await self.report("x")
+        self.assertEqual(ctx.sent[0]["content"], "Invalid report type: x")
+        ctx = await self.report("t", None, None, None, "31")
+        self.assertEqual(ctx.sent[0]["content"], "Invalid period: 31")
+        ctx = await self.report("t", None, None, None, "abc")
+        self.assertEqual(ctx.sent[0]["content"], "Invalid period: abc")
+        ctx = await self.report("p", None, None, "x")
+        self.assertEqual(ctx.sent[0]["content"], "Invalid enhance level")
+        self.assertEqual(self.api.requests, 0)
+
+    async def test_invalid_history_arguments(self):
+        for arguments, content in [(("sword", "abc"), "Invalid enhance level"), (("sword", "11"), "Invalid enhance level"),
+                                   (("sword", None, "abc"), "Invalid period: abc"), (("sword", "3", "31"), "Invalid period: 31")]:
+            ctx = FakeContext(FakeUser(42))
+            await self.cog.history.callback(self.cog, ctx, "t", *arguments)
+            self.assertEqual(ctx.sent[0]["content"], content)
+
+    async def test_sorted_report(self):
+        ctx = await self.report("p", "buff", None, None, None, "profit", "asc")
+        embed = ctx.embeds[0]
+        self.assertIn("Sorted by profit (ascending)", embed.description)
+        snapshot = self.cog.cache.peek("profit", None)
+        rows = snapshot.query(category="buff")
+        expected = sorted(rows, key=lambda row_id: snapshot.columns["profit"][row_id])[:settings.report_page_size]
+        field_template = self.bot.catalog.get("templates/profit_report")["fields"][0]
+        names = [field_template["name"].format(**snapshot.row_labels(row_id)) for row_id in expected]
+        self.assertEqual([field.name for field in embed.fields[:-1]], names)
+        ctx.sent[0]["view"].stop()
+
+        ctx = await self.report("p", None, None, None, None, "color")
+        self.assertEqual(ctx.sent[0]["content"], "Invalid sort key: color")
+        ctx = await self.report("p", None, None, None, None, "rate", "up")
+        self.assertEqual(ctx.sent[0]["content"], "Invalid order: up")
+
+    async def test_identical_reports_share_one_request(self):
+        await self.report("p", None, "sword")
+        await self.report("p", None, "sword")
+        await self.report("p", "ring")
+        self.assertEqual(self.api.requests, 1)
+        self.assertEqual(self.cog.embeds.stats()["embed_hits"], 1)
+
+    async def test_cached_report_while_the_api_is_down(self):
+        first = await self.report("p")
+        self.api.error_rate = 1.0
+        for entry in self.cog.cache.entries.values():
+            entry.fetched_at -= settings.report_cache_max_stale
+        ctx = await self.report("p")
+        self.assertEqual(ctx.sent[0]["content"], self.cog.bot_message["report_health"]["fallback"].format(timestamp="2024-01-01T00:00:00"))
+        self.assertEqual(ctx.embeds[0].to_dict(), first.embeds[0].to_dict())
+        ctx.sent[0]["view"].stop()
+        first.sent[0]["view"].stop()
+
+    async def test_error_without_cached_report(self):
+        self.api.error_rate = 1.0
+        ctx = await self.report("p")
+        self.assertEqual(ctx.sent[0]["content"], "status code: 503")
+
+    async def test_health_answers_from_the_prober(self):
+        await self.cog.probe_once()
+        ctx = FakeContext(FakeUser(42))
+        await self.cog.health.callback(self.cog, ctx)
+        lines = ctx.sent[0]["content"].splitlines()
+        self.assertEqual(lines[0], "API server is online and reachable: 200")
+        self.assertIn("Success rate: 100.0% of the last 1 checks", lines)
+        self.assertEqual(self.api.requests, 1)
+
+    async def test_worker_and_inline_rendering_agree(self):
+        inline = await self.report("t", "buff", "storm")
+        self.cog.cache.entries.clear()
+        self.cog.embeds.payloads.clear()
+        with mock.patch.object(settings, "report_inline_items", 0), mock.patch.object(settings, "report_inline_bytes", 0):
+            offloaded = await self.report("t", "buff", "storm")
+        self.assertEqual(self.api.requests, 2)
+        self.assertEqual(offloaded.embeds[0].to_dict(), inline.embeds[0].to_dict())
+
+    async def test_autocomplete_never_calls_the_api(self):
+        interaction = SimpleNamespace(namespace=SimpleNamespace(report_type="t", period=None))
+        self.assertEqual(await self.cog.name_autocomplete(interaction, "sw"), [])
+        self.assertEqual(self.api.requests, 0)
+
+        await self.report("t")
+        names = [choice.value for choice in await self.cog.name_autocomplete(interaction, "storm sw")]
+        self.assertTrue(names)
+        self.assertTrue(all(name.lower().startswith("storm sword") for name in names))
+        categories = [choice.value for choice in await self.cog.category_autocomplete(interaction, "")]
+        self.assertEqual(categories, ["accessory", "buff", "costume"])
+        levels = [choice.value for choice in await self.cog.enhance_autocomplete(interaction, "1")]
+        self.assertEqual(levels, ["1", "10"])
+        self.assertEqual(self.api.requests, 1)
+
+    async def test_new_snapshot_posts_a_digest(self):
+        posted = []
+        self.bot.get_channel = lambda channel_id: f"channel {channel_id}"
+        self.bot.dispatcher = SimpleNamespace(send=lambda channel, **kwargs: posted.append((channel, kwargs["embed"])))
+        with mock.patch.object(settings, "report_feed_channel_id", 7):
+            await self.cog.load_snapshot("profit")
+            await self.cog.load_snapshot("profit", 7)
+            self.assertFalse(self.cog.feed_tasks)
+            self.api.started += timedelta(hours=1)
+            await self.cog.load_snapshot("profit")
+            await asyncio.gather(*self.cog.feed_tasks)
+
+        (channel, embed), = posted
+        self.assertEqual(channel, "channel 7")
+        self.assertEqual(embed.title, "What Changed: Top Profitable Items")
+        self.assertTrue(embed.description.startswith("200 new, 200 gone and 0 changed items"))
+        self.assertEqual([field.name for field in embed.fields], ["New", "Gone"])
+        self.assertEqual(len(embed.fields[0].value.splitlines()), settings.report_feed_max_lines + 1)
+
+    async def test_digest_of_a_change_from_zero(self):
+        previous = Snapshot({"timestamp": "2024-01-01T00:00:00", "data": [{"name": "Ring", "enhance": 0, "price": 100, "profit": 0}]})
+        current = Snapshot({"timestamp": "2024-01-01T01:00:00", "data": [{"name": "Ring", "enhance": 0, "price": 100, "profit": 1500}]})
+        embed = self.cog.render_digest("profit", diff_snapshots(previous, current, {"price": 5, "profit": 10}, 0))
+        field, = embed.fields
+        self.assertIn("profit 0 → 1,500", field.value)
+        self.assertNotIn("inf", field.value)
+
+    async def test_invalid_chart_arguments(self):
+        for arguments, content in [(("abc", None), "Invalid enhance level"), (("3", "abc"), "Invalid period: abc"), (("3", "0"), "Invalid period: 0")]:
+            ctx = FakeContext(FakeUser(42))
+            await self.cog.chart.callback.__wrapped__(self.cog, ctx, "Storm Sword", *arguments)
+            self.assertEqual(ctx.sent[0]["content"], content)
+
+    @unittest.skipUnless(importlib.util.find_spec("matplotlib"), "matplotlib is not installed")
+    async def test_chart_is_rendered_once_per_snapshot(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        self.cog.charts = ChartRenderer(executor=executor)
+        ctx = FakeContext(FakeUser(42))
+        await self.cog.chart.callback.__wrapped__(self.cog, ctx, "Storm Sword", "3")
+        self.assertEqual(ctx.sent[0]["content"], "No archived history for Storm Sword")
+
+        await self.report("t")
+        snapshot = self.cog.cache.peek("trends", None)
+        name, enhance = snapshot.columns["name"][0], snapshot.columns["enhance"][0]
+        for _ in range(2):
+            ctx = FakeContext(FakeUser(42))
+            await self.cog.chart.callback.__wrapped__(self.cog, ctx, name, str(enhance))
+            message, = ctx.sent
+            self.assertEqual(message["embed"].image.url, "attachment://chart.png")
+            self.assertTrue(message["file"].fp.read().startswith(b"\x89PNG"))
+        self.assertEqual(self.cog.charts.stats()["chart_misses"], 1)
+        self.assertEqual(self.cog.charts.stats()["chart_hits"], 1)
+
+    async def test_load(self):
+        report = await run_load(self.cog, requests=100, concurrency=20)
+        self.assertEqual(report["failures"], 0)
+        self.assertLessEqual(self.api.requests, 6)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import unittest
+
+import discord
+
+from reports.render import EmbedMemo, enhance_label, format_decimal, format_thousands, label_columns
+
+class TestLabels(unittest.TestCase):
+    def test_format_thousands(self):
+        self.assertEqual(format_thousands(0), "0")
+        self.assertEqual(format_thousands(1234567), "1,234,567")
+        self.assertEqual(format_thousands(-1234), "-1,234")
+        self.assertEqual(format_thousands(1234.9), "1,234")
+        self.assertEqual(format_thousands("98765"), "98,765")
+        self.assertEqual(format_thousands(None), "-")
+
+    def test_enhance_label(self):
+        self.assertEqual(enhance_label(0), "_")
+        self.assertEqual(enhance_label(4), "IV")
+        self.assertEqual(enhance_label(11), "_")
+
+    def test_label_columns(self):
+        labels = label_columns({"price": [1000, None], "rate": [0.5, 1], "name": ["a", "b"]})
+        self.assertEqual(labels["price"], ["1,000", "-"])
+        self.assertEqual(labels["rate"], ["0.500", "1.000"])
+        self.assertEqual(labels["name"], ["a", "b"])
+        self.assertEqual(format_decimal(2), "2.000")
+
+class TestEmbedMemo(unittest.TestCase):
+    def test_memoized_copy(self):
+        memo = EmbedMemo(max_entries=1)
+        embed = discord.Embed(title="report")
+        embed.add_field(name="a", value="1")
+        memo.put("key", embed)
+        first = memo.get("key")
+        first.add_field(name="b", value="2")
+        second = memo.get("key")
+        self.assertEqual(second.title, "report")
+        self.assertEqual(len(second.fields), 1)
+        self.assertEqual(memo.stats()["embed_hits"], 2)
+
+    def test_lru(self):
+        memo = EmbedMemo(max_entries=1)
+        memo.put("a", discord.Embed(title="a"))
+        memo.put("b", discord.Embed(title="b"))
+        self.assertIsNone(memo.get("a"))
+        self.assertEqual(memo.get("b").title, "b")
+
+if __name__ == "__main__":
+    unittest.main()
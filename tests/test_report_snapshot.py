@@ -0,0 +1,111 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import random
+import unittest
+
+from reports.snapshot import Snapshot
+
+ITEMS = [
+    {"category": "buff", "name": "Sword of Fire", "enhance": 3, "price": 100},
+    {"category": "costume", "name": "Fire Robe", "enhance": "3", "price": 200},
+    {"category": "buff", "name": "Ice Sword", "enhance": 0, "price": 300},
+    {"category": "accessory", "name": "Ring", "enhance": 10, "price": 400},
+]
+
+def scan(items, category=None, name=None, enhance=None):
+    """The filters as the DataFrame masks applied them."""
+    return [
+        row_id for row_id, item in enumerate(items)
+        if (category is None or item["category"] == category)
+        and (name is None or name.lower() in item["name"].lower())
+        and (enhance is None or int(item["enhance"]) == enhance)
+    ]
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.snapshot = Snapshot({"timestamp": "2024-01-01T00:00:00", "data": ITEMS})
+
+    def test_columns(self):
+        self.assertEqual(self.snapshot.size, 4)
+        self.assertEqual(self.snapshot.columns["price"], [100, 200, 300, 400])
+        self.assertEqual(self.snapshot.row(3), ITEMS[3])
+        self.assertEqual(self.snapshot.report_time.year, 2024)
+
+    def test_no_filter(self):
+        self.assertEqual(self.snapshot.query(), [0, 1, 2, 3])
+
+    def test_category_and_enhance(self):
+        self.assertEqual(self.snapshot.query(category="buff"), [0, 2])
+        self.assertEqual(self.snapshot.query(enhance=3), [0, 1])
+        self.assertEqual(self.snapshot.query(category="buff", enhance=3), [0])
+        self.assertEqual(self.snapshot.query(category="unknown"), [])
+
+    def test_name_substring(self):
+        self.assertEqual(self.snapshot.query(name="fire"), [0, 1])
+        self.assertEqual(self.snapshot.query(name="SWORD"), [0, 2])
+        self.assertEqual(self.snapshot.query(name="d o"), [0])
+        self.assertEqual(self.snapshot.query(name="swords"), [])
+
+    def test_short_name(self):
+        self.assertEqual(self.snapshot.query(name="ri"), [3])
+        self.assertEqual(self.snapshot.query(name="i", category="buff"), [0, 2])
+
+    def test_missing_attribute(self):
+        snapshot = Snapshot({"timestamp": "2024-01-01T00:00:00", "data": [{"name": "a"}, {"name": "b", "stock": 1}]})
+        self.assertEqual(snapshot.row(0), {"name": "a", "stock": None})
+        self.assertEqual(snapshot.query(enhance=1), [])
+
+    def test_matches_scan_on_large_snapshot(self):
+        rng = random.Random(0)
+        words = ["sword", "fire", "ice", "robe", "ring", "shield", "dragon", "amulet"]
+        items = [
+            {"category": rng.choice(["buff", "costume", "accessory"]), "name": " ".join(rng.sample(words, 2)), "enhance": rng.randint(0, 10)}
+            for _ in range(20000)
+        ]
+        snapshot = Snapshot({"timestamp": "2024-01-01T00:00:00", "data": items})
+        for filters in ({"name": "dragon"}, {"name": "e s", "category": "buff"}, {"enhance": 7, "name": "ng"}, {"category": "costume", "enhance": 0}):
+            self.assertEqual(snapshot.query(**filters), scan(items, **filters))
+
+class TestSort(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.items = [
+            {"category": rng.choice(["buff", "costume"]), "name": f"item {i}", "enhance": 0,
+             "price": rng.choice([None, rng.randint(0, 50)]), "rate": rng.random()}
+            for i in range(400)
+        ]
+        self.snapshot = Snapshot({"timestamp": "2024-01-01T00:00:00", "data": self.items})
+
+    def expected(self, row_ids, key, descending, k):
+        # A full stable sort, rows without a value last in report order
+        valid = sorted((row_id for row_id in row_ids if self.items[row_id][key] is not None), key=lambda row_id: self.items[row_id][key], reverse=descending)
+        return (valid + [row_id for row_id in row_ids if self.items[row_id][key] is None])[:k]
+
+    def check(self, row_ids):
+        for descending in (True, False):
+            for k in (1, 10, 250, None):
+                self.assertEqual(self.snapshot.top(row_ids, "price", descending, k), self.expected(row_ids, "price", descending, k or len(row_ids)))
+
+    def test_top_without_ranking(self):
+        self.check(self.snapshot.query())
+        self.check(self.snapshot.query(category="buff"))
+        self.assertEqual(self.snapshot.rankings, {})
+
+    def test_top_with_ranking(self):
+        for descending in (True, False):
+            ranking = self.snapshot.ranking("price", descending)
+            self.assertEqual(list(ranking), self.expected(range(400), "price", descending, 400)[:len(ranking)])
+            self.assertIs(self.snapshot.ranking("price", descending), ranking)
+        # Whole snapshot, a large selection walking the ranking, and a small one selected directly
+        self.check(self.snapshot.query())
+        self.check(self.snapshot.query(category="costume"))
+        self.check(self.snapshot.query(name="item 1"))
+
+    def test_missing_key(self):
+        self.assertEqual(self.snapshot.top([3, 1, 2], "stock", True, 2), [3, 1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import random
+import time
+import unittest
+
+from reports.suggest import NameIndex
+
+NAMES = ["Sword of Fire", "Fire Robe", "Ice Sword", "Ring", "Ring", None, "Ancient Ring", "Swordfish Charm"]
+
+class TestNameIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = NameIndex(NAMES)
+
+    def test_distinct_names(self):
+        self.assertEqual(len(self.index), 6)
+        self.assertEqual(self.index.suggest(""), ["Ancient Ring", "Fire Robe", "Ice Sword", "Ring", "Sword of Fire", "Swordfish Charm"])
+
+    def test_name_prefix_then_word_prefix(self):
+        self.assertEqual(self.index.suggest("SWORD"), ["Sword of Fire", "Swordfish Charm", "Ice Sword"])
+        self.assertEqual(self.index.suggest("ri"), ["Ring", "Ancient Ring"])
+
+    def test_substring(self):
+        self.assertEqual(self.index.suggest("ordf"), ["Swordfish Charm"])
+        self.assertEqual(self.index.suggest("ire"), ["Fire Robe", "Sword of Fire"])
+
+    def test_misspelled(self):
+        self.assertEqual(self.index.suggest("ancent ring")[0], "Ancient Ring")
+        self.assertEqual(self.index.suggest("qqqq"), [])
+
+    def test_limit(self):
+        self.assertEqual(self.index.suggest("r", limit=1), ["Ring"])
+
+    def test_lookup_is_fast(self):
+        rng = random.Random(0)
+        words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 8))) for _ in range(2000)]
+        index = NameIndex([" ".join(rng.sample(words, 3)) for _ in range(50000)])
+        queries = [rng.choice(words)[:length] for length in range(1, 8) for _ in range(100)] + ["zzqx", "abcdefg"]
+        start = time.perf_counter()
+        for query in queries:
+            index.suggest(query)
+        self.assertLess((time.perf_counter() - start) / len(queries), 0.001)
+
+if __name__ == "__main__":
+    unittest.main()
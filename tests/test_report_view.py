@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import discord
+
+from reports.view import ReportPager
+
+def interaction(user_id):
+    response = SimpleNamespace(edit_message=AsyncMock(), send_message=AsyncMock())
+    return SimpleNamespace(user=SimpleNamespace(id=user_id), response=response)
+
+class TestReportPager(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.rendered = []
+
+        async def render(page):
+            self.rendered.append(page)
+            return discord.Embed(title=f"page {page}")
+
+        self.view = ReportPager(render, pages=3, author_id=1, not_owner="no", timeout=None)
+
+    async def test_buttons_follow_the_page(self):
+        self.assertTrue(self.view.previous.disabled)
+        self.assertFalse(self.view.next.disabled)
+        await self.view._show(interaction(1), 2)
+        self.assertFalse(self.view.previous.disabled)
+        self.assertTrue(self.view.next.disabled)
+
+    async def test_pages_are_rendered_once(self):
+        first = interaction(1)
+        await self.view._show(first, 1)
+        await self.view._show(interaction(1), 0)
+        await self.view._show(interaction(1), 1)
+        self.assertEqual(self.rendered, [1, 0])
+        self.assertEqual(first.response.edit_message.call_args.kwargs["embed"].title, "page 1")
+
+    async def test_only_the_author_pages(self):
+        other = interaction(2)
+        self.assertFalse(await self.view.interaction_check(other))
+        other.response.send_message.assert_awaited_once_with("no", ephemeral=True)
+        self.assertTrue(await self.view.interaction_check(interaction(1)))
+
+    async def test_timeout_releases_the_selection(self):
+        await self.view.page_embed(0)
+        self.view.message = SimpleNamespace(edit=AsyncMock())
+        await self.view.on_timeout()
+        self.assertIsNone(self.view.render)
+        self.assertEqual(self.view.embeds, {})
+        self.assertTrue(all(item.disabled for item in self.view.children))
+        self.view.message.edit.assert_awaited_once()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import unittest
+
+from rule_engine import RuleEngine
+
+ALL_KEYWORDS = {"topic": {"price": {"chance": 100, "keyword": ["price", "?"], "reply": ["all"]}}}
+ANY_KEYWORDS = {"topic": {"hello": {"chance": 100, "keyword": ["hello", "hi"], "reply": ["any"]}}}
+VIP_KEYWORDS = {
+    "user1": {
+        "id": 1,
+        "topic": {
+            "be_mentioned": {"chance": 100, "keyword": [], "reply": ["mentioned"]},
+            "send": {"chance": 100, "keyword": [], "reply": ["sent"]},
+            "mentions": {"chance": 100, "keyword": [], "reply": ["mentions"]},
+        },
+    },
+    "user2": {
+        "id": 2,
+        "topic": {"be_mentioned": {"chance": 100, "keyword": [], "reply": ["mentioned2"]}},
+    },
+}
+
+class TestRuleEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = RuleEngine(ALL_KEYWORDS, ANY_KEYWORDS, VIP_KEYWORDS, chance=lambda percent: True)
+
+    def test_priority_order(self):
+        self.assertEqual(self.engine.evaluate("price? hello", 1, [2]), (True, "all"))
+        self.assertEqual(self.engine.evaluate("hello", 1, [2]), (True, "mentioned2"))
+        self.assertEqual(self.engine.evaluate("hello", 1, [3]), (True, "mentions"))
+        self.assertEqual(self.engine.evaluate("hello", 3, []), (True, "any"))
+        self.assertEqual(self.engine.evaluate("quiet", 3, [4]), (False, ""))
+
+    def test_vip_sender_without_mentions(self):
+        reply, draft = self.engine.evaluate("quiet", 1, [])
+        self.assertTrue(reply)
+        self.assertIn(draft, ["mentioned", "sent", "mentions"])
+
+    def test_vip_without_sender_rules(self):
+        self.assertEqual(self.engine.evaluate("quiet", 2, []), (False, ""))
+
+    def test_chance_failed(self):
+        engine = RuleEngine(ALL_KEYWORDS, ANY_KEYWORDS, VIP_KEYWORDS, chance=lambda percent: False)
+        self.assertEqual(engine.evaluate("price? hello", 1, [2]), (False, ""))
+
+if __name__ == "__main__":
+    unittest.main()
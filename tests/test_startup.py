@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+# Add the parent directory to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json
+import os
+import subprocess
+import time
+import unittest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Construct the bot and load every cog in a fresh interpreter, without logging in to Discord
+COLD_START = """
+import asyncio, json, settings
+from guild_bot import GuildBot
+
+async def main():
+    bot = GuildBot()
+    async with bot:
+        await bot.load_cogs()
+        bot.startup_profile.mark_ready()
+        listed = sorted(f"cogs.{file[:-3]}" for file in settings.cogs)
+        print(json.dumps({"budget": settings.startup_budget, "listed": listed, "cogs": sorted(bot.extensions), "profile": bot.startup_profile.as_dict()}))
+        for extension in list(bot.extensions):
+            await bot.unload_extension(extension)
+
+asyncio.run(main())
+"""
+
+class TestStartup(unittest.TestCase):
+    def cold_start(self, mode):
+        env = dict(os.environ, STARTUP_MODE=mode, PYTHONDONTWRITEBYTECODE="1")
+        # settings.py requires the guild configuration, any value will do offline
+        for variable in ("GUILD_ID", "LOG_CHANNEL_ID", "WELCOME_CHANNEL_ID", "TEST_CHANNEL_ID", "ROLE_CHANNEL_ID", "CONFERENCE_CHANNEL_ID",
+                         "ADMIN_ROLE_ID", "TESTER_ROLE_ID", "MEMBER_ROLE_ID", "SUBSCRIBER_ROLE_ID", "ROLE_MESSAGE_ID"):
+            env.setdefault(variable, "0")
+        env.setdefault("API_URL", "http://127.0.0.1:9")
+        env["REPORT_PREFETCH_INTERVAL"] = "0"
+
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", COLD_START], cwd=ROOT, env=env, capture_output=True, text=True, timeout=120)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return elapsed, json.loads(result.stdout.strip().splitlines()[-1])
+
+    def test_cold_start_within_budget(self):
+        elapsed, report = self.cold_start("lazy")
+        self.assertLessEqual(elapsed, report["budget"], f"Cold start took {elapsed:.2f}s: {report['profile']}")
+
+    def test_profile_records_every_loaded_cog(self):
+        _, report = self.cold_start("eager")
+        extensions = report["profile"]["extensions"]
+        self.assertEqual(report["cogs"], report["listed"])
+        for cog in report["cogs"]:
+            self.assertIn(cog, extensions)
+            self.assertGreater(extensions[cog]["load"], 0)
+        self.assertIsNotNone(report["profile"]["ready"])
+
+if __name__ == "__main__":
+    unittest.main()